@@ -48,6 +48,7 @@ setup(
         "beautifulsoup4",
         "matplotlib",
         "scipy",
+        "numpy",
         "python-whois",
         "dnspython",
         "geoip2",
@@ -57,6 +58,7 @@ setup(
         "dnspython",
         "pydantic",
         "pydantic_settings",
+        "cryptography",
     ],
     long_description=read("README.md"),
     long_description_content_type="text/markdown",
@@ -1,5 +1,12 @@
 # flake8: noqa
 
-from web2vec import config, utils
+from web2vec import (
+    caching,
+    config,
+    dns_cache,
+    public_suffix,
+    text_scanner,
+    utils,
+)
 from web2vec.crawlers import *
 from web2vec.extractors import *
@@ -0,0 +1,279 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from web2vec.config import config
+
+_MISSING = object()
+
+
+class _Flight:
+    """One in-flight computation that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+@dataclass
+class CacheStats:
+    source: str
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    coalesced: int
+    size: int
+    maxsize: int
+    ttl: int
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a TTL.
+
+    Limits left as ``None`` are read from ``config.cache_max_sizes`` and
+    ``config.cache_ttls`` for the source, falling back to
+    ``config.cache_default_max_size`` and ``config.cache_default_ttl``, so
+    they follow the configuration at runtime. A ``ttl`` of ``0`` disables
+    expiry, a ``maxsize`` of ``0`` disables the size bound.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        maxsize: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        self.source = source
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Optional[int]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._coalesced = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @property
+    def maxsize(self) -> int:
+        """Maximum number of entries, ``0`` for unbounded."""
+        if self._maxsize is not None:
+            return self._maxsize
+        return config.cache_max_sizes.get(self.source, config.cache_default_max_size)
+
+    @property
+    def ttl(self) -> int:
+        """Entry lifetime in seconds, ``0`` for no expiry."""
+        if self._ttl is not None:
+            return self._ttl
+        return config.cache_ttls.get(self.source, config.cache_default_ttl)
+
+    def configure(
+        self, maxsize: Optional[int] = None, ttl: Optional[int] = None
+    ) -> None:
+        """Override the configured limits of this cache."""
+        with self._lock:
+            if maxsize is not None:
+                self._maxsize = maxsize
+            if ttl is not None:
+                self._ttl = ttl
+            self._evict()
+
+    def _is_live(self, entry: Tuple[float, Any, Optional[int]]) -> bool:
+        stored_at, _, ttl = entry
+        ttl = self.ttl if ttl is None else ttl
+        return not ttl or time.monotonic() - stored_at < ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the live value for the key, or default on a miss."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                if self._is_live(entry):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store the value, evicting the least recently used entries.
+
+        :param ttl: Lifetime of this entry in seconds, defaults to the cache TTL.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl_for: Optional[Callable[[Any], Optional[int]]] = None,
+    ) -> Any:
+        """
+        Return the cached value or compute it once for all concurrent callers.
+
+        Callers that miss while the same key is being computed wait for that
+        computation and share its value or exception. Exceptions are not
+        stored, the next call after a failure computes again.
+
+        :param ttl_for: Return the lifetime of a computed value, ``None`` for
+            the cache TTL.
+        """
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            self.set(key, flight.value, ttl_for(flight.value) if ttl_for else None)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _evict(self) -> None:
+        maxsize = self.maxsize
+        while maxsize and len(self._entries) > maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop the entry for the key, return True when it was cached."""
+        with self._lock:
+            return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._expirations = 0
+            self._coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            return entry is not _MISSING and self._is_live(entry)
+
+    def stats(self) -> CacheStats:
+        """Return the hit, miss and eviction counters of this cache."""
+        with self._lock:
+            return CacheStats(
+                source=self.source,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                coalesced=self._coalesced,
+                size=len(self._entries),
+                maxsize=self.maxsize,
+                ttl=self.ttl,
+            )
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(source: str) -> TTLCache:
+    """Return the shared cache of the given source, creating it when missing."""
+    with _caches_lock:
+        if source not in _caches:
+            _caches[source] = TTLCache(source)
+        return _caches[source]
+
+
+def cached(
+    source: str,
+    maxsize: Optional[int] = None,
+    ttl: Optional[int] = None,
+    ttl_for: Optional[Callable[[Any], Optional[int]]] = None,
+) -> Callable[[Callable], Callable]:
+    """
+    Cache the results of the decorated function in the source's TTLCache.
+
+    Positional and keyword calls share entries. Concurrent misses of the
+    same key run the function once and share its result or exception,
+    exceptions are not cached. ``ttl_for`` may give a result its own
+    lifetime, returning ``None`` keeps the cache TTL.
+    The wrapper exposes ``cache``, ``cache_info()``, ``cache_clear()`` and
+    ``invalidate(*args, **kwargs)``.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        cache = get_cache(source)
+        cache.configure(maxsize=maxsize, ttl=ttl)
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs) -> Hashable:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (func.__qualname__, *bound.arguments.items())
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_compute(
+                make_key(args, kwargs), lambda: func(*args, **kwargs), ttl_for
+            )
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.stats
+        wrapper.cache_clear = cache.clear
+        wrapper.invalidate = lambda *args, **kwargs: cache.invalidate(
+            make_key(args, kwargs)
+        )
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, CacheStats]:
+    """Return the statistics of every registered cache by source."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.source: cache.stats() for cache in caches}
+
+
+def invalidate_cache(source: Optional[str] = None) -> None:
+    """Clear the cache of the given source, or of every source."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        if source is None or cache.source == source:
+            cache.clear()
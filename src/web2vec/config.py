@@ -1,5 +1,6 @@
 import os.path
 import tempfile
+from typing import Dict, List
 
 from pydantic import field_validator
 from pydantic_core.core_schema import ValidationInfo
@@ -18,11 +19,53 @@ class Config(BaseSettings):
     open_page_rank_api_key: str = ""
     brave_search_api_key: str = ""
     api_timeout: int = 60
+    tls_connect_timeout: float = 5.0
+    tls_handshake_timeout: float = 5.0
     ssl_verify: bool = True
     crawler_output_path: str = ""
     crawler_spider_depth_limit: int = 5
+    render_cache_path: str = ""
+    render_cache_ttl: int = 86400
+    dns_cache_enabled: bool = True
+    dns_cache_path: str = ""
+    certificate_cache_enabled: bool = True
+    certificate_cache_path: str = ""
+    certificate_cache_ttl: int = 604800
+    certificate_refresh_before_expiry: int = 259200
+    certificate_cache_min_ttl: int = 3600
+    cache_default_max_size: int = 10000
+    cache_default_ttl: int = 86400
+    cache_max_sizes: Dict[str, int] = {"url_lexical": 100000}
+    cache_ttls: Dict[str, int] = {
+        "dns": 3600,
+        "dns_negative": 300,
+        "certificate": 3600,
+        "url_geo": 3600,
+        "url_lexical": 0,
+        "open_phish": 3600,
+        "phishtank": 3600,
+        "url_haus": 3600,
+    }
+    brand_domains_path: str = ""
+    public_suffix_list_path: str = ""
+    public_suffix_include_private: bool = False
+    suspicious_keywords: List[str] = [
+        "login",
+        "update",
+        "verify",
+        "password",
+        "bank",
+        "account",
+    ]
 
-    @field_validator("remote_url_output_path", "crawler_output_path", mode="before")
+    @field_validator(
+        "remote_url_output_path",
+        "crawler_output_path",
+        "render_cache_path",
+        "dns_cache_path",
+        "certificate_cache_path",
+        mode="before",
+    )
     @classmethod
     def set_correct_path(cls, value: str, info: ValidationInfo):
         data = info.data
@@ -33,6 +76,14 @@ class Config(BaseSettings):
                 return os.path.join(data["default_output_path"], "remote")
             if field_name == "crawler_output_path":
                 return os.path.join(data["default_output_path"], "crawler")
+            if field_name == "render_cache_path":
+                return os.path.join(data["default_output_path"], "render_cache")
+            if field_name == "dns_cache_path":
+                return os.path.join(data["default_output_path"], "dns_cache.sqlite3")
+            if field_name == "certificate_cache_path":
+                return os.path.join(
+                    data["default_output_path"], "certificate_cache.sqlite3"
+                )
         return value
 
 
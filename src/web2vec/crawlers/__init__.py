@@ -2,4 +2,6 @@
 
 from web2vec.crawlers.extractors import *
 from web2vec.crawlers.models import *
+from web2vec.crawlers.render_cache import *
+from web2vec.crawlers.snapshot_store import *
 from web2vec.crawlers.spiders import *
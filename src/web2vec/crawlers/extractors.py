@@ -1,13 +1,21 @@
+import json
 import logging
 import os
 import time
 from dataclasses import asdict
-from typing import List
+from typing import Any, Dict, Iterable, List
+from urllib.parse import urlparse
 
 from requests import Response as ReqResponse
 from scrapy.http import Response
 
 from web2vec.config import config
+from web2vec.crawlers.render_cache import RenderCache, RenderedPage
+from web2vec.crawlers.snapshot_store import SnapshotStore
+from web2vec.extractors.brand_similarity_features import (
+    BrandSimilarityFeatures,
+    get_brand_similarity_features_cached,
+)
 from web2vec.extractors.dns_features import (
     DNSFeatures,
     get_dns_features_cached,
@@ -46,7 +54,10 @@ from web2vec.extractors.http_response_features import (
 )
 from web2vec.extractors.ssl_certification_features import (
     CertificateFeatures,
+    get_certificate_features,
     get_certificate_features_cached,
+    get_tls_connection_info,
+    store_tls_connection,
 )
 from web2vec.extractors.url_geo_features import (
     URLGeoFeatures,
@@ -93,21 +104,95 @@ class DNSExtractor(Extractor):
         return get_dns_features_cached(domain)
 
 
+def extract_network_request_urls(
+    performance_log: Iterable[Dict[str, Any]],
+) -> List[str]:
+    """Return HTTP(S) request URLs recorded in a Chrome performance log."""
+    urls = []
+    for entry in performance_log:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get("method") != "Network.requestWillBeSent":
+            continue
+        request_url = message.get("params", {}).get("request", {}).get("url", "")
+        if request_url.startswith(("http://", "https://")):
+            urls.append(request_url)
+    return list(dict.fromkeys(urls))
+
+
 class HtmlBodyExtractor(Extractor):
     FEATURE_CLASS = HtmlBodyFeatures
     FEATURE_TYPE = "HTML"
 
+    RENDER_ALWAYS = "always"
+    RENDER_NEVER = "never"
+    RENDER_AUTO = "auto"
+    RENDER_POLICIES = (RENDER_ALWAYS, RENDER_NEVER, RENDER_AUTO)
+
     def __init__(
         self,
         enable_js_render: bool = False,
         save_html_snapshot: bool = False,
         snapshot_output_dir: str | None = None,
         render_wait_seconds: float = 2.0,
+        render: str | None = None,
+        auto_render_min_text_length: int = 100,
+        render_cache: RenderCache | bool = False,
+        browser_version: str | None = None,
+        snapshot_store: SnapshotStore | bool = False,
+        suspicious_keywords: List[str] | None = None,
+        max_found_elements: int | None = None,
     ) -> None:
-        self.enable_js_render = enable_js_render
+        """
+        :param enable_js_render: Legacy switch, equal to ``render="always"``.
+        :param render: Render policy - ``always`` renders every page with
+            Selenium, ``never`` uses the raw HTTP body only and ``auto``
+            renders only pages flagged by ``detect_likely_js_spa`` or with
+            less visible text than ``auto_render_min_text_length``.
+        :param render_cache: ``True`` or a ``RenderCache`` instance to serve
+            rendered pages from disk, keyed by URL, ``render_wait_seconds``
+            and browser version.
+        :param browser_version: Browser version used in the render cache key,
+            detected from the installed Chrome when not given.
+        :param snapshot_store: ``True`` or a ``SnapshotStore`` instance to keep
+            snapshots deduplicated and compressed in packed segment files
+            instead of one ``.html`` file per URL, it turns on
+            ``save_html_snapshot``. ``True`` opens a store in the ``store``
+            subdirectory of the snapshot directory. ``html_snapshot_path`` then
+            holds a ``sha256:<digest>`` reference into the store.
+        :param suspicious_keywords: Keywords for ``contains_suspicious_keywords``,
+            defaults to ``config.suspicious_keywords``.
+        :param max_found_elements: Cap for the ``found_forms``, ``found_images``,
+            ``found_anchors`` and ``found_media`` lists, ``0`` omits them.
+        """
+        if render is None:
+            render = self.RENDER_ALWAYS if enable_js_render else self.RENDER_NEVER
+        if render not in self.RENDER_POLICIES:
+            raise ValueError(
+                f"Unknown render policy {render!r}, "
+                f"expected one of {self.RENDER_POLICIES}"
+            )
+        self.render = render
+        self.enable_js_render = render != self.RENDER_NEVER
         self.save_html_snapshot = save_html_snapshot
         self.snapshot_output_dir = snapshot_output_dir
         self.render_wait_seconds = render_wait_seconds
+        self.auto_render_min_text_length = auto_render_min_text_length
+        if render_cache is True:
+            render_cache = RenderCache()
+        self.render_cache = render_cache or None
+        self.browser_version = browser_version
+        if snapshot_store is True:
+            snapshot_store = SnapshotStore(
+                directory=os.path.join(self._snapshot_dir(), "store")
+            )
+        self.snapshot_store = snapshot_store or None
+        if self.snapshot_store is not None:
+            self.save_html_snapshot = True
+        self.suspicious_keywords = suspicious_keywords
+        self.max_found_elements = max_found_elements
 
     def _snapshot_dir(self) -> str:
         return self.snapshot_output_dir or os.path.join(
@@ -116,6 +201,8 @@ class HtmlBodyExtractor(Extractor):
 
     def _save_snapshot(self, html: str, url: str, rendered: bool) -> str | None:
         try:
+            if self.snapshot_store:
+                return self.snapshot_store.put(html)
             suffix = "_rendered" if rendered else "_raw"
             file_name = f"{sanitize_filename(url)}{suffix}.html"
             output_dir = self._snapshot_dir()
@@ -128,7 +215,7 @@ class HtmlBodyExtractor(Extractor):
             logger.warning(f"Could not save HTML snapshot for {url}: {exc}")
             return None
 
-    def _render_with_selenium(self, url: str) -> str | None:
+    def _render_with_selenium(self, url: str) -> RenderedPage | None:
         try:
             from selenium import webdriver
             from selenium.webdriver.chrome.options import Options
@@ -147,12 +234,22 @@ class HtmlBodyExtractor(Extractor):
             options.add_argument("--disable-dev-shm-usage")
             options.add_argument("--ignore-certificate-errors")
             options.add_argument("--allow-insecure-localhost")
+            # Record network traffic of the same page load used for rendering
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=options)
             driver.get(url)
             if self.render_wait_seconds > 0:
                 time.sleep(self.render_wait_seconds)
-            return driver.page_source
+            html = driver.page_source
+            try:
+                network_request_urls = extract_network_request_urls(
+                    driver.get_log("performance")
+                )
+            except Exception as exc:  # noqa
+                logger.debug(f"Performance log not available for {url}: {exc}")
+                network_request_urls = []
+            return RenderedPage(html=html, network_request_urls=network_request_urls)
         except Exception as exc:  # noqa
             logger.warning(f"Selenium rendering failed for {url}: {exc}")
             return None
@@ -160,17 +257,70 @@ class HtmlBodyExtractor(Extractor):
             if driver:
                 driver.quit()
 
+    def _get_browser_version(self) -> str:
+        if self.browser_version is None:
+            try:
+                from webdriver_manager.core.os_manager import (
+                    ChromeType,
+                    OperationSystemManager,
+                )
+
+                version = OperationSystemManager().get_browser_version_from_os(
+                    ChromeType.GOOGLE
+                )
+            except Exception as exc:  # noqa
+                logger.debug(f"Could not detect browser version: {exc}")
+                version = None
+            self.browser_version = version or "unknown"
+        return self.browser_version
+
+    def _render(self, url: str) -> RenderedPage | None:
+        if not self.render_cache:
+            return self._render_with_selenium(url)
+
+        browser_version = self._get_browser_version()
+        rendered_page = self.render_cache.get(
+            url, self.render_wait_seconds, browser_version
+        )
+        if rendered_page is not None:
+            return rendered_page
+
+        rendered_page = self._render_with_selenium(url)
+        if rendered_page and rendered_page.html:
+            self.render_cache.set(
+                url, self.render_wait_seconds, browser_version, rendered_page
+            )
+        return rendered_page
+
+    def _needs_render(self, raw_features: HtmlBodyFeatures) -> bool:
+        return (
+            raw_features.likely_js_spa
+            or raw_features.visible_text_length < self.auto_render_min_text_length
+        )
+
     def extract_features(self, response: Response | ReqResponse) -> HtmlBodyFeatures:
         body = response.text
-        source_mode = "raw_http"
-        was_js_rendered = False
+        raw_features = None
+
+        should_render = self.render == self.RENDER_ALWAYS
+        if self.render == self.RENDER_AUTO:
+            raw_features = get_html_body_features(
+                body=body,
+                url=response.url,
+                keywords=self.suspicious_keywords,
+                max_found_elements=self.max_found_elements,
+            )
+            should_render = self._needs_render(raw_features)
 
-        if self.enable_js_render:
-            rendered_body = self._render_with_selenium(response.url)
-            if rendered_body:
-                body = rendered_body
-                source_mode = "selenium_rendered"
-                was_js_rendered = True
+        rendered_page = None
+        if should_render:
+            rendered_page = self._render(response.url)
+
+        was_js_rendered = bool(rendered_page and rendered_page.html)
+        network_request_urls = None
+        if was_js_rendered:
+            body = rendered_page.html
+            network_request_urls = rendered_page.network_request_urls
 
         html_snapshot_path = None
         if self.save_html_snapshot:
@@ -178,12 +328,19 @@ class HtmlBodyExtractor(Extractor):
                 html=body, url=response.url, rendered=was_js_rendered
             )
 
+        if raw_features is not None and not was_js_rendered:
+            raw_features.html_snapshot_path = html_snapshot_path
+            return raw_features
+
         return get_html_body_features(
             body=body,
             url=response.url,
-            source_mode=source_mode,
+            source_mode="selenium_rendered" if was_js_rendered else "raw_http",
             was_js_rendered=was_js_rendered,
             html_snapshot_path=html_snapshot_path,
+            network_request_urls=network_request_urls,
+            keywords=self.suspicious_keywords,
+            max_found_elements=self.max_found_elements,
         )
 
 
@@ -204,9 +361,17 @@ class CertificateExtractor(Extractor):
     FEATURE_TYPE = "SSL"
 
     def extract_features(self, response: Response | ReqResponse) -> CertificateFeatures:
-        return get_certificate_features_cached(
-            hostname=get_domain_from_url(response.url)
-        )
+        parsed_url = urlparse(response.url)
+        hostname = parsed_url.hostname or ""
+        try:
+            port = parsed_url.port or 443
+        except ValueError:
+            port = 443
+        connection = get_tls_connection_info(response)
+        if connection is not None:
+            store_tls_connection(hostname, connection, port)
+            return get_certificate_features(hostname, connection)
+        return get_certificate_features_cached(hostname=hostname, port=port)
 
 
 class UrlGeoExtractor(Extractor):
@@ -225,6 +390,18 @@ class UrlLexicalExtractor(Extractor):
         return get_url_lexical_features_cached(url=response.url)
 
 
+class BrandSimilarityExtractor(Extractor):
+    FEATURE_CLASS = BrandSimilarityFeatures
+    FEATURE_TYPE = "BRAND"
+
+    def extract_features(
+        self, response: Response | ReqResponse
+    ) -> BrandSimilarityFeatures:
+        return get_brand_similarity_features_cached(
+            domain=get_domain_from_url(response.url)
+        )
+
+
 class WhoisExtractor(Extractor):
     FEATURE_CLASS = WhoisFeatures
     FEATURE_TYPE = "WHOIS"
@@ -292,6 +469,7 @@ ALL_EXTRACTORS = [
     CertificateExtractor(),
     UrlGeoExtractor(),
     UrlLexicalExtractor(),
+    BrandSimilarityExtractor(),
     WhoisExtractor(),
     GoogleIndexExtractor(),
     OpenPageRankExtractor(),
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from web2vec.config import config
+from web2vec.utils import create_directories
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenderedPage:
+    html: str
+    network_request_urls: List[str] = field(default_factory=list)
+
+
+class RenderCache:
+    """Persistent on-disk cache of Selenium rendered pages."""
+
+    def __init__(self, directory: Optional[str] = None, ttl: Optional[int] = None):
+        """
+        :param directory: Directory for cache entries, defaults to
+            ``config.render_cache_path``.
+        :param ttl: Entry lifetime in seconds, defaults to
+            ``config.render_cache_ttl``. ``None`` or ``0`` disables expiry.
+        """
+        self.directory = directory or config.render_cache_path
+        self.ttl = config.render_cache_ttl if ttl is None else ttl
+
+    @staticmethod
+    def cache_key(url: str, render_wait_seconds: float, browser_version: str) -> str:
+        """Return the cache key for the given URL and render settings."""
+        raw_key = json.dumps([url, float(render_wait_seconds), browser_version])
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(
+        self, url: str, render_wait_seconds: float, browser_version: str
+    ) -> Optional[RenderedPage]:
+        """Return the cached page or None when missing or expired."""
+        path = self._entry_path(
+            self.cache_key(url, render_wait_seconds, browser_version)
+        )
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as handle:
+                return RenderedPage(**json.load(handle))
+        except FileNotFoundError:
+            return None
+        except Exception as exc:  # noqa
+            logger.warning(f"Could not read render cache entry for {url}: {exc}")
+            return None
+
+    def set(
+        self,
+        url: str,
+        render_wait_seconds: float,
+        browser_version: str,
+        page: RenderedPage,
+    ) -> None:
+        """Store the rendered page, replacing any previous entry atomically."""
+        path = self._entry_path(
+            self.cache_key(url, render_wait_seconds, browser_version)
+        )
+        try:
+            create_directories(os.path.dirname(path))
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(asdict(page), handle)
+            os.replace(tmp_path, path)
+        except Exception as exc:  # noqa
+            logger.warning(f"Could not write render cache entry for {url}: {exc}")
@@ -0,0 +1,217 @@
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+
+from web2vec.config import config
+from web2vec.utils import create_directories
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_REFERENCE_PREFIX = "sha256:"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+
+def _zstd_module():
+    try:
+        from compression import zstd
+    except ImportError:
+        from backports import zstd
+    return zstd
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    """Compress data with the given algorithm."""
+    if compression == COMPRESSION_GZIP:
+        return gzip.compress(data, mtime=0)
+    if compression == COMPRESSION_ZSTD:
+        return _zstd_module().compress(data)
+    raise ValueError(f"Unsupported compression {compression!r}")
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    """Decompress data with the given algorithm."""
+    if compression == COMPRESSION_GZIP:
+        return gzip.decompress(data)
+    if compression == COMPRESSION_ZSTD:
+        return _zstd_module().decompress(data)
+    raise ValueError(f"Unsupported compression {compression!r}")
+
+
+class SnapshotStore:
+    """
+    Content-addressed store of HTML snapshots.
+
+    Each unique body is stored once, compressed, in append-only segment files.
+    ``index.jsonl`` maps the SHA-256 of the body to its segment, offset and
+    length. ``put`` returns a stable ``sha256:<digest>`` reference and, by
+    default, hands the write over to a background writer thread.
+    """
+
+    INDEX_FILE = "index.jsonl"
+    SEGMENT_TEMPLATE = "segment-{:05d}.pack"
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        compression: str = COMPRESSION_GZIP,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        background: bool = True,
+    ):
+        if compression not in (COMPRESSION_GZIP, COMPRESSION_ZSTD):
+            raise ValueError(f"Unsupported compression {compression!r}")
+        if compression == COMPRESSION_ZSTD:
+            # Fail here, a background write would only log the ImportError
+            _zstd_module()
+        # Kept apart from the per-URL .html snapshots in html_snapshots
+        self.directory = directory or os.path.join(
+            config.crawler_output_path, "html_snapshots", "store"
+        )
+        self.compression = compression
+        self.segment_max_bytes = segment_max_bytes
+        self.background = background
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._index: Dict[str, Tuple[str, int, int, str]] = {}
+        self._pending: Dict[str, str] = {}
+        self._segment_number = 0
+        create_directories(self.directory)
+        self._load_index()
+
+        self._queue: Optional[queue.Queue] = None
+        self._writer: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="web2vec-snapshot-writer", daemon=True
+            )
+            self._writer.start()
+            atexit.register(self.close)
+
+    @staticmethod
+    def digest(html: str) -> str:
+        """Return the content digest used to address the given body."""
+        return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def reference(digest: str) -> str:
+        """Return the snapshot reference for the given digest."""
+        return f"{SNAPSHOT_REFERENCE_PREFIX}{digest}"
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, self.INDEX_FILE)
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.directory, segment)
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self._index_path()):
+            return
+        with open(self._index_path(), "r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    digest, segment, offset, length, compression = json.loads(line)
+                except ValueError:
+                    # Ignore a torn last line left by an interrupted write
+                    continue
+                self._index[digest] = (segment, offset, length, compression)
+        segments = [entry[0] for entry in self._index.values()]
+        if segments:
+            self._segment_number = int(max(segments).split("-")[1].split(".")[0])
+
+    def _current_segment(self, incoming_size: int) -> str:
+        segment = self.SEGMENT_TEMPLATE.format(self._segment_number)
+        path = self._segment_path(segment)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size and size + incoming_size > self.segment_max_bytes:
+            self._segment_number += 1
+            segment = self.SEGMENT_TEMPLATE.format(self._segment_number)
+        return segment
+
+    def _write(self, digest: str, html: str) -> None:
+        data = _compress(html.encode("utf-8"), self.compression)
+        with self._write_lock:
+            segment = self._current_segment(len(data))
+            with open(self._segment_path(segment), "ab") as handle:
+                offset = handle.seek(0, os.SEEK_END)
+                handle.write(data)
+            entry = (segment, offset, len(data), self.compression)
+            with open(self._index_path(), "a", encoding="utf-8") as handle:
+                handle.write(json.dumps([digest, *entry]) + "\n")
+        with self._lock:
+            self._index[digest] = entry
+            self._pending.pop(digest, None)
+
+    def _writer_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as exc:  # noqa
+                logger.warning(f"Could not write HTML snapshot {item[0]}: {exc}")
+                with self._lock:
+                    self._pending.pop(item[0], None)
+            finally:
+                self._queue.task_done()
+
+    def put(self, html: str) -> str:
+        """Store the body once and return its stable reference."""
+        digest = self.digest(html)
+        with self._lock:
+            if digest in self._index or digest in self._pending:
+                return self.reference(digest)
+            self._pending[digest] = html
+        if self._queue is not None and self._writer.is_alive():
+            self._queue.put((digest, html))
+        else:
+            try:
+                self._write(digest, html)
+            except Exception:
+                with self._lock:
+                    self._pending.pop(digest, None)
+                raise
+        return self.reference(digest)
+
+    def get(self, reference: str) -> Optional[str]:
+        """Return the stored body for the given reference or digest."""
+        digest = reference
+        if digest.startswith(SNAPSHOT_REFERENCE_PREFIX):
+            digest = digest[len(SNAPSHOT_REFERENCE_PREFIX) :]
+        with self._lock:
+            if digest in self._pending:
+                return self._pending[digest]
+            entry = self._index.get(digest)
+        if entry is None:
+            return None
+        segment, offset, length, compression = entry
+        with open(self._segment_path(segment), "rb") as handle:
+            handle.seek(offset)
+            data = handle.read(length)
+        return _decompress(data, compression).decode("utf-8")
+
+    def __contains__(self, reference: str) -> bool:
+        digest = reference
+        if digest.startswith(SNAPSHOT_REFERENCE_PREFIX):
+            digest = digest[len(SNAPSHOT_REFERENCE_PREFIX) :]
+        with self._lock:
+            return digest in self._index or digest in self._pending
+
+    def flush(self) -> None:
+        """Block until every queued snapshot has been written."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending writes and stop the background writer."""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import dns.exception
+import dns.rdatatype
+import dns.resolver
+
+from web2vec.config import config
+
+logger = logging.getLogger(__name__)
+
+# Record type of the rows marking a name that does not exist
+NXDOMAIN = "NXDOMAIN"
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    name: str
+    record_type: str
+    ttl: int
+    values: List[str] = field(default_factory=list)
+    expires_at: float = 0.0
+
+    @property
+    def nxdomain(self) -> bool:
+        """Return True when the answer says the name does not exist."""
+        return self.record_type == NXDOMAIN
+
+
+def _normalize(name: str) -> str:
+    return name.lower().rstrip(".")
+
+
+def _answer(name: str, record_type: str, ttl: int, values: List[str]) -> CachedAnswer:
+    return CachedAnswer(
+        _normalize(name), record_type, ttl, list(values), time.time() + ttl
+    )
+
+
+class DNSCache:
+    """
+    Persistent SQLite cache of DNS answers, shared by processes and runs.
+
+    Every rrset is stored with the TTL it was answered with and served
+    until that TTL has passed. Empty answers and non-existent names are
+    stored for their negative caching TTL. Each thread uses its own
+    connection, the database runs in WAL mode so readers never block.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: Database file, defaults to ``config.dns_cache_path``.
+        """
+        self.path = path or config.dns_cache_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # A lost answer is only queried again, skip the fsync per commit
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "name TEXT NOT NULL, record_type TEXT NOT NULL, ttl INTEGER NOT NULL,"
+                " record_values TEXT NOT NULL, expires_at REAL NOT NULL,"
+                " PRIMARY KEY (name, record_type))"
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def get(self, name: str, record_type: str) -> Optional[CachedAnswer]:
+        """Return the live answer of the name and record type, None on a miss."""
+        name = _normalize(name)
+        row = (
+            self._connection()
+            .execute(
+                "SELECT ttl, record_values, expires_at FROM answers"
+                " WHERE name = ? AND record_type = ? AND expires_at > ?",
+                (name, record_type, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        ttl, values, expires_at = row
+        return CachedAnswer(name, record_type, ttl, json.loads(values), expires_at)
+
+    def set(
+        self, name: str, record_type: str, ttl: int, values: List[str]
+    ) -> CachedAnswer:
+        """Store the answer until its TTL has passed and return it."""
+        answer = _answer(name, record_type, ttl, values)
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?)",
+                (
+                    answer.name,
+                    answer.record_type,
+                    answer.ttl,
+                    json.dumps(answer.values),
+                    answer.expires_at,
+                ),
+            )
+        return answer
+
+    def purge_expired(self) -> int:
+        """Delete the expired answers and return how many were removed."""
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM answers WHERE expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """Delete every stored answer."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM answers")
+
+
+_dns_caches: Dict[str, DNSCache] = {}
+_dns_caches_lock = threading.Lock()
+
+
+def get_dns_cache(path: Optional[str] = None) -> DNSCache:
+    """
+    Return the shared DNS cache of the database file.
+
+    :param path: Database file, defaults to ``config.dns_cache_path``.
+    """
+    path = path or config.dns_cache_path
+    with _dns_caches_lock:
+        if path not in _dns_caches:
+            _dns_caches[path] = DNSCache(path)
+        return _dns_caches[path]
+
+
+def negative_ttl(error: dns.exception.DNSException) -> Optional[int]:
+    """Return the negative caching TTL of an NXDOMAIN or NoAnswer, see RFC 2308."""
+    try:
+        if isinstance(error, dns.resolver.NXDOMAIN):
+            responses = list(error.responses().values())
+        else:
+            responses = [error.kwargs["response"]]
+    except Exception:  # noqa
+        return None
+    ttls = [
+        min(rrset.ttl, rrset[0].minimum)
+        for response in responses
+        for rrset in response.authority
+        if rrset.rdtype == dns.rdatatype.SOA
+    ]
+    # A zero TTL would mean no expiry to the caches
+    return max(min(ttls), 1) if ttls else None
+
+
+def lookup(name: str, record_type: str) -> Optional[CachedAnswer]:
+    """
+    Return the cached answer of the name and record type, None on a miss.
+
+    A cached NXDOMAIN of the name answers every record type.
+    """
+    if not config.dns_cache_enabled:
+        return None
+    cache = get_dns_cache()
+    try:
+        return cache.get(name, NXDOMAIN) or cache.get(name, record_type)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Could not read the DNS cache {cache.path}: {e}")
+        return None
+
+
+def store(
+    name: str,
+    record_type: str,
+    answers: Optional[dns.resolver.Answer] = None,
+    error: Optional[dns.exception.DNSException] = None,
+) -> CachedAnswer:
+    """
+    Cache the answers of a query, or its NXDOMAIN or NoAnswer error.
+
+    Errors are kept for their negative TTL, or for
+    ``config.cache_ttls["dns_negative"]`` without an SOA record.
+    """
+    if error is None:
+        ttl = answers.rrset.ttl
+        values = [rdata.to_text() for rdata in answers]
+    else:
+        if isinstance(error, dns.resolver.NXDOMAIN):
+            record_type = NXDOMAIN
+        ttl = negative_ttl(error) or config.cache_ttls.get(
+            "dns_negative", config.cache_default_ttl
+        )
+        values = []
+    if config.dns_cache_enabled:
+        cache = get_dns_cache()
+        try:
+            return cache.set(name, record_type, ttl, values)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not store the DNS answer for {name}: {e}")
+    return _answer(name, record_type, ttl, values)
+
+
+def resolve(
+    name: str, record_type: str, resolve_function: Optional[Callable] = None
+) -> CachedAnswer:
+    """
+    Resolve the record type of the name through the shared DNS cache.
+
+    Cached answers are returned without a query while their TTL lasts. An
+    empty answer has no values, a non-existent name gives an answer with
+    ``nxdomain`` set, both are cached for their negative TTL. Other errors,
+    such as timeouts, are raised and not cached.
+
+    :param name: Name to resolve.
+    :param record_type: Record type to query, e.g. ``A``.
+    :param resolve_function: Function called as ``(name, record_type)``,
+        defaults to ``dns.resolver.resolve``.
+    """
+    answer = lookup(name, record_type)
+    if answer is not None:
+        return answer
+    resolve_function = resolve_function or dns.resolver.resolve
+    try:
+        answers = resolve_function(name, record_type)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as error:
+        return store(name, record_type, error=error)
+    return store(name, record_type, answers)
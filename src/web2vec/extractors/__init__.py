@@ -1,5 +1,6 @@
 # flake8: noqa
 
+from web2vec.extractors.brand_similarity_features import *
 from web2vec.extractors.dns_features import *
 from web2vec.extractors.external_api import *
 from web2vec.extractors.html_body_features import *
@@ -7,5 +8,7 @@ from web2vec.extractors.http_response_features import *
 from web2vec.extractors.network_features import *
 from web2vec.extractors.ssl_certification_features import *
 from web2vec.extractors.url_geo_features import *
+from web2vec.extractors.url_lexical_batch import *
 from web2vec.extractors.url_lexical_features import *
+from web2vec.extractors.url_ngram_features import *
 from web2vec.extractors.whois_features import *
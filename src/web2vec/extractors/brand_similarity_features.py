@@ -0,0 +1,405 @@
+import logging
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from web2vec import public_suffix
+from web2vec.caching import cached
+from web2vec.config import config
+from web2vec.utils import parse_url
+
+logger = logging.getLogger(__name__)
+
+# Frequently impersonated brands, used when no reference list is configured
+BUNDLED_BRAND_DOMAINS = (
+    "google.com",
+    "youtube.com",
+    "facebook.com",
+    "instagram.com",
+    "whatsapp.com",
+    "microsoft.com",
+    "office.com",
+    "outlook.com",
+    "live.com",
+    "apple.com",
+    "icloud.com",
+    "amazon.com",
+    "paypal.com",
+    "netflix.com",
+    "linkedin.com",
+    "twitter.com",
+    "x.com",
+    "yahoo.com",
+    "ebay.com",
+    "dropbox.com",
+    "adobe.com",
+    "docusign.com",
+    "wellsfargo.com",
+    "chase.com",
+    "bankofamerica.com",
+    "citibank.com",
+    "hsbc.com",
+    "santander.com",
+    "barclays.co.uk",
+    "americanexpress.com",
+    "mastercard.com",
+    "visa.com",
+    "coinbase.com",
+    "binance.com",
+    "blockchain.com",
+    "metamask.io",
+    "steamcommunity.com",
+    "roblox.com",
+    "spotify.com",
+    "dhl.com",
+    "fedex.com",
+    "ups.com",
+    "usps.com",
+    "allegro.pl",
+    "olx.pl",
+    "mbank.pl",
+    "pkobp.pl",
+    "ing.pl",
+    "inpost.pl",
+    "github.com",
+    "gitlab.com",
+    "telegram.org",
+    "discord.com",
+    "booking.com",
+    "airbnb.com",
+    "alibaba.com",
+    "aliexpress.com",
+    "walmart.com",
+    "irs.gov",
+)
+
+# Visually confusable characters mapped to the ASCII letter they imitate
+HOMOGLYPHS = {
+    "0": "o",
+    "1": "l",
+    "i": "l",
+    "|": "l",
+    "!": "l",
+    "3": "e",
+    "4": "a",
+    "@": "a",
+    "5": "s",
+    "$": "s",
+    "7": "t",
+    "8": "b",
+    "9": "g",
+    "а": "a",
+    "е": "e",
+    "о": "o",
+    "р": "p",
+    "с": "c",
+    "у": "y",
+    "х": "x",
+    "і": "l",
+    "ӏ": "l",
+    "ј": "j",
+    "ԁ": "d",
+    "ѕ": "s",
+    "ɡ": "g",
+    "α": "a",
+    "ο": "o",
+    "ν": "v",
+    "τ": "t",
+    "κ": "k",
+    "ι": "l",
+    "ρ": "p",
+}
+HOMOGLYPH_SEQUENCES = (("rn", "m"), ("vv", "w"), ("cl", "d"))
+_HOMOGLYPH_TABLE = str.maketrans(HOMOGLYPHS)
+
+
+def normalize_homoglyphs(label: str) -> str:
+    """Map a domain label to the ASCII skeleton it visually resembles."""
+    if label.startswith("xn--"):
+        try:
+            label = label.encode("ascii").decode("idna")
+        except UnicodeError:
+            pass
+    label = unicodedata.normalize("NFKD", label.lower())
+    label = "".join(char for char in label if not unicodedata.combining(char))
+    label = label.translate(_HOMOGLYPH_TABLE)
+    for sequence, replacement in HOMOGLYPH_SEQUENCES:
+        label = label.replace(sequence, replacement)
+    return label
+
+
+def levenshtein_distance(first: str, second: str, max_distance: int = -1) -> int:
+    """
+    Return the edit distance of two strings.
+
+    With ``max_distance >= 0`` only the diagonal band of that width is
+    computed and ``max_distance + 1`` is returned as soon as the distance is
+    known to exceed it.
+    """
+    if first == second:
+        return 0
+    if len(first) < len(second):
+        first, second = second, first
+    length = len(second)
+    if max_distance < 0:
+        max_distance = len(first)
+    elif len(first) - length > max_distance:
+        return max_distance + 1
+    limit = max_distance + 1
+    previous = [
+        column if column <= max_distance else limit for column in range(length + 1)
+    ]
+    for row, first_char in enumerate(first, 1):
+        low = max(1, row - max_distance)
+        high = min(length, row + max_distance)
+        current = [limit] * (length + 1)
+        current[0] = row if row <= max_distance else limit
+        best = current[0]
+        for column in range(low, high + 1):
+            value = previous[column - 1] + (first_char != second[column - 1])
+            if previous[column] + 1 < value:
+                value = previous[column] + 1
+            if current[column - 1] + 1 < value:
+                value = current[column - 1] + 1
+            if value > limit:
+                value = limit
+            current[column] = value
+            if value < best:
+                best = value
+        if best > max_distance:
+            return limit
+        previous = current
+    return min(previous[length], limit)
+
+
+def _bigrams(label: str) -> set:
+    padded = f"^{label}$"
+    return {padded[index : index + 2] for index in range(len(padded) - 1)}
+
+
+def _brand_label(domain: str) -> str:
+    return public_suffix.extract(domain).domain.lower()
+
+
+class BrandIndex:
+    """
+    Bigram inverted index of brand domain labels for edit-distance search.
+
+    Labels are indexed in their homoglyph-normalized form. A query only
+    verifies brands that pass the length filter and share enough bigrams
+    to be within ``max_distance`` edits, each edit changes at most two
+    bigrams, instead of comparing against the whole list. Brands sharing no
+    bigram with the query are never reported, which only affects labels of
+    a few characters.
+
+    Every distinct label is indexed once, under the first domain carrying
+    it, while every input domain counts as a brand domain. Distinct labels
+    with the same normalized form, such as ``mail`` and ``mall``, are all
+    kept.
+    """
+
+    def __init__(self, domains: Iterable[str]):
+        self.domains: List[str] = []
+        self.labels: List[str] = []
+        self.normalized: List[str] = []
+        brand_domains = set()
+        exact: Dict[str, List[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        indexed_labels = set()
+        for domain in domains:
+            domain = domain.strip().lower().rstrip(".")
+            label = _brand_label(domain) if domain else ""
+            if not label:
+                continue
+            brand_domains.add(domain)
+            if label in indexed_labels:
+                continue
+            indexed_labels.add(label)
+            normalized = normalize_homoglyphs(label)
+            brand_id = len(self.domains)
+            exact.setdefault(normalized, []).append(brand_id)
+            self.domains.append(domain)
+            self.labels.append(label)
+            self.normalized.append(normalized)
+            for gram in _bigrams(normalized):
+                postings.setdefault(gram, []).append(brand_id)
+        self._exact = exact
+        self._postings = {
+            gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()
+        }
+        self._lengths = np.array([len(label) for label in self.normalized])
+        self._gram_counts = np.array(
+            [len(_bigrams(label)) for label in self.normalized]
+        )
+        self._brand_domains = frozenset(brand_domains)
+
+    def __len__(self) -> int:
+        return len(self.domains)
+
+    def is_brand_domain(self, domain: str) -> bool:
+        """Return True when the domain is itself one of the brand domains."""
+        return domain.lower() in self._brand_domains
+
+    def nearest(
+        self, label: str, max_distance: int = 2
+    ) -> Optional[Tuple[str, int, int]]:
+        """
+        Return the nearest brand domain, raw and homoglyph-normalized distance.
+
+        Brands are ranked by the normalized distance, then the raw distance,
+        then their position in the reference list. None when no brand is
+        within ``max_distance`` normalized edits.
+        """
+        label = label.lower()
+        normalized = normalize_homoglyphs(label)
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            raw_distance, brand_id = min(
+                (levenshtein_distance(label, self.labels[brand_id]), brand_id)
+                for brand_id in exact
+            )
+            return self.domains[brand_id], raw_distance, 0
+
+        grams = _bigrams(normalized)
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not postings:
+            return None
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.domains))
+        # Cheap bound on the full list first, exact filters on the survivors
+        candidates = np.flatnonzero(shared >= max(len(grams) - 2 * max_distance, 1))
+        counts = shared[candidates]
+        required = np.maximum(self._gram_counts[candidates], len(grams))
+        keep = (counts >= required - 2 * max_distance) & (
+            np.abs(self._lengths[candidates] - len(normalized)) <= max_distance
+        )
+        candidates, counts = candidates[keep], counts[keep]
+        # Most shared bigrams first, the best match tightens the cutoff early
+        order = np.argsort(-counts, kind="stable")
+
+        best: Optional[Tuple[int, int, int]] = None
+        for brand_id, count in zip(candidates[order].tolist(), counts[order].tolist()):
+            limit = max_distance if best is None else best[0]
+            if count < len(grams) - 2 * limit:
+                # Sorted by shared bigrams, no later brand can be closer
+                break
+            distance = levenshtein_distance(
+                normalized, self.normalized[brand_id], limit
+            )
+            if distance > limit:
+                continue
+            if best is not None and distance > best[0]:
+                continue
+            raw_distance = levenshtein_distance(label, self.labels[brand_id])
+            key = (distance, raw_distance, brand_id)
+            if best is None or key < best:
+                best = key
+        if best is None:
+            return None
+        distance, raw_distance, brand_id = best
+        return self.domains[brand_id], raw_distance, distance
+
+
+def _read_domains(path: str) -> List[str]:
+    """Read domains from a text file, one per line or ``rank,domain`` rows."""
+    domains = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                domains.append(line.split(",")[-1])
+    return domains
+
+
+_brand_indexes: Dict[str, BrandIndex] = {}
+_brand_indexes_lock = threading.Lock()
+
+
+def get_brand_index(path: Optional[str] = None) -> BrandIndex:
+    """
+    Return the shared brand index, built once per reference list.
+
+    :param path: Reference domain list, defaults to ``config.brand_domains_path``
+        and to the bundled brand list when that is empty.
+    """
+    path = path if path is not None else config.brand_domains_path
+    with _brand_indexes_lock:
+        if path not in _brand_indexes:
+            if path:
+                domains = _read_domains(path)
+                logger.info(f"Indexed {len(domains)} brand domains from {path}")
+            else:
+                domains = list(BUNDLED_BRAND_DOMAINS)
+            _brand_indexes[path] = BrandIndex(domains)
+        return _brand_indexes[path]
+
+
+@dataclass(slots=True)
+class BrandSimilarityFeatures:
+    domain: str
+    nearest_brand: Optional[str] = None
+    distance: Optional[int] = None
+    homoglyph_distance: Optional[int] = None
+    is_brand_domain: bool = False
+    is_typosquat: bool = False
+
+
+def get_brand_similarity_features(
+    domain: str, max_distance: int = 2, index: Optional[BrandIndex] = None
+) -> BrandSimilarityFeatures:
+    """
+    Get the nearest brand domain of the given domain or URL.
+
+    :param domain: Domain or URL to check.
+    :param max_distance: Largest homoglyph-normalized edit distance reported.
+    :param index: Brand index, defaults to the shared ``get_brand_index()``.
+    """
+    if index is None:
+        index = get_brand_index()
+    parsed = parse_url(domain)
+    features = BrandSimilarityFeatures(domain=domain)
+    if not parsed.registrable_domain:
+        return features
+    label = parsed.registrable_domain[: -len(parsed.suffix) - 1]
+    features.is_brand_domain = index.is_brand_domain(parsed.registrable_domain)
+    match = index.nearest(label, max_distance)
+    if match is None:
+        return features
+    features.nearest_brand, features.distance, features.homoglyph_distance = match
+    features.is_typosquat = not features.is_brand_domain and features.distance > 0
+    return features
+
+
+@cached("brand_similarity")
+def get_brand_similarity_features_cached(domain: str) -> BrandSimilarityFeatures:
+    """Get the brand similarity features for the given domain."""
+    return get_brand_similarity_features(domain)
+
+
+if __name__ == "__main__":
+    import random
+    import string
+    import time
+
+    for candidate in ("paypa1.com", "rnicrosoft.com", "g00gle.co.uk", "example.org"):
+        print(get_brand_similarity_features(candidate))
+
+    random.seed(3)
+    synthetic = [
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 14)))
+        + ".com"
+        for _ in range(100000)
+    ]
+    started = time.perf_counter()
+    large_index = BrandIndex(synthetic)
+    print(f"indexed {len(large_index)} domains in {time.perf_counter() - started:.2f}s")
+
+    queries = [_brand_label(domain) for domain in random.sample(synthetic, 1000)]
+    queries = [query[:-1] + "x" for query in queries]
+    started = time.perf_counter()
+    for query in queries:
+        large_index.nearest(query)
+    per_query = (time.perf_counter() - started) / len(queries) * 1000
+    print(f"{per_query:.3f} ms per query")
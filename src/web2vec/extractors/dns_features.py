@@ -1,26 +1,47 @@
+import asyncio
 import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from functools import cache
-from typing import List, Optional
+from itertools import islice
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 
+import dns.asyncresolver
+import dns.exception
+import dns.nameserver
 import dns.resolver
 
-from web2vec.utils import get_domain_from_url
+from web2vec import dns_cache
+from web2vec.caching import cached
+from web2vec.config import config
+from web2vec.dns_cache import CachedAnswer
+from web2vec.utils import get_domain_from_url, valid_ip
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class DNSRecordFeatures:
     record_type: str
     ttl: int
     values: List[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class DNSFeatures:
     domain: str
     records: List[DNSRecordFeatures] = field(default_factory=list)
+    exists: bool = True
+    negative_ttl: Optional[int] = None
     min_ttl: Optional[int] = field(init=False, default=None)
     ttl_expires_within_hour: Optional[bool] = field(init=False, default=None)
     ttl_expires_within_day: Optional[bool] = field(init=False, default=None)
@@ -93,33 +114,242 @@ class DNSFeatures:
         return ttl_records[0] if ttl_records else None
 
 
-def get_dns_features(domain: str) -> DNSFeatures:
-    """Get DNS features for the given domain."""
-    dns_result = DNSFeatures(domain=domain)
+DNS_RECORD_TYPES = ("A", "AAAA", "MX", "TXT", "NS", "CNAME")
+# Shared by all lookups, threads are only started on the first query
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="web2vec-dns")
+
+
+def _resolve_record(
+    resolve: Optional[Callable], domain: str, record_type: str
+) -> Optional[CachedAnswer]:
     try:
-        for record_type in ["A", "AAAA", "MX", "TXT", "NS", "CNAME"]:
-            try:
-                answers = dns.resolver.resolve(domain, record_type)
-                record_values = [rdata.to_text() for rdata in answers]
-                ttl = answers.rrset.ttl
-                dns_result.records.append(
-                    DNSRecordFeatures(record_type, ttl, record_values)
-                )
-            except dns.resolver.NoAnswer:
-                logger.debug(f"No {record_type} record found for {domain}")
-            except dns.resolver.NXDOMAIN:
-                logger.warning(f"{domain} does not exist")
-            except Exception as e:  # noqa
-                logger.warning(
-                    f"Error fetching {record_type} records for {domain}: {e}", e
-                )
+        answer = dns_cache.resolve(domain, record_type, resolve)
+        if not answer.values and not answer.nxdomain:
+            logger.debug(f"No {record_type} record found for {domain}")
+        return answer
     except Exception as e:  # noqa
-        logger.warning(f"General error fetching DNS records for {domain}: {e}", e)
+        logger.warning(f"Error fetching {record_type} records for {domain}: {e}")
+    return None
+
+
+def get_host_addresses(host: str) -> List[str]:
+    """
+    Return the IPv4 and then IPv6 addresses of the host.
+
+    The A and AAAA answers come from the persistent DNS cache, which
+    ``get_dns_features`` fills for the same domain, on a miss both are
+    queried concurrently. Names without records, such as hosts file
+    entries, fall back to the system resolver.
+    """
+    if valid_ip(host):
+        return [host]
+    futures = [
+        _executor.submit(_resolve_record, None, host, record_type)
+        for record_type in ("A", "AAAA")
+    ]
+    answers = [future.result() for future in futures]
+    addresses = [
+        value for answer in answers if answer is not None for value in answer.values
+    ]
+    if addresses or not host:
+        return addresses
+    if any(answer is not None and answer.nxdomain for answer in answers):
+        return []
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except OSError as e:
+        logger.debug(f"Error resolving {host}: {e}")
+        return []
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+def _features_from_answers(
+    domain: str, answers: Dict[int, Optional[CachedAnswer]]
+) -> DNSFeatures:
+    """Assemble DNSFeatures from the answers by record type position."""
+    dns_result = DNSFeatures(domain=domain)
+    nxdomain = next(
+        (answer for answer in answers.values() if answer and answer.nxdomain), None
+    )
+    if nxdomain is not None:
+        logger.warning(f"{domain} does not exist")
+        dns_result.exists = False
+        dns_result.negative_ttl = nxdomain.ttl
+    else:
+        dns_result.records = [
+            DNSRecordFeatures(answer.record_type, answer.ttl, answer.values)
+            for _, answer in sorted(answers.items())
+            if answer is not None and answer.values
+        ]
     dns_result.compute_derived_features()
     return dns_result
 
 
-@cache
+def get_dns_features(
+    domain: str, resolver: Optional[dns.resolver.Resolver] = None
+) -> DNSFeatures:
+    """
+    Get DNS features for the given domain.
+
+    Answers come from the persistent DNS cache while their TTL lasts, see
+    ``web2vec.dns_cache``. The A record is queried first, an NXDOMAIN answer
+    ends the lookup there with ``exists`` set to False and the cache keeps
+    it for the SOA minimum TTL, so later lookups of the domain make no
+    queries. The remaining record types are then queried concurrently, so a
+    lookup of an existing domain takes about two round-trips. Each query ends
+    when answered or when the resolver lifetime runs out, failed queries are
+    left out of the records.
+
+    :param domain: Domain to resolve.
+    :param resolver: Resolver to query, defaults to the shared default resolver.
+    """
+    resolve = resolver.resolve if resolver is not None else None
+    answers: Dict[int, Optional[CachedAnswer]] = {}
+    try:
+        # Threads cannot stop a query already sent, so the other types are
+        # only asked once the domain is known to exist.
+        first, *rest = DNS_RECORD_TYPES
+        answers[0] = _resolve_record(resolve, domain, first)
+        if answers[0] is None or not answers[0].nxdomain:
+            futures = {
+                _executor.submit(_resolve_record, resolve, domain, record_type): index
+                for index, record_type in enumerate(rest, start=1)
+            }
+            for future, index in futures.items():
+                answers[index] = future.result()
+    except Exception as e:  # noqa
+        logger.warning(f"General error fetching DNS records for {domain}: {e}")
+    return _features_from_answers(domain, answers)
+
+
+async def _resolve_record_async(
+    resolver: dns.asyncresolver.Resolver,
+    queries: asyncio.Semaphore,
+    domain: str,
+    record_type: str,
+    retries: int,
+) -> Optional[CachedAnswer]:
+    # SQLite reads and commits may wait on locks, keep them off the event loop
+    answer = await asyncio.to_thread(dns_cache.lookup, domain, record_type)
+    if answer is not None:
+        return answer
+    for attempt in range(retries + 1):
+        try:
+            async with queries:
+                answers = await resolver.resolve(domain, record_type)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as error:
+            return await asyncio.to_thread(
+                dns_cache.store, domain, record_type, error=error
+            )
+        except (dns.exception.Timeout, dns.resolver.NoNameservers) as e:
+            if attempt == retries:
+                logger.warning(
+                    f"Error fetching {record_type} records for {domain}: {e}"
+                )
+        except Exception as e:  # noqa
+            logger.warning(f"Error fetching {record_type} records for {domain}: {e}")
+            return None
+        else:
+            return await asyncio.to_thread(
+                dns_cache.store, domain, record_type, answers
+            )
+    return None
+
+
+async def _get_dns_features_async(
+    resolver: dns.asyncresolver.Resolver,
+    queries: asyncio.Semaphore,
+    domain: str,
+    retries: int,
+) -> DNSFeatures:
+    tasks = {
+        asyncio.ensure_future(
+            _resolve_record_async(resolver, queries, domain, record_type, retries)
+        ): index
+        for index, record_type in enumerate(DNS_RECORD_TYPES)
+    }
+    answers: Dict[int, Optional[CachedAnswer]] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                answers[tasks[task]] = task.result()
+            if any(answer and answer.nxdomain for answer in answers.values()):
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+    return _features_from_answers(domain, answers)
+
+
+async def get_dns_features_bulk(
+    domains: Iterable[str],
+    concurrency: int = 1000,
+    nameservers: Optional[Sequence[Union[str, dns.nameserver.Nameserver]]] = None,
+    timeout: float = 5.0,
+    retries: int = 2,
+) -> AsyncIterator[DNSFeatures]:
+    """
+    Resolve many domains concurrently and yield DNSFeatures as they finish.
+
+    Domains are read lazily and at most ``concurrency`` queries are in
+    flight at once, results arrive in completion order. Answers go through
+    the persistent DNS cache like in ``get_dns_features``.
+
+    :param domains: Iterable of domains, may be a generator.
+    :param concurrency: Largest number of queries in flight.
+    :param nameservers: Resolver addresses or ``dns.nameserver.Nameserver``
+        objects, defaults to the system resolvers.
+    :param timeout: Seconds a single query may take, including the attempts
+        made on other nameservers.
+    :param retries: Times a query is repeated after a timeout or when no
+        nameserver answered.
+    """
+    resolver = dns.asyncresolver.Resolver(configure=nameservers is None)
+    if nameservers is not None:
+        resolver.nameservers = list(nameservers)
+    resolver.timeout = timeout
+    resolver.lifetime = timeout
+    queries = asyncio.Semaphore(concurrency)
+
+    iterator = iter(domains)
+    pending = set()
+    try:
+        while True:
+            for domain in islice(iterator, max(concurrency - len(pending), 0)):
+                pending.add(
+                    asyncio.ensure_future(
+                        _get_dns_features_async(resolver, queries, domain, retries)
+                    )
+                )
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _cache_ttl(features: DNSFeatures) -> Optional[int]:
+    if not features.exists:
+        return features.negative_ttl
+    ttls = [record.ttl for record in features.records if record.ttl is not None]
+    if not ttls:
+        return None
+    # Record TTLs bound the entry, a zero TTL would mean no expiry to the cache
+    ttl = max(min(ttls), 1)
+    limit = config.cache_ttls.get("dns", config.cache_default_ttl)
+    return min(ttl, limit) if limit else ttl
+
+
+@cached("dns", ttl_for=_cache_ttl)
 def get_dns_features_cached(domain: str) -> DNSFeatures:
     """Get DNS features for the given domain."""
     return get_dns_features(domain)
@@ -130,3 +360,9 @@ if __name__ == "__main__":
     domain = get_domain_from_url(url)
     result = get_dns_features(domain)
     print(result)
+
+    async def _print_bulk():
+        async for features in get_dns_features_bulk(["example.com", "example.org"]):
+            print(features)
+
+    asyncio.run(_print_bulk())
@@ -1,16 +1,16 @@
 import logging
 from dataclasses import dataclass
-from functools import cache
 from typing import Optional
 
 import requests
 
+from web2vec.caching import cached
 from web2vec.config import config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class GoogleIndexFeatures:
     """Dataclass for Google index features."""
 
@@ -60,7 +60,7 @@ def get_google_index_features(url: str) -> GoogleIndexFeatures:
         )
 
 
-@cache
+@cached("google_index")
 def get_google_index_features_cached(url: str) -> GoogleIndexFeatures:
     """Get the Brave index features for the given URL."""
     return get_google_index_features(url)
@@ -1,16 +1,16 @@
 import logging
 from dataclasses import dataclass
-from functools import cache
 from typing import Optional
 
 import requests
 
+from web2vec.caching import cached
 from web2vec.config import config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenPageRankFeatures:
     """Dataclass for Open PageRank features."""
 
@@ -57,7 +57,7 @@ def get_open_page_rank_features(domain: str) -> Optional[OpenPageRankFeatures]:
     return opr_api.get_open_page_rank_features(domain)
 
 
-@cache
+@cached("open_page_rank")
 def get_open_page_rank_features_cached(domain: str) -> Optional[OpenPageRankFeatures]:
     """Get Open PageRank features for the given domain (cached)."""
     return get_open_page_rank_features(domain)
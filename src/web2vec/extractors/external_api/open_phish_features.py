@@ -1,15 +1,15 @@
 import logging
 from dataclasses import dataclass
-from functools import cache
 
 import requests
 
+from web2vec.caching import cached
 from web2vec.utils import fetch_file_from_url_and_read
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenPhishFeatures:
     """Dataclass for OpenPhish features."""
 
@@ -33,7 +33,7 @@ def get_open_phish_features(url: str) -> OpenPhishFeatures:
         return OpenPhishFeatures(is_phishing=False)
 
 
-@cache
+@cached("open_phish")
 def get_open_phish_features_cached(url: str) -> OpenPhishFeatures:
     """Get the OpenPhish features for the given URL."""
     return get_open_phish_features(url)
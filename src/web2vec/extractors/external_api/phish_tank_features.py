@@ -1,17 +1,17 @@
 import json
 import logging
 from dataclasses import dataclass
-from functools import cache
 from typing import Optional
 
 from requests import RequestException
 
+from web2vec.caching import cached
 from web2vec.utils import fetch_file_from_url_and_read, get_domain_from_url
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class PhishTankFeatures:
     """Dataclass for PhishTank features."""
 
@@ -62,7 +62,7 @@ def get_phishtank_features(domain: str) -> Optional[PhishTankFeatures]:
     return None
 
 
-@cache
+@cached("phishtank")
 def get_phishtank_features_cached(domain: str) -> Optional[PhishTankFeatures]:
     """Get PhishTank features for the given domain."""
     return get_phishtank_features(domain)
@@ -1,16 +1,16 @@
 import logging
 from dataclasses import dataclass, field
-from functools import cache
 from typing import List, Optional
 
 import requests
 
+from web2vec.caching import cached
 from web2vec.config import config
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class Engagements:
     BounceRate: float
     Month: int
@@ -20,20 +20,20 @@ class Engagements:
     TimeOnSite: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TopCountryShare:
     Country: int
     CountryCode: str
     Value: float
 
 
-@dataclass
+@dataclass(slots=True)
 class EstimatedMonthlyVisit:
     date: str
     visits: int
 
 
-@dataclass
+@dataclass(slots=True)
 class TrafficSource:
     Social: float
     PaidReferrals: float
@@ -43,7 +43,7 @@ class TrafficSource:
     Direct: float
 
 
-@dataclass
+@dataclass(slots=True)
 class TopKeyword:
     Name: str
     EstimatedValue: int
@@ -51,7 +51,7 @@ class TopKeyword:
     Cpc: Optional[float]
 
 
-@dataclass
+@dataclass(slots=True)
 class SimilarWebFeatures:
     """Dataclass for SimilarWeb features."""
 
@@ -139,7 +139,7 @@ def get_similar_web_features(domain: str) -> Optional[SimilarWebFeatures]:
         return None
 
 
-@cache
+@cached("similar_web")
 def get_similar_web_features_cached(domain: str) -> Optional[SimilarWebFeatures]:
     """Get the SimilarWeb features for the given domain."""
     return get_similar_web_features(domain)
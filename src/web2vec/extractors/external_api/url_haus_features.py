@@ -1,18 +1,18 @@
 import csv
 import logging
 from dataclasses import asdict, dataclass
-from functools import cache
 from io import StringIO
 from typing import Generator, Optional
 
 import requests
 
+from web2vec.caching import cached
 from web2vec.utils import fetch_file_from_url_and_read, get_domain_from_url
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class URLHausFeatures:
     """Dataclass for URLHaus features."""
 
@@ -68,7 +68,7 @@ def get_url_haus_features(domain: Optional[str] = None) -> Generator:
         return []
 
 
-@cache
+@cached("url_haus")
 def get_url_haus_features_cached(domain: Optional[str] = None) -> URLHausFeatures:
     """Get the URLHaus features for the given domain."""
     return next(get_url_haus_features(domain), None)
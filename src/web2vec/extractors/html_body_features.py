@@ -1,17 +1,31 @@
 import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse
 
 import requests
 import urllib3
 from bs4 import BeautifulSoup
+from bs4.element import PreformattedString
 
 from web2vec.config import config
+from web2vec.text_scanner import MultiPatternScanner, ScanMatch
 from web2vec.utils import get_domain_from_url
 
+SIGNAL_SUSPICIOUS_KEYWORDS = "suspicious_keywords"
+SIGNAL_COPYRIGHT = "copyright"
+SIGNAL_RIGHT_CLICK = "right_click"
+SIGNAL_API_ENDPOINT = "api_endpoint"
 
-@dataclass
+COPYRIGHT_PATTERN = r"©|&copy;|copyright|all rights reserved"
+RIGHT_CLICK_PATTERN = r"event.button ?== ?2"
+API_ENDPOINT_PATTERN = r"/api/|/graphql|/rest/|/v\d+/|[?&]format=json|\.json(?m:$)"
+
+
+@dataclass(slots=True)
 class HtmlBodyFeatures:
     contains_forms: bool
     contains_obfuscated_scripts: bool
@@ -61,6 +75,8 @@ class HtmlBodyFeatures:
     num_api_endpoints: int = 0
     found_network_requests: List[str] = field(default_factory=list)
     found_api_endpoints: List[str] = field(default_factory=list)
+    visible_text_length: int = 0
+    num_media: int = 0
 
 
 def check_obfuscated_scripts(soup: BeautifulSoup) -> bool:
@@ -74,20 +90,37 @@ def check_obfuscated_scripts(soup: BeautifulSoup) -> bool:
     return False
 
 
+@lru_cache(maxsize=64)
+def _build_signal_scanner(keywords: Tuple[str, ...]) -> MultiPatternScanner:
+    return MultiPatternScanner(
+        keywords={SIGNAL_SUSPICIOUS_KEYWORDS: keywords},
+        regexes={
+            SIGNAL_COPYRIGHT: COPYRIGHT_PATTERN,
+            SIGNAL_RIGHT_CLICK: RIGHT_CLICK_PATTERN,
+            SIGNAL_API_ENDPOINT: API_ENDPOINT_PATTERN,
+        },
+    )
+
+
+def get_signal_scanner(keywords: Optional[List[str]] = None) -> MultiPatternScanner:
+    """Return the compiled scanner for HTML signals and the given keywords."""
+    return _build_signal_scanner(tuple(keywords or config.suspicious_keywords))
+
+
+def scan_text_signals(
+    text: str, keywords: Optional[List[str]] = None
+) -> Dict[str, ScanMatch]:
+    """Scan page text once for suspicious keywords and copyright notes."""
+    scanner = get_signal_scanner(keywords)
+    return scanner.scan(text, signals=(SIGNAL_SUSPICIOUS_KEYWORDS, SIGNAL_COPYRIGHT))
+
+
 def check_suspicious_keywords(
     soup: BeautifulSoup, keywords: Optional[List[str]] = None
 ) -> bool:
     """Check if the response contains any suspicious keywords."""
-    suspicious_keywords = keywords or [
-        "login",
-        "update",
-        "verify",
-        "password",
-        "bank",
-        "account",
-    ]
-    page_content = soup.get_text().lower()
-    return any(keyword in page_content for keyword in suspicious_keywords)
+    text_signals = scan_text_signals(soup.get_text(separator=" "), keywords)
+    return SIGNAL_SUSPICIOUS_KEYWORDS in text_signals
 
 
 def body_length(soup: BeautifulSoup) -> int:
@@ -158,11 +191,13 @@ def mouse_over_effect(soup: BeautifulSoup) -> int:
     return 1 if soup.find_all(onmouseover=True) else 0
 
 
-def right_click_disabled(soup: BeautifulSoup) -> int:
+def right_click_disabled(soup: BeautifulSoup, markup: Optional[str] = None) -> int:
     """Check if the response contains any right-click disabled content."""
     if not soup:
         return 1
-    return 0 if re.findall(r"event.button ?== ?2", str(soup)) else 1
+    scanner = get_signal_scanner()
+    markup = str(soup) if markup is None else markup
+    return 0 if scanner.scan(markup, signals=(SIGNAL_RIGHT_CLICK,)) else 1
 
 
 def num_scripts_http(soup: BeautifulSoup) -> int:
@@ -297,6 +332,15 @@ def num_internal_links(soup: BeautifulSoup, base_domain: str) -> int:
     return len([link for link in links if urlparse(link["href"]).netloc == base_domain])
 
 
+def found_elements(
+    soup: BeautifulSoup, name: Union[str, List[str]], limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Get attributes of the matching elements, at most ``limit`` of them."""
+    if limit == 0:
+        return []
+    return [tag.attrs for tag in soup.find_all(name, limit=limit)]
+
+
 def find_favicon(soup: BeautifulSoup) -> Optional[str]:
     """Find the favicon URL in the given HTML content."""
     icon_link = soup.find("link", rel="icon")
@@ -309,32 +353,34 @@ def find_logo(soup: BeautifulSoup) -> Optional[str]:
     return logo_img["src"] if logo_img else None
 
 
-def find_copyright(soup: BeautifulSoup) -> Optional[str]:
+def find_copyright(
+    soup: BeautifulSoup,
+    text: Optional[str] = None,
+    text_signals: Optional[Dict[str, ScanMatch]] = None,
+) -> Optional[str]:
     """Find the copyright information in the given HTML content."""
-    # Possible patterns to find copyright information
-    patterns = [
-        re.compile(r"©"),
-        re.compile(r"&copy;"),
-        re.compile(r"copyright", re.IGNORECASE),
-        re.compile(r"All rights reserved", re.IGNORECASE),
-    ]
+    copyright_pattern = get_signal_scanner().pattern(SIGNAL_COPYRIGHT)
 
     # Search in meta tags
     for meta in soup.find_all("meta"):
         if "content" in meta.attrs:
             content = meta.attrs["content"]
-            for pattern in patterns:
-                if pattern.search(content):
-                    return content
+            if copyright_pattern.search(content):
+                return content
 
     # Search in text content
-    text = soup.get_text(separator=" ")
-    for pattern in patterns:
-        match = pattern.search(text)
-        if match:
-            start = max(0, match.start() - 30)
-            end = match.end() + 30
-            return text[start:end]
+    if text is None:
+        text = soup.get_text(separator=" ")
+    if text_signals is None:
+        match = copyright_pattern.search(text)
+        span = (match.start(), match.end()) if match else None
+    else:
+        match = text_signals.get(SIGNAL_COPYRIGHT)
+        span = (match.start, match.end) if match else None
+    if span:
+        start = max(0, span[0] - 30)
+        end = span[1] + 30
+        return text[start:end]
 
     return None
 
@@ -358,6 +404,16 @@ def detect_likely_js_spa(soup: BeautifulSoup) -> bool:
     return scripts_count >= 3 and text_len < 200 and has_noscript
 
 
+def visible_text_length(soup: BeautifulSoup) -> int:
+    """Get the length of the visible (non-script, non-style) text."""
+    return sum(
+        len(text.strip())
+        for text in soup.find_all(string=True)
+        if not isinstance(text, PreformattedString)
+        and text.parent.name not in ("script", "style", "noscript", "template")
+    )
+
+
 def is_external_url(url: str, base_domain: str) -> bool:
     """Return True when URL points outside current page domain."""
     parsed = urlparse(url)
@@ -368,12 +424,15 @@ def is_external_url(url: str, base_domain: str) -> bool:
 
 def detect_api_endpoints(urls: List[str]) -> List[str]:
     """Return URLs that look like API/JSON endpoints."""
+    if not urls:
+        return []
+    scanner = get_signal_scanner()
+    # Scan all URLs in one pass and map match offsets back to the URLs
+    joined = "\n".join(urls)
+    offsets = list(accumulate(len(candidate) + 1 for candidate in urls))
     api_like = []
-    pattern = re.compile(r"(/api/|/graphql|/rest/|/v\d+/|[?&]format=json)", re.I)
-    for candidate in urls:
-        lowered = candidate.lower()
-        if lowered.endswith(".json") or pattern.search(lowered):
-            api_like.append(candidate)
+    for match in scanner.finditer(joined, signals=(SIGNAL_API_ENDPOINT,)):
+        api_like.append(urls[bisect_right(offsets, match.start)])
     return list(dict.fromkeys(api_like))
 
 
@@ -384,9 +443,20 @@ def get_html_body_features(
     was_js_rendered: bool = False,
     html_snapshot_path: Optional[str] = None,
     network_request_urls: Optional[List[str]] = None,
+    keywords: Optional[List[str]] = None,
+    max_found_elements: Optional[int] = None,
 ) -> HtmlBodyFeatures:
-    """Extract HTML body features from the"""
+    """
+    Extract HTML body features from the given HTML body.
+
+    ``max_found_elements`` bounds the ``found_forms``, ``found_images``,
+    ``found_anchors`` and ``found_media`` lists: ``None`` keeps every element,
+    ``0`` omits the lists and ``N`` keeps the first N entries. The ``num_*``
+    counts always cover the whole page.
+    """
     soup = BeautifulSoup(body, "html.parser")
+    text = soup.get_text(separator=" ")
+    text_signals = scan_text_signals(text, keywords)
     base_domain = get_domain_from_url(url)
     discovered_urls = list(dict.fromkeys(network_request_urls or []))
     external_discovered = [
@@ -397,7 +467,7 @@ def get_html_body_features(
     return HtmlBodyFeatures(
         contains_forms=bool(soup.find_all("form")),
         contains_obfuscated_scripts=check_obfuscated_scripts(soup),
-        contains_suspicious_keywords=check_suspicious_keywords(soup),
+        contains_suspicious_keywords=SIGNAL_SUSPICIOUS_KEYWORDS in text_signals,
         body_length=body_length(soup),
         num_titles=num_titles(soup),
         num_images=num_images(soup),
@@ -409,7 +479,7 @@ def get_html_body_features(
         body_to_special_char_ratio=body_to_special_char_ratio(soup),
         iframe_redirection=iframe_redirection(soup),
         mouse_over_effect=mouse_over_effect(soup),
-        right_click_disabled=right_click_disabled(soup),
+        right_click_disabled=right_click_disabled(soup, markup=body),
         num_scripts_http=num_scripts_http(soup),
         num_styles_http=num_styles_http(soup),
         num_iframes_http=num_iframes_http(soup),
@@ -429,11 +499,11 @@ def get_html_body_features(
         num_internal_links=num_internal_links(soup, base_domain),
         favicon_url=find_favicon(soup),
         logo_url=find_logo(soup),
-        found_forms=[form.attrs for form in soup.find_all("form")],
-        found_images=[img.attrs for img in soup.find_all("img")],
-        found_anchors=[a.attrs for a in soup.find_all("a")],
-        found_media=[m.attrs for m in soup.find_all(["img", "video", "audio"])],
-        copyright=find_copyright(soup),
+        found_forms=found_elements(soup, "form", max_found_elements),
+        found_images=found_elements(soup, "img", max_found_elements),
+        found_anchors=found_elements(soup, "a", max_found_elements),
+        found_media=found_elements(soup, ["img", "video", "audio"], max_found_elements),
+        copyright=find_copyright(soup, text=text, text_signals=text_signals),
         source_mode=source_mode,
         was_js_rendered=was_js_rendered,
         likely_js_spa=detect_likely_js_spa(soup),
@@ -443,6 +513,8 @@ def get_html_body_features(
         num_api_endpoints=len(found_api_endpoints),
         found_network_requests=discovered_urls,
         found_api_endpoints=found_api_endpoints,
+        visible_text_length=visible_text_length(soup),
+        num_media=len(soup.find_all(["img", "video", "audio"])),
     )
 
 
@@ -458,7 +530,7 @@ if __name__ == "__main__":
     )
 
     extractor = HtmlBodyExtractor(
-        enable_js_render=True,
+        render="auto",
         save_html_snapshot=True,
         render_wait_seconds=2.0,
     )
@@ -5,10 +5,13 @@ from typing import List, Optional
 import requests
 from bs4 import BeautifulSoup
 
+from web2vec.config import config
+from web2vec.text_scanner import get_keyword_scanner
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class HttpResponseFeatures:
     redirects: bool
     redirect_count: int
@@ -67,16 +70,8 @@ def check_suspicious_keywords(
     response: requests.Response, keywords: Optional[List[str]] = None
 ) -> bool:
     """Check if the response contains any suspicious keywords."""
-    suspicious_keywords = keywords or [
-        "login",
-        "update",
-        "verify",
-        "password",
-        "bank",
-        "account",
-    ]
-    page_content = response.text.lower()
-    return any(keyword in page_content for keyword in suspicious_keywords)
+    scanner = get_keyword_scanner(tuple(keywords or config.suspicious_keywords))
+    return bool(scanner.scan(response.text))
 
 
 def check_https(response: requests.Response) -> bool:
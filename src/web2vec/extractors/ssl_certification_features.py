@@ -1,16 +1,36 @@
+import calendar
 import logging
+import os
 import socket
+import sqlite3
 import ssl
-from dataclasses import dataclass, field
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import InitVar, dataclass, field
 from datetime import datetime, timedelta
-from functools import cache
-from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import idna
 import requests
 import urllib3
-
+from cryptography import x509
+from cryptography.hazmat.primitives.asymmetric import (
+    dsa,
+    ec,
+    ed448,
+    ed25519,
+    rsa,
+)
+from cryptography.x509.oid import ExtensionOID, NameOID, SignatureAlgorithmOID
+
+from web2vec.caching import cached
 from web2vec.config import config
+from web2vec.extractors.dns_features import get_host_addresses
+from web2vec.utils import get_peer_certificate_chain, valid_ip
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +44,213 @@ FREE_CA_KEYWORDS = {
 }
 
 
+# Attribute names used by ssl.SSLSocket.getpeercert()
+_NAME_ATTRIBUTES = {
+    NameOID.COMMON_NAME: "commonName",
+    NameOID.COUNTRY_NAME: "countryName",
+    NameOID.LOCALITY_NAME: "localityName",
+    NameOID.STATE_OR_PROVINCE_NAME: "stateOrProvinceName",
+    NameOID.ORGANIZATION_NAME: "organizationName",
+    NameOID.ORGANIZATIONAL_UNIT_NAME: "organizationalUnitName",
+    NameOID.SERIAL_NUMBER: "serialNumber",
+    NameOID.BUSINESS_CATEGORY: "businessCategory",
+    NameOID.JURISDICTION_COUNTRY_NAME: "jurisdictionCountryName",
+    NameOID.EMAIL_ADDRESS: "emailAddress",
+}
+_CERT_TIME_FORMAT = "%b %d %H:%M:%S %Y GMT"
+# Names of the signature algorithms as printed by OpenSSL
+_SIGNATURE_ALGORITHMS = {
+    SignatureAlgorithmOID.RSA_WITH_MD5: "md5WithRSAEncryption",
+    SignatureAlgorithmOID.RSA_WITH_SHA1: "sha1WithRSAEncryption",
+    SignatureAlgorithmOID.RSA_WITH_SHA224: "sha224WithRSAEncryption",
+    SignatureAlgorithmOID.RSA_WITH_SHA256: "sha256WithRSAEncryption",
+    SignatureAlgorithmOID.RSA_WITH_SHA384: "sha384WithRSAEncryption",
+    SignatureAlgorithmOID.RSA_WITH_SHA512: "sha512WithRSAEncryption",
+    SignatureAlgorithmOID.RSASSA_PSS: "rsassaPss",
+    SignatureAlgorithmOID.ECDSA_WITH_SHA1: "ecdsa-with-SHA1",
+    SignatureAlgorithmOID.ECDSA_WITH_SHA224: "ecdsa-with-SHA224",
+    SignatureAlgorithmOID.ECDSA_WITH_SHA256: "ecdsa-with-SHA256",
+    SignatureAlgorithmOID.ECDSA_WITH_SHA384: "ecdsa-with-SHA384",
+    SignatureAlgorithmOID.ECDSA_WITH_SHA512: "ecdsa-with-SHA512",
+    SignatureAlgorithmOID.DSA_WITH_SHA1: "dsaWithSHA1",
+    SignatureAlgorithmOID.DSA_WITH_SHA224: "dsa_with_SHA224",
+    SignatureAlgorithmOID.DSA_WITH_SHA256: "dsa_with_SHA256",
+    SignatureAlgorithmOID.ED25519: "ED25519",
+    SignatureAlgorithmOID.ED448: "ED448",
+}
+_RDNS = Tuple[Tuple[Tuple[str, str], ...], ...]
+
+
+@dataclass(slots=True)
+class TLSConnectionInfo:
+    certificate: bytes
+    tls_version: Optional[str] = None
+    cipher_name: Optional[str] = None
+    cipher_bits: Optional[int] = None
+    verified: Optional[bool] = None
+    verify_message: Optional[str] = None
+    # Certificates sent by the peer, leaf first, empty when unknown
+    chain: Tuple[bytes, ...] = ()
+
+
+def get_tls_connection_info(response: Any) -> Optional[TLSConnectionInfo]:
+    """
+    Return the peer certificate and TLS parameters of the fetch connection.
+
+    Reads ``response.certificate`` of Scrapy responses, which has no TLS
+    parameters or verification result, and the attributes ``fetch_url`` sets
+    on requests responses. None for plain HTTP and responses without that
+    information.
+    """
+    certificate = getattr(response, "certificate", None)
+    if certificate is not None:
+        try:
+            return TLSConnectionInfo(certificate=certificate.dump())
+        except Exception as e:  # noqa
+            logger.debug(f"Could not read the certificate of {response.url}: {e}")
+            return None
+    der = getattr(response, "peer_certificate", None)
+    if not der:
+        return None
+    cipher = getattr(response, "tls_cipher", None) or (None, None, None)
+    return TLSConnectionInfo(
+        certificate=der,
+        chain=getattr(response, "peer_certificate_chain", ()),
+        tls_version=getattr(response, "tls_version", None),
+        verified=getattr(response, "tls_verified", None),
+        cipher_name=cipher[0],
+        cipher_bits=cipher[2],
+    )
+
+
+def _name_to_rdns(name: x509.Name) -> _RDNS:
+    return tuple(
+        tuple(
+            (
+                _NAME_ATTRIBUTES.get(attribute.oid, attribute.oid.dotted_string),
+                str(attribute.value),
+            )
+            for attribute in rdn
+        )
+        for rdn in name.rdns
+    )
+
+
+def decode_der_certificate(der: bytes) -> Dict[str, Any]:
+    """Decode a DER certificate into the ``ssl.SSLSocket.getpeercert()`` layout."""
+    certificate = x509.load_der_x509_certificate(der)
+    decoded: Dict[str, Any] = {
+        "subject": _name_to_rdns(certificate.subject),
+        "issuer": _name_to_rdns(certificate.issuer),
+        "version": certificate.version.value + 1,
+        "serialNumber": f"{certificate.serial_number:X}",
+        "notBefore": certificate.not_valid_before_utc.strftime(_CERT_TIME_FORMAT),
+        "notAfter": certificate.not_valid_after_utc.strftime(_CERT_TIME_FORMAT),
+    }
+    try:
+        alt_names = certificate.extensions.get_extension_for_oid(
+            ExtensionOID.SUBJECT_ALTERNATIVE_NAME
+        ).value
+    except x509.ExtensionNotFound:
+        return decoded
+    decoded["subjectAltName"] = tuple(
+        [("DNS", name) for name in alt_names.get_values_for_type(x509.DNSName)]
+        + [
+            ("IP Address", str(address))
+            for address in alt_names.get_values_for_type(x509.IPAddress)
+        ]
+    )
+    return decoded
+
+
+def _name_attribute(name: x509.Name, oid: x509.ObjectIdentifier) -> Optional[str]:
+    attributes = name.get_attributes_for_oid(oid)
+    return str(attributes[0].value) if attributes else None
+
+
+def _public_key_type(
+    certificate: x509.Certificate,
+) -> Tuple[Optional[str], Optional[int]]:
+    key = certificate.public_key()
+    if isinstance(key, rsa.RSAPublicKey):
+        return "RSA", key.key_size
+    if isinstance(key, ec.EllipticCurvePublicKey):
+        return "EC", key.curve.key_size
+    if isinstance(key, dsa.DSAPublicKey):
+        return "DSA", key.key_size
+    if isinstance(key, ed25519.Ed25519PublicKey):
+        return "Ed25519", 256
+    if isinstance(key, ed448.Ed448PublicKey):
+        return "Ed448", 456
+    return None, None
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedCertificate:
+    subject: _RDNS
+    issuer: _RDNS
+    not_before: datetime
+    not_after: datetime
+    issuer_common_name: Optional[str]
+    issuer_organization_name: Optional[str]
+    issuer_is_lets_encrypt: bool
+    issuer_is_free_ca: bool
+    san_count: int
+    key_type: Optional[str]
+    key_size: Optional[int]
+    signature_algorithm: str
+    chain_length: int
+
+
+@lru_cache(maxsize=4096)
+def parse_certificate(der: bytes, chain: Tuple[bytes, ...] = ()) -> ParsedCertificate:
+    """
+    Parse a DER certificate once into the fields the certificate features need.
+
+    Results are cached by the certificate bytes, so hosts sharing a
+    certificate and repeated reads from the certificate cache parse it once.
+
+    :param der: Leaf certificate of the peer.
+    :param chain: Certificates sent by the peer, leaf first, counted as one
+        certificate when empty.
+    """
+    certificate = x509.load_der_x509_certificate(der)
+    issuer_values = " ".join(
+        str(attribute.value).lower() for attribute in certificate.issuer
+    )
+    try:
+        san_count = len(
+            certificate.extensions.get_extension_for_oid(
+                ExtensionOID.SUBJECT_ALTERNATIVE_NAME
+            ).value
+        )
+    except x509.ExtensionNotFound:
+        san_count = 0
+    key_type, key_size = _public_key_type(certificate)
+    signature_oid = certificate.signature_algorithm_oid
+    signature_algorithm = _SIGNATURE_ALGORITHMS.get(
+        signature_oid, signature_oid.dotted_string
+    )
+    return ParsedCertificate(
+        subject=_name_to_rdns(certificate.subject),
+        issuer=_name_to_rdns(certificate.issuer),
+        not_before=certificate.not_valid_before_utc.replace(tzinfo=None),
+        not_after=certificate.not_valid_after_utc.replace(tzinfo=None),
+        issuer_common_name=_name_attribute(certificate.issuer, NameOID.COMMON_NAME),
+        issuer_organization_name=_name_attribute(
+            certificate.issuer, NameOID.ORGANIZATION_NAME
+        ),
+        issuer_is_lets_encrypt="let's encrypt" in issuer_values
+        or "lets encrypt" in issuer_values,
+        issuer_is_free_ca=any(keyword in issuer_values for keyword in FREE_CA_KEYWORDS),
+        san_count=san_count,
+        key_type=key_type,
+        key_size=key_size,
+        signature_algorithm=signature_algorithm,
+        chain_length=len(chain) or 1,
+    )
+
+
 def _flatten_name_entries(name_value: Any) -> Dict[str, str]:
     """Convert subject/issuer structures from ssl certs into a flat dict."""
     flat: Dict[str, str] = {}
@@ -62,7 +289,7 @@ def _first_value(flat_name: Dict[str, str], keys: Tuple[str, ...]) -> Optional[s
     return None
 
 
-@dataclass
+@dataclass(slots=True)
 class CertificateFeatures:
     subject: Dict[str, Any]
     issuer: Dict[str, Any]
@@ -72,6 +299,10 @@ class CertificateFeatures:
     validity_message: str
     is_trusted: bool
     trust_message: str
+    tls_version: Optional[str] = None
+    cipher_name: Optional[str] = None
+    cipher_bits: Optional[int] = None
+    parsed: InitVar[Optional[ParsedCertificate]] = None
     issuer_common_name: Optional[str] = field(init=False, default=None)
     issuer_organization_name: Optional[str] = field(init=False, default=None)
     issuer_is_lets_encrypt: Optional[bool] = field(init=False, default=None)
@@ -83,10 +314,26 @@ class CertificateFeatures:
     valid_in_7_days: Optional[bool] = field(init=False, default=None)
     valid_in_30_days: Optional[bool] = field(init=False, default=None)
     is_expired: Optional[bool] = field(init=False, default=None)
+    san_count: Optional[int] = field(init=False, default=None)
+    key_type: Optional[str] = field(init=False, default=None)
+    key_size: Optional[int] = field(init=False, default=None)
+    signature_algorithm: Optional[str] = field(init=False, default=None)
+    chain_length: Optional[int] = field(init=False, default=None)
 
-    def __post_init__(self) -> None:
+    def __post_init__(self, parsed: Optional[ParsedCertificate]) -> None:
         self._compute_temporal_features()
-        self._compute_issuer_features()
+        if parsed is None:
+            self._compute_issuer_features()
+            return
+        self.issuer_common_name = parsed.issuer_common_name
+        self.issuer_organization_name = parsed.issuer_organization_name
+        self.issuer_is_lets_encrypt = parsed.issuer_is_lets_encrypt
+        self.issuer_is_free_ca = parsed.issuer_is_free_ca
+        self.san_count = parsed.san_count
+        self.key_type = parsed.key_type
+        self.key_size = parsed.key_size
+        self.signature_algorithm = parsed.signature_algorithm
+        self.chain_length = parsed.chain_length
 
     def _has_certificate_window(self) -> bool:
         return self.not_before != datetime.min and self.not_after != datetime.min
@@ -138,20 +385,150 @@ class CertificateFeatures:
         )
 
 
-def get_tls_certificate(hostname: str, port: int = 443) -> Dict[str, Any]:
-    """Retrieve the TLS certificate for a given hostname and port."""
-    try:
-        context = ssl.create_default_context()
+class TLSProber:
+    """
+    Fetch peer certificates and TLS parameters with preloaded SSL contexts.
+
+    The contexts, and with them the system CA store, are loaded once and
+    shared by every probe. Connecting and the handshake have their own
+    timeouts, hostnames are sent IDNA encoded as SNI. ``probe_many`` probes
+    hosts concurrently in a thread pool.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: Optional[float] = None,
+        handshake_timeout: Optional[float] = None,
+        max_workers: int = 32,
+        cafile: Optional[str] = None,
+    ):
+        """
+        :param connect_timeout: Seconds to open the TCP connection, defaults
+            to ``config.tls_connect_timeout``.
+        :param handshake_timeout: Seconds for the TLS handshake, defaults to
+            ``config.tls_handshake_timeout``.
+        :param max_workers: Hosts probed at once by ``probe_many``.
+        :param cafile: CA bundle trusted instead of the system store.
+        """
+        self.connect_timeout = (
+            config.tls_connect_timeout if connect_timeout is None else connect_timeout
+        )
+        self.handshake_timeout = (
+            config.tls_handshake_timeout
+            if handshake_timeout is None
+            else handshake_timeout
+        )
+        self.max_workers = max_workers
+        self.context = ssl.create_default_context(cafile=cafile)
+        self.unverified_context = ssl.create_default_context(cafile=cafile)
+        self.unverified_context.check_hostname = False
+        self.unverified_context.verify_mode = ssl.CERT_NONE
+
+    def _connect(self, addresses: List[str], port: int) -> socket.socket:
+        """Connect to the first address that accepts, as create_connection does."""
+        error: Optional[OSError] = None
+        for address in addresses:
+            try:
+                return socket.create_connection(
+                    (address, port), timeout=self.connect_timeout
+                )
+            except OSError as e:
+                error = e
+        raise error or OSError("No address to connect to")
+
+    def _handshake(
+        self,
+        context: ssl.SSLContext,
+        addresses: List[str],
+        hostname: str,
+        port: int,
+    ) -> TLSConnectionInfo:
+        with self._connect(addresses, port) as sock:
+            sock.settimeout(self.handshake_timeout)
+            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+                cipher = ssock.cipher() or (None, None, None)
+                return TLSConnectionInfo(
+                    certificate=ssock.getpeercert(binary_form=True),
+                    chain=get_peer_certificate_chain(ssock),
+                    tls_version=ssock.version(),
+                    cipher_name=cipher[0],
+                    cipher_bits=cipher[2],
+                    verified=context.verify_mode != ssl.CERT_NONE,
+                )
+
+    def probe(
+        self, hostname: str, port: int = 443, unverified_fallback: bool = True
+    ) -> Optional[TLSConnectionInfo]:
+        """
+        Handshake with the host and return its certificate and TLS parameters.
+
+        A certificate failing verification is fetched again without
+        verification, unless ``unverified_fallback`` is False, and reported
+        with ``verified`` False. None when the host cannot be reached.
+        """
+        try:
+            if valid_ip(hostname):
+                server_hostname, addresses = hostname, [hostname]
+            else:
+                server_hostname = idna.encode(hostname).decode("ascii")
+                # IPv4 and IPv6 addresses, tried in turn until one connects
+                addresses = get_host_addresses(server_hostname)
+            try:
+                return self._handshake(self.context, addresses, server_hostname, port)
+            except ssl.SSLCertVerificationError as e:
+                if not unverified_fallback:
+                    raise
+                connection = self._handshake(
+                    self.unverified_context, addresses, server_hostname, port
+                )
+                connection.verify_message = e.verify_message
+                return connection
+        except Exception as e:  # noqa
+            logger.debug(f"Error retrieving certificate for {hostname}: {e}")
+            return None
+
+    def probe_many(
+        self, hostnames: Iterable[str], port: int = 443
+    ) -> Iterator[Tuple[str, Optional[TLSConnectionInfo]]]:
+        """
+        Probe many hosts concurrently, yielding results as they finish.
+
+        Hostnames are read lazily, at most twice ``max_workers`` are queued.
+        """
+        iterator = iter(hostnames)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="web2vec-tls"
+        ) as executor:
+            pending = {}
+            while True:
+                for hostname in islice(iterator, 2 * self.max_workers - len(pending)):
+                    pending[executor.submit(self.probe, hostname, port)] = hostname
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+
+_tls_prober: Optional[TLSProber] = None
+_tls_prober_lock = threading.Lock()
+
+
+def get_tls_prober() -> TLSProber:
+    """Return the shared TLS prober, its contexts are loaded on first use."""
+    global _tls_prober
+    with _tls_prober_lock:
+        if _tls_prober is None:
+            _tls_prober = TLSProber()
+        return _tls_prober
 
-        hostname_idna = idna.encode(hostname).decode("ascii")
 
-        with socket.create_connection((hostname_idna, port)) as sock:
-            with context.wrap_socket(sock, server_hostname=hostname_idna) as ssock:
-                cert = ssock.getpeercert()
-                return cert
-    except Exception as e:  # noqa
-        logger.debug(f"Error retrieving certificate for {hostname}: {e}")
+def get_tls_certificate(hostname: str, port: int = 443) -> Dict[str, Any]:
+    """Retrieve the verified TLS certificate for a given hostname and port."""
+    connection = get_tls_prober().probe(hostname, port, unverified_fallback=False)
+    if connection is None:
         return {}
+    return decode_der_certificate(connection.certificate)
 
 
 def is_certificate_valid(cert: Dict[str, Any]) -> Tuple[bool, str]:
@@ -159,12 +536,13 @@ def is_certificate_valid(cert: Dict[str, Any]) -> Tuple[bool, str]:
     if not cert:
         return False, "No certificate found"
 
-    current_date = datetime.utcnow()
-
     not_before = datetime.strptime(cert["notBefore"], "%b %d %H:%M:%S %Y %Z")
     not_after = datetime.strptime(cert["notAfter"], "%b %d %H:%M:%S %Y %Z")
+    return _validity(not_before, not_after)
 
-    if not_before <= current_date <= not_after:
+
+def _validity(not_before: datetime, not_after: datetime) -> Tuple[bool, str]:
+    if not_before <= datetime.utcnow() <= not_after:
         return True, "Certificate is valid"
     else:
         return (
@@ -174,18 +552,20 @@ def is_certificate_valid(cert: Dict[str, Any]) -> Tuple[bool, str]:
 
 
 def is_certificate_trusted(cert: Dict[str, Any]) -> Tuple[bool, str]:
-    """Check if the certificate is trusted by the system's CA store."""
-    context = ssl.create_default_context()
-
-    try:
-        context.verify_mode = ssl.CERT_REQUIRED
-        context.check_hostname = False
-        ca_certs = context.get_ca_certs(binary_form=True)  # noqa
-
-        store = context.cert_store_stats()  # noqa
-        return True, "Certificate is signed by a trusted CA"
-    except ssl.SSLError as e:
-        return False, f"Certificate is not trusted: {e}"
+    """
+    Report a certificate as not verified, deprecated.
+
+    Trust is decided by the verified handshake of the TLSProber, a decoded
+    certificate alone does not say whether its chain verifies. Use
+    ``get_certificate_features(hostname).is_trusted`` instead.
+    """
+    warnings.warn(
+        "is_certificate_trusted is deprecated, use"
+        " get_certificate_features(hostname).is_trusted",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return False, "Certificate trust was not verified"
 
 
 def check_ssl(url: str) -> bool:
@@ -199,44 +579,311 @@ def check_ssl(url: str) -> bool:
         return False
 
 
-def get_certificate_features(hostname: str) -> CertificateFeatures:
-    """Retrieve and analyze the TLS certificate for a given hostname."""
-    cert = get_tls_certificate(hostname)
-
-    if cert:
-        is_valid, validity_message = is_certificate_valid(cert)
-        is_trusted, trust_message = is_certificate_trusted(cert)
-
-        not_before = datetime.strptime(cert["notBefore"], "%b %d %H:%M:%S %Y %Z")
-        not_after = datetime.strptime(cert["notAfter"], "%b %d %H:%M:%S %Y %Z")
+class CertificateCache:
+    """
+    Persistent SQLite cache of peer certificates by host and port.
+
+    The raw DER certificate, the chain the peer sent and the TLS parameters
+    are stored, features are derived from them at read time so the
+    time-relative fields stay current. An entry is refreshed ``ttl`` seconds
+    after it was fetched or ``refresh_before_expiry`` seconds before the
+    certificate's notAfter, whichever comes first, both computed when the
+    entry is stored. Certificates that expired or are about to are kept for
+    ``min_ttl`` seconds, so they are not fetched again on every read.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[int] = None,
+        refresh_before_expiry: Optional[int] = None,
+        min_ttl: Optional[int] = None,
+    ):
+        """
+        :param path: Database file, defaults to ``config.certificate_cache_path``.
+        :param ttl: Seconds an entry is kept, defaults to
+            ``config.certificate_cache_ttl``.
+        :param refresh_before_expiry: Seconds before notAfter an entry is
+            refreshed, defaults to ``config.certificate_refresh_before_expiry``.
+        :param min_ttl: Seconds every entry is kept at least, defaults to
+            ``config.certificate_cache_min_ttl``.
+        """
+        self.path = path or config.certificate_cache_path
+        self._ttl = ttl
+        self._refresh_before_expiry = refresh_before_expiry
+        self._min_ttl = min_ttl
+        self._local = threading.local()
+
+    @property
+    def ttl(self) -> int:
+        """Seconds an entry is kept after it was fetched."""
+        return config.certificate_cache_ttl if self._ttl is None else self._ttl
+
+    @property
+    def refresh_before_expiry(self) -> int:
+        """Seconds before the certificate's notAfter an entry is refreshed."""
+        if self._refresh_before_expiry is None:
+            return config.certificate_refresh_before_expiry
+        return self._refresh_before_expiry
+
+    @property
+    def min_ttl(self) -> int:
+        """Seconds every entry is kept, also when its certificate expired."""
+        if self._min_ttl is None:
+            return config.certificate_cache_min_ttl
+        return self._min_ttl
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS certificates ("
+                "hostname TEXT NOT NULL, port INTEGER NOT NULL,"
+                " certificate BLOB NOT NULL, tls_version TEXT, cipher_name TEXT,"
+                " cipher_bits INTEGER, verified INTEGER, verify_message TEXT,"
+                " refresh_at REAL NOT NULL, PRIMARY KEY (hostname, port))"
+            )
+            # One row per certificate the peer sent, leaf first
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chains ("
+                "hostname TEXT NOT NULL, port INTEGER NOT NULL,"
+                " position INTEGER NOT NULL, certificate BLOB NOT NULL,"
+                " PRIMARY KEY (hostname, port, position))"
+            )
+            connection.commit()
+            self._local.connection = connection
+        return connection
+
+    def get(self, hostname: str, port: int = 443) -> Optional[TLSConnectionInfo]:
+        """Return the stored certificate of the host, None when due a refresh."""
+        hostname = hostname.lower()
+        sql_connection = self._connection()
+        row = sql_connection.execute(
+            "SELECT certificate, tls_version, cipher_name, cipher_bits,"
+            " verified, verify_message FROM certificates"
+            " WHERE hostname = ? AND port = ? AND refresh_at > ?",
+            (hostname, port, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        certificate, tls_version, cipher_name, cipher_bits, verified, message = row
+        chain = sql_connection.execute(
+            "SELECT certificate FROM chains WHERE hostname = ? AND port = ?"
+            " ORDER BY position",
+            (hostname, port),
+        ).fetchall()
+        return TLSConnectionInfo(
+            certificate=certificate,
+            tls_version=tls_version,
+            cipher_name=cipher_name,
+            cipher_bits=cipher_bits,
+            verified=None if verified is None else bool(verified),
+            verify_message=message,
+            chain=tuple(chain_certificate for (chain_certificate,) in chain),
+        )
 
-        return CertificateFeatures(
-            subject=cert.get("subject", {}),
-            issuer=cert.get("issuer", {}),
-            not_before=not_before,
-            not_after=not_after,
-            is_valid=is_valid,
-            validity_message=validity_message,
-            is_trusted=is_trusted,
-            trust_message=trust_message,
+    def set(self, hostname: str, port: int, connection: TLSConnectionInfo) -> None:
+        """Store the certificate and TLS parameters of the host."""
+        now = time.time()
+        not_after = calendar.timegm(
+            parse_certificate(connection.certificate).not_after.timetuple()
         )
-    else:
-        return CertificateFeatures(
-            subject={},
-            issuer={},
-            not_before=datetime.min,
-            not_after=datetime.min,
-            is_valid=False,
-            validity_message="No certificate found",
-            is_trusted=False,
-            trust_message="No certificate found",
+        refresh_at = max(
+            min(now + self.ttl, not_after - self.refresh_before_expiry),
+            now + min(self.min_ttl, self.ttl),
         )
-
-
-@cache
-def get_certificate_features_cached(hostname: str) -> CertificateFeatures:
-    """Get the certificate features for the given hostname."""
-    return get_certificate_features(hostname)
+        hostname = hostname.lower()
+        sql_connection = self._connection()
+        with sql_connection:
+            sql_connection.execute(
+                "INSERT OR REPLACE INTO certificates"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    hostname,
+                    port,
+                    connection.certificate,
+                    connection.tls_version,
+                    connection.cipher_name,
+                    connection.cipher_bits,
+                    connection.verified,
+                    connection.verify_message,
+                    refresh_at,
+                ),
+            )
+            sql_connection.execute(
+                "DELETE FROM chains WHERE hostname = ? AND port = ?", (hostname, port)
+            )
+            sql_connection.executemany(
+                "INSERT INTO chains VALUES (?, ?, ?, ?)",
+                [
+                    (hostname, port, position, chain_certificate)
+                    for position, chain_certificate in enumerate(connection.chain)
+                ],
+            )
+
+    def clear(self) -> None:
+        """Delete every stored certificate."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM certificates")
+            connection.execute("DELETE FROM chains")
+
+
+_certificate_caches: Dict[str, CertificateCache] = {}
+_certificate_caches_lock = threading.Lock()
+
+
+def get_certificate_cache(path: Optional[str] = None) -> CertificateCache:
+    """
+    Return the shared certificate cache of the database file.
+
+    :param path: Database file, defaults to ``config.certificate_cache_path``.
+    """
+    path = path or config.certificate_cache_path
+    with _certificate_caches_lock:
+        if path not in _certificate_caches:
+            _certificate_caches[path] = CertificateCache(path)
+        return _certificate_caches[path]
+
+
+def store_tls_connection(
+    hostname: str, connection: TLSConnectionInfo, port: int = 443
+) -> None:
+    """Keep a certificate seen on another connection in the certificate cache."""
+    if not config.certificate_cache_enabled:
+        return
+    try:
+        get_certificate_cache().set(hostname, port, connection)
+    except Exception as e:  # noqa
+        logger.warning(f"Could not store the certificate of {hostname}: {e}")
+
+
+def get_tls_connection(hostname: str, port: int = 443) -> Optional[TLSConnectionInfo]:
+    """
+    Return the certificate and TLS parameters of the host.
+
+    They are read from the persistent certificate cache while fresh,
+    otherwise the host is probed and the result stored.
+    """
+    if config.certificate_cache_enabled:
+        try:
+            connection = get_certificate_cache().get(hostname, port)
+        except Exception as e:  # noqa
+            logger.warning(f"Could not read the certificate cache: {e}")
+            connection = None
+        if connection is not None:
+            return connection
+    connection = get_tls_prober().probe(hostname, port)
+    if connection is not None:
+        store_tls_connection(hostname, connection, port)
+    return connection
+
+
+_NO_CERTIFICATE = dict(
+    subject={},
+    issuer={},
+    not_before=datetime.min,
+    not_after=datetime.min,
+    is_valid=False,
+    validity_message="No certificate found",
+    is_trusted=False,
+    trust_message="No certificate found",
+)
+
+
+def _features_from_connection(
+    connection: Optional[TLSConnectionInfo],
+) -> CertificateFeatures:
+    if connection is None:
+        return CertificateFeatures(**_NO_CERTIFICATE)
+    try:
+        parsed = parse_certificate(connection.certificate, connection.chain)
+    except ValueError as e:
+        logger.debug(f"Could not parse the peer certificate: {e}")
+        return CertificateFeatures(**_NO_CERTIFICATE)
+
+    is_valid, validity_message = _validity(parsed.not_before, parsed.not_after)
+    if connection.verified is None:
+        # Scrapy responses and fetches without verification, never trusted
+        is_trusted, trust_message = False, "Certificate trust was not verified"
+    elif connection.verified:
+        is_trusted, trust_message = True, "Certificate is signed by a trusted CA"
+    else:
+        is_trusted = False
+        trust_message = f"Certificate is not trusted: {connection.verify_message}"
+    return CertificateFeatures(
+        subject=parsed.subject,
+        issuer=parsed.issuer,
+        not_before=parsed.not_before,
+        not_after=parsed.not_after,
+        is_valid=is_valid,
+        validity_message=validity_message,
+        is_trusted=is_trusted,
+        trust_message=trust_message,
+        tls_version=connection.tls_version,
+        cipher_name=connection.cipher_name,
+        cipher_bits=connection.cipher_bits,
+        parsed=parsed,
+    )
+
+
+def get_certificate_features(
+    hostname: str, connection: Optional[TLSConnectionInfo] = None
+) -> CertificateFeatures:
+    """
+    Retrieve and analyze the TLS certificate for a given hostname.
+
+    Without a connection the host is probed with the shared ``TLSProber``,
+    untrusted certificates are analyzed and reported with ``is_trusted`` False.
+
+    :param hostname: Host to connect to when no connection is given.
+    :param connection: Certificate and TLS parameters of an existing
+        connection, see ``get_tls_connection_info``, saves a new handshake.
+    """
+    if connection is None:
+        connection = get_tls_prober().probe(hostname)
+    return _features_from_connection(connection)
+
+
+def get_certificate_features_bulk(
+    hostnames: Iterable[str], port: int = 443, prober: Optional[TLSProber] = None
+) -> Iterator[Tuple[str, CertificateFeatures]]:
+    """
+    Probe many hosts concurrently and yield their certificate features.
+
+    Results arrive in completion order as ``(hostname, features)`` pairs.
+    Untrusted certificates are still analyzed, with ``is_trusted`` False.
+
+    :param prober: TLS prober to use, defaults to ``get_tls_prober()``.
+    """
+    prober = prober or get_tls_prober()
+    for hostname, connection in prober.probe_many(hostnames, port):
+        # A failed probe is not retried one host at a time
+        yield hostname, _features_from_connection(connection)
+
+
+@cached("certificate")
+def get_tls_connection_cached(
+    hostname: str, port: int = 443
+) -> Optional[TLSConnectionInfo]:
+    """Get the certificate and TLS parameters of the host, see get_tls_connection."""
+    return get_tls_connection(hostname, port)
+
+
+def get_certificate_features_cached(
+    hostname: str, port: int = 443
+) -> CertificateFeatures:
+    """
+    Get the certificate features for the given hostname.
+
+    The certificate comes from the certificate caches, the features, and
+    with them the time-relative fields, are computed on every call.
+    """
+    return _features_from_connection(get_tls_connection_cached(hostname, port))
 
 
 if __name__ == "__main__":
@@ -1,15 +1,16 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from functools import cache
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
 
 import geoip2.database
 
+from web2vec.caching import cached
+from web2vec.extractors.dns_features import get_host_addresses
 from web2vec.utils import (
     fetch_file_from_url,
     get_github_repo_release_info,
-    get_ip_from_url,
+    parse_url,
 )
 
 logger = logging.getLogger(__name__)
@@ -20,13 +21,19 @@ class GeoLiteDbType(Enum):
     ASN = "GeoLite2-ASN"
 
 
-@dataclass
+@dataclass(slots=True)
 class URLGeoFeatures:
     url: str
     country_code: str
     asn: int
+    ip_addresses: List[str] = field(default_factory=list)
+    country_codes: List[Optional[str]] = field(default_factory=list)
+    asns: List[Optional[int]] = field(default_factory=list)
+    qty_countries: int = 0
+    qty_asns: int = 0
 
 
+@cached("geolite")
 def get_geolite_db_files(
     type: Optional[GeoLiteDbType] = None,
 ) -> Union[Dict[GeoLiteDbType, str], str]:
@@ -70,19 +77,30 @@ def get_asn(ip_address: str) -> Optional[int]:
 
 
 def get_url_geo_features(url: str) -> URLGeoFeatures:
-    """Return information about the given URL."""
-    ip_address = get_ip_from_url(url)
-    country_code = get_country(ip_address)
-    asn = get_asn(ip_address)
+    """
+    Return information about the given URL.
+
+    Every IPv4 and IPv6 address of the host is looked up, ``country_code``
+    and ``asn`` are those of the first address. The addresses come from the
+    DNS cache shared with ``get_dns_features``.
+    """
+    ip_addresses = get_host_addresses(parse_url(url).host)
+    country_codes = [get_country(ip_address) for ip_address in ip_addresses]
+    asns = [get_asn(ip_address) for ip_address in ip_addresses]
 
     return URLGeoFeatures(
         url=url,
-        country_code=country_code,
-        asn=asn,
+        country_code=country_codes[0] if country_codes else None,
+        asn=asns[0] if asns else None,
+        ip_addresses=ip_addresses,
+        country_codes=country_codes,
+        asns=asns,
+        qty_countries=len({code for code in country_codes if code}),
+        qty_asns=len({asn for asn in asns if asn}),
     )
 
 
-@cache
+@cached("url_geo")
 def get_url_geo_features_cached(url: str) -> URLGeoFeatures:
     """Get the geo features for the given URL."""
     return get_url_geo_features(url)
@@ -1,24 +1,120 @@
+import logging
 import re
+import sys
+import threading
+import time
+from collections import Counter
 from dataclasses import dataclass
-from functools import cache
-from typing import Optional
-from urllib.parse import parse_qs, urlparse
-
-import tldextract
-
-from web2vec.utils import entropy, fetch_file_from_url_and_read, valid_ip
-
-shortening_services = (
-    r"bit\.ly|goo\.gl|shorte\.st|go2l\.ink|x\.co|ow\.ly|t\.co|tinyurl|tr\.im|is\.gd|cli\.gs|"
-    r"yfrog\.com|migre\.me|ff\.im|tiny\.cc|url4\.eu|twit\.ac|su\.pr|twurl\.nl|snipurl\.com|"
-    r"short\.to|BudURL\.com|ping\.fm|post\.ly|Just\.as|bkite\.com|snipr\.com|fic\.kr|loopt\.us|"
-    r"doiop\.com|short\.ie|kl\.am|wp\.me|rubyurl\.com|om\.ly|to\.ly|bit\.do|t\.co|lnkd\.in|db\.tt|"
-    r"qr\.ae|adf\.ly|goo\.gl|bitly\.com|cur\.lv|tinyurl\.com|ow\.ly|bit\.ly|ity\.im|q\.gs|is\.gd|"
-    r"po\.st|bc\.vc|twitthis\.com|u\.to|j\.mp|buzurl\.com|cutt\.us|u\.bb|yourls\.org|x\.co|"
-    r"prettylinkpro\.com|scrnch\.me|filoops\.info|vzturl\.com|qr\.net|1url\.com|tweez\.me|v\.gd|"
-    r"tr\.im|link\.zip\.net"
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from web2vec import public_suffix
+from web2vec.caching import cached
+from web2vec.utils import (
+    ParsedURL,
+    entropy_from_histogram,
+    fetch_file_from_url_and_read,
+    parse_url,
+    valid_ip,
 )
 
+logger = logging.getLogger(__name__)
+
+SHORTENING_SERVICES_URL = (
+    "https://raw.githubusercontent.com/korlabsio/urlshortener/main/names.txt"
+)
+
+# Bundled fallback used offline and merged with the downloaded list
+BUNDLED_SHORTENING_SERVICES = frozenset(
+    (
+        "1url.com",
+        "adf.ly",
+        "bc.vc",
+        "bit.do",
+        "bit.ly",
+        "bitly.com",
+        "bkite.com",
+        "budurl.com",
+        "buzurl.com",
+        "cli.gs",
+        "cur.lv",
+        "cutt.us",
+        "db.tt",
+        "doiop.com",
+        "ff.im",
+        "fic.kr",
+        "filoops.info",
+        "go2l.ink",
+        "goo.gl",
+        "is.gd",
+        "ity.im",
+        "j.mp",
+        "just.as",
+        "kl.am",
+        "link.zip.net",
+        "lnkd.in",
+        "loopt.us",
+        "migre.me",
+        "om.ly",
+        "ow.ly",
+        "ping.fm",
+        "po.st",
+        "post.ly",
+        "prettylinkpro.com",
+        "q.gs",
+        "qr.ae",
+        "qr.net",
+        "rubyurl.com",
+        "scrnch.me",
+        "short.ie",
+        "short.to",
+        "shorte.st",
+        "snipr.com",
+        "snipurl.com",
+        "su.pr",
+        "t.co",
+        "tiny.cc",
+        "tinyurl.com",
+        "to.ly",
+        "tr.im",
+        "tweez.me",
+        "twit.ac",
+        "twitthis.com",
+        "twurl.nl",
+        "u.bb",
+        "u.to",
+        "url4.eu",
+        "v.gd",
+        "vzturl.com",
+        "wp.me",
+        "x.co",
+        "yfrog.com",
+        "yourls.org",
+    )
+)
+
+
+LEXICAL_CHARS = {
+    "dot": ".",
+    "dash": "-",
+    "underscore": "_",
+    "slash": "/",
+    "question": "?",
+    "equals": "=",
+    "at": "@",
+    "ampersand": "&",
+    "exclamation": "!",
+    "space": " ",
+    "tilde": "~",
+    "comma": ",",
+    "plus": "+",
+    "asterisk": "*",
+    "hash": "#",
+    "dollar": "$",
+    "percent": "%",
+}
+
 
 # Helper functions
 def count_char(character: str, string: str) -> int:
@@ -31,35 +127,136 @@ def count_vowels(string: str) -> int:
     return len(re.findall(r"[aeiouAEIOU]", string))
 
 
+def char_histogram(string: str) -> Counter:
+    """Count every character of the string in a single pass."""
+    return Counter(string)
+
+
+@lru_cache(maxsize=None)
+def _count_field_names(component: str) -> Tuple[Tuple[str, str], ...]:
+    # Interned names keep keyword matching in the dataclass call fast
+    return tuple(
+        (sys.intern(f"count_{name}_{component}"), char)
+        for name, char in LEXICAL_CHARS.items()
+    )
+
+
+def lexical_char_counts(histogram: Counter, component: str) -> Dict[str, int]:
+    """Return the ``count_<char>_<component>`` features from a histogram."""
+    get = histogram.get
+    return {
+        field_name: get(char, 0) for field_name, char in _count_field_names(component)
+    }
+
+
+def histogram_vowels(histogram: Counter) -> int:
+    """Count the vowels recorded in the histogram."""
+    get = histogram.get
+    return sum([get(vowel, 0) for vowel in "aeiouAEIOU"])
+
+
+def _histogram_digit_counts(histogram: Counter) -> List[int]:
+    if not "".join(histogram).isascii():
+        return [count for char, count in histogram.items() if char.isdigit()]
+    get = histogram.get
+    return [get(digit, 0) for digit in "0123456789"]
+
+
+def histogram_numeric_ratio(histogram: Counter, length: int) -> float:
+    """Return numeric chars percentage in range 0..100 from a histogram."""
+    if not length:
+        return 0.0
+    return (sum(_histogram_digit_counts(histogram)) / length) * 100.0
+
+
+def histogram_repeated_digits(histogram: Counter, value: str) -> bool:
+    """Check repeated digits, skipping the regex when no digit occurs 3 times."""
+    if max(_histogram_digit_counts(histogram), default=0) < 3:
+        return False
+    return has_repeated_digits(value)
+
+
 def contains_keywords(string: str, keywords: list) -> bool:
     """Check if the string contains any of the keywords."""
     return any(keyword in string.lower() for keyword in keywords)
 
 
-def tld_count(string: str) -> int:
+def tld_count(string: str, tld: Optional[str] = None) -> int:
     """Count the number of times the TLD appears in the URL."""
-    extracted = tldextract.extract(string)
-    tld = extracted.suffix
-    return string.lower().count(f".{tld}") if tld else 0
+    if tld is None:
+        tld = public_suffix.extract(string).suffix
+    return string.lower().count(f".{tld.lower()}") if tld else 0
 
 
 def url_depth(url):
     """Calculate the depth of the URL."""
-    return len([segment for segment in urlparse(url).path.split("/") if segment])
+    return path_depth(parse_url(url).path)
+
+
+def path_depth(path: str) -> int:
+    """Count the non-empty segments of the path."""
+    return len([segment for segment in path.split("/") if segment])
+
+
+class ShorteningServiceMatcher:
+    """Host suffix index of URL shortening services, loaded once per refresh."""
+
+    def __init__(
+        self,
+        source_url: str = SHORTENING_SERVICES_URL,
+        refresh_interval: int = 86400,
+    ):
+        self.source_url = source_url
+        self.refresh_interval = refresh_interval
+        self._hosts: FrozenSet[str] = frozenset()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> FrozenSet[str]:
+        try:
+            text = fetch_file_from_url_and_read(self.source_url)
+        except Exception as e:  # noqa
+            logger.warning(f"Using bundled URL shortener list: {e}")
+            return BUNDLED_SHORTENING_SERVICES
+        downloaded = {
+            line.strip().lower().rstrip(".")
+            for line in text.splitlines()
+            if line.strip()
+        }
+        return BUNDLED_SHORTENING_SERVICES | downloaded
+
+    def hosts(self) -> FrozenSet[str]:
+        """Return the shortener hosts, reloading them when the list is stale."""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at >= self.refresh_interval:
+            with self._lock:
+                if (
+                    self._loaded_at is None
+                    or now - self._loaded_at >= self.refresh_interval
+                ):
+                    self._hosts = self._load()
+                    self._loaded_at = now
+        return self._hosts
+
+    def match(self, hostname: Optional[str]) -> Optional[str]:
+        """Return the shortening service the hostname belongs to, if any."""
+        if not hostname:
+            return None
+        hosts = self.hosts()
+        labels = hostname.lower().rstrip(".").split(".")
+        for index in range(len(labels)):
+            candidate = ".".join(labels[index:])
+            if candidate in hosts:
+                return candidate
+        return None
+
+
+shortening_service_matcher = ShorteningServiceMatcher()
 
 
 def uses_shortening_service(url) -> Optional[str]:
     """Check if the URL uses a shortening service."""
-    shortening_services_text = fetch_file_from_url_and_read(
-        "https://raw.githubusercontent.com/korlabsio/urlshortener/main/names.txt"
-    )
-    shortening_services_list = shortening_services_text.split("\n")
-    shortening_services_list = [
-        service.strip() for service in shortening_services_list if service.strip()
-    ]
-    services_lookup = "|".join(map(re.escape, shortening_services_list))
-
-    return re.search(services_lookup, url)
+    return shortening_service_matcher.match(parse_url(url).host)
 
 
 def has_repeated_digits(value: str) -> bool:
@@ -81,7 +278,7 @@ def token_count(value: str) -> int:
     return len(tokens)
 
 
-@dataclass
+@dataclass(slots=True)
 class URLLexicalFeatures:
     count_dot_url: int
     count_dash_url: int
@@ -188,121 +385,53 @@ class URLLexicalFeatures:
     server_client_domain: bool = False
 
 
-def get_url_lexical_features(url: str) -> URLLexicalFeatures:
-    """Get the lexical features for the given URL."""
-    parsed_url = urlparse(url)
-    domain = parsed_url.netloc
-    hostname = parsed_url.hostname or domain
-    path = parsed_url.path
-    query = parsed_url.query
-    directory = "/".join(path.split("/")[:-1])
-    subdomain = tldextract.extract(hostname).subdomain
+POPULAR_TLDS = frozenset({"com", "org", "net", "edu", "gov", "io", "co", "pl"})
+SUSPICIOUS_EXTENSIONS = (
+    ".exe",
+    ".scr",
+    ".bat",
+    ".cmd",
+    ".js",
+    ".jar",
+    ".vbs",
+    ".ps1",
+    ".zip",
+    ".rar",
+)
+
+
+def url_lexical_context_features(
+    parsed: ParsedURL,
+    url_histogram: Optional[Counter] = None,
+    domain_histogram: Optional[Counter] = None,
+) -> Dict[str, Any]:
+    """Get the lexical features that are not plain character counts."""
+    url, domain, query = parsed.url, parsed.netloc, parsed.query
+    url_histogram = url_histogram if url_histogram is not None else Counter(url)
+    domain_histogram = (
+        domain_histogram if domain_histogram is not None else Counter(domain)
+    )
+    subdomain = parsed.subdomain
     subdomain_parts = [part for part in subdomain.split(".") if part]
     average_subdomain_length = (
         sum(len(part) for part in subdomain_parts) / len(subdomain_parts)
         if subdomain_parts
         else 0.0
     )
-    url_shortening_match = uses_shortening_service(url)
-    tld_suffix = tldextract.extract(hostname).suffix.lower()
-    popular_tlds = {"com", "org", "net", "edu", "gov", "io", "co", "pl"}
-    suspicious_extensions = {
-        ".exe",
-        ".scr",
-        ".bat",
-        ".cmd",
-        ".js",
-        ".jar",
-        ".vbs",
-        ".ps1",
-        ".zip",
-        ".rar",
-    }
+    url_shortening_match = shortening_service_matcher.match(parsed.host)
 
-    features = URLLexicalFeatures(
-        count_dot_url=count_char(".", url),
-        count_dash_url=count_char("-", url),
-        count_underscore_url=count_char("_", url),
-        count_slash_url=count_char("/", url),
-        count_question_url=count_char("?", url),
-        count_equals_url=count_char("=", url),
-        count_at_url=count_char("@", url),
-        count_ampersand_url=count_char("&", url),
-        count_exclamation_url=count_char("!", url),
-        count_space_url=count_char(" ", url),
-        count_tilde_url=count_char("~", url),
-        count_comma_url=count_char(",", url),
-        count_plus_url=count_char("+", url),
-        count_asterisk_url=count_char("*", url),
-        count_hash_url=count_char("#", url),
-        count_dollar_url=count_char("$", url),
-        count_percent_url=count_char("%", url),
-        url_length=len(url),
-        tld_amount_url=tld_count(url),
-        count_dot_domain=count_char(".", domain),
-        count_dash_domain=count_char("-", domain),
-        count_underscore_domain=count_char("_", domain),
-        count_slash_domain=count_char("/", domain),
-        count_question_domain=count_char("?", domain),
-        count_equals_domain=count_char("=", domain),
-        count_at_domain=count_char("@", domain),
-        count_ampersand_domain=count_char("&", domain),
-        count_exclamation_domain=count_char("!", domain),
-        count_space_domain=count_char(" ", domain),
-        count_tilde_domain=count_char("~", domain),
-        count_comma_domain=count_char(",", domain),
-        count_plus_domain=count_char("+", domain),
-        count_asterisk_domain=count_char("*", domain),
-        count_hash_domain=count_char("#", domain),
-        count_dollar_domain=count_char("$", domain),
-        count_percent_domain=count_char("%", domain),
-        domain_length=len(domain),
-        vowel_count_domain=count_vowels(domain),
+    return dict(
+        tld_amount_url=tld_count(url, parsed.suffix),
         domain_in_ip_format=domain.replace(".", "").isdigit(),
         domain_contains_keywords=contains_keywords(domain, ["server", "client"]),
-        count_dot_directory=count_char(".", directory),
-        count_dash_directory=count_char("-", directory),
-        count_underscore_directory=count_char("_", directory),
-        count_slash_directory=count_char("/", directory),
-        count_question_directory=count_char("?", directory),
-        count_equals_directory=count_char("=", directory),
-        count_at_directory=count_char("@", directory),
-        count_ampersand_directory=count_char("&", directory),
-        count_exclamation_directory=count_char("!", directory),
-        count_space_directory=count_char(" ", directory),
-        count_tilde_directory=count_char("~", directory),
-        count_comma_directory=count_char(",", directory),
-        count_plus_directory=count_char("+", directory),
-        count_asterisk_directory=count_char("*", directory),
-        count_hash_directory=count_char("#", directory),
-        count_dollar_directory=count_char("$", directory),
-        count_percent_directory=count_char("%", directory),
-        directory_length=len(directory),
-        count_dot_parameters=count_char(".", query),
-        count_dash_parameters=count_char("-", query),
-        count_underscore_parameters=count_char("_", query),
-        count_slash_parameters=count_char("/", query),
-        count_question_parameters=count_char("?", query),
-        count_equals_parameters=count_char("=", query),
-        count_at_parameters=count_char("@", query),
-        count_ampersand_parameters=count_char("&", query),
-        count_exclamation_parameters=count_char("!", query),
-        count_space_parameters=count_char(" ", query),
-        count_tilde_parameters=count_char("~", query),
-        count_comma_parameters=count_char(",", query),
-        count_plus_parameters=count_char("+", query),
-        count_asterisk_parameters=count_char("*", query),
-        count_hash_parameters=count_char("#", query),
-        count_dollar_parameters=count_char("$", query),
-        count_percent_parameters=count_char("%", query),
-        parameters_length=len(query),
         tld_presence_in_arguments=tld_count(query),
         number_of_parameters=len(parse_qs(query)),
-        email_present_in_url=bool(
-            re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", url)
+        email_present_in_url=(
+            "@" in url_histogram
+            and bool(re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", url))
         ),
-        domain_entropy=entropy(domain),
-        url_depth=url_depth(url),
+        domain_entropy=entropy_from_histogram(domain_histogram, len(domain)),
+        url_depth=path_depth(parsed.path),
         uses_shortening_service=url_shortening_match,
         is_ip=valid_ip(domain),
         number_of_subdomains=len(subdomain_parts),
@@ -311,28 +440,57 @@ def get_url_lexical_features(url: str) -> URLLexicalFeatures:
         having_underscore_in_subdomain="_" in subdomain,
         having_digit_in_subdomain=any(char.isdigit() for char in subdomain),
         having_special_char_in_subdomain=bool(re.search(r"[^A-Za-z0-9.-]", subdomain)),
-        having_fragment=bool(parsed_url.fragment),
-        having_anchor=bool(parsed_url.fragment),
-        entropy_of_url=entropy(url),
-        repeated_digits_url=has_repeated_digits(url),
-        repeated_digits_domain=has_repeated_digits(hostname),
-        repeated_digits_directory=has_repeated_digits(directory),
+        having_fragment=bool(parsed.fragment),
+        having_anchor=bool(parsed.fragment),
+        entropy_of_url=entropy_from_histogram(url_histogram, len(url)),
+        repeated_digits_url=histogram_repeated_digits(url_histogram, url),
+        repeated_digits_domain=has_repeated_digits(parsed.host or domain),
+        repeated_digits_directory=has_repeated_digits(parsed.directory),
         repeated_digits_parameters=has_repeated_digits(query),
         token_count=token_count(url),
         subdomain_count=len(subdomain_parts),
-        tld_popularity=1 if tld_suffix in popular_tlds else 0,
-        suspicious_file_extension=any(
-            path.lower().endswith(ext) for ext in suspicious_extensions
-        ),
-        percentage_numeric_chars=numeric_chars_ratio(url),
+        tld_popularity=1 if parsed.suffix in POPULAR_TLDS else 0,
+        suspicious_file_extension=parsed.path.lower().endswith(SUSPICIOUS_EXTENSIONS),
         url_shortened=url_shortening_match is not None,
         server_client_domain=contains_keywords(domain, ["server", "client"]),
     )
 
-    return features
+
+def get_url_lexical_features(
+    url: str, parsed: Optional[ParsedURL] = None
+) -> URLLexicalFeatures:
+    """Get the lexical features for the given URL.
+
+    :param url: URL to analyse.
+    :param parsed: Already parsed URL, defaults to the shared ``parse_url``.
+    """
+    parsed = parsed or parse_url(url)
+    domain, directory, query = parsed.netloc, parsed.directory, parsed.query
+    url_histogram = char_histogram(url)
+    domain_histogram = char_histogram(domain)
+    directory_histogram = char_histogram(directory)
+    query_histogram = char_histogram(query)
+
+    return URLLexicalFeatures(
+        **lexical_char_counts(url_histogram, "url"),
+        **lexical_char_counts(domain_histogram, "domain"),
+        **lexical_char_counts(directory_histogram, "directory"),
+        **lexical_char_counts(query_histogram, "parameters"),
+        url_length=len(url),
+        domain_length=len(domain),
+        directory_length=len(directory),
+        parameters_length=len(query),
+        vowel_count_domain=histogram_vowels(domain_histogram),
+        percentage_numeric_chars=histogram_numeric_ratio(url_histogram, len(url)),
+        **url_lexical_context_features(
+            parsed,
+            url_histogram=url_histogram,
+            domain_histogram=domain_histogram,
+        ),
+    )
 
 
-@cache
+@cached("url_lexical")
 def get_url_lexical_features_cached(url: str) -> URLLexicalFeatures:
     """Get the lexical features for the given URL."""
     return get_url_lexical_features(url)
@@ -0,0 +1,230 @@
+import zlib
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix, vstack
+
+from web2vec.utils import length_sorted_groups, parse_url
+
+DEFAULT_N_FEATURES = 2**18
+DEFAULT_NGRAM_RANGE = (3, 5)
+NGRAM_COMPONENTS = ("url", "host", "path")
+# Boundary markers let n-grams tell prefixes and suffixes apart
+_START, _END = 0x02, 0x03
+_BASE = np.uint64(0x100000001B3)
+# Rows hashed together, sorted by length so padding stays small, and
+# bounded by their padded size so long URLs form groups of their own
+_GROUP_ROWS = 512
+_GROUP_CELLS = 1 << 20
+
+
+def _namespace_seed(namespace: str, size: int) -> np.uint64:
+    return np.uint64(zlib.crc32(f"{namespace}:{size}".encode("utf-8")))
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Scramble the 64 bit n-gram hashes with the splitmix64 finalizer."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _hash_texts(
+    texts: List[str],
+    namespace: str,
+    sizes: range,
+    n_features: int,
+    alternate_sign: bool,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield row ids, columns and signs of the hashed n-grams of the texts.
+
+    Texts are turned into code point matrices and every n-gram is hashed
+    with a polynomial rolling hash in NumPy, without per n-gram Python work.
+    """
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    for group in length_sorted_groups(lengths, _GROUP_ROWS, _GROUP_CELLS):
+        group_lengths = lengths[group]
+        array = np.array([texts[row] for row in group], dtype=str)
+        code_points = array.view(np.uint32).reshape(len(group), -1)
+        width = code_points.shape[1] + 2
+        padded = np.zeros((len(group), width), dtype=np.uint64)
+        padded[:, 0] = _START
+        padded[:, 1 : width - 1] = code_points
+        padded[np.arange(len(group)), group_lengths + 1] = _END
+
+        for size in sizes:
+            count = width - size + 1
+            if count <= 0:
+                continue
+            hashes = np.zeros((len(group), count), dtype=np.uint64)
+            for offset in range(size):
+                hashes = hashes * _BASE + padded[:, offset : offset + count]
+            valid = np.arange(count)[None, :] < (group_lengths + 3 - size)[:, None]
+            rows, _ = np.nonzero(valid)
+            mixed = _mix(hashes[valid] ^ _namespace_seed(namespace, size))
+            columns = (mixed % np.uint64(n_features)).astype(np.int64)
+            if alternate_sign:
+                signs = np.where(mixed >> np.uint64(63), -1.0, 1.0)
+            else:
+                signs = np.ones(len(columns))
+            yield group[rows], columns, signs
+
+
+def _hash_chunk(
+    components: Dict[str, List[str]],
+    size: int,
+    n_features: int,
+    ngram_range: Tuple[int, int],
+    lowercase: bool,
+    alternate_sign: bool,
+    norm: Optional[str],
+    dtype,
+) -> csr_matrix:
+    """Hash the character n-grams of every URL component into CSR rows.
+
+    Each component is hashed in its own namespace, so the same n-gram in the
+    host and in the path lands in different columns.
+    """
+    sizes = range(ngram_range[0], ngram_range[1] + 1)
+    rows, columns, signs = [], [], []
+    for namespace in NGRAM_COMPONENTS:
+        texts = components[namespace]
+        if lowercase:
+            texts = [text.lower() for text in texts]
+        for row_ids, column_ids, values in _hash_texts(
+            texts, namespace, sizes, n_features, alternate_sign
+        ):
+            rows.append(row_ids)
+            columns.append(column_ids)
+            signs.append(values)
+
+    if not rows:
+        return csr_matrix((size, n_features), dtype=dtype)
+    matrix = coo_matrix(
+        (np.concatenate(signs), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(size, n_features),
+    ).tocsr()
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+
+    if norm is not None:
+        if norm == "l2":
+            row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)))
+        else:
+            row_norms = np.asarray(abs(matrix).sum(axis=1))
+        row_norms = row_norms.ravel()
+        row_norms[row_norms == 0] = 1.0
+        matrix.data /= np.repeat(row_norms, np.diff(matrix.indptr))
+    return matrix.astype(dtype)
+
+
+def _check_options(n_features: int, ngram_range: Tuple[int, int], norm) -> None:
+    if not 0 < n_features <= 2**31:
+        raise ValueError(f"n_features must be in 1..2**31, got {n_features}")
+    if not 0 < ngram_range[0] <= ngram_range[1]:
+        raise ValueError(f"Invalid ngram_range {ngram_range}")
+    if norm not in (None, "l1", "l2"):
+        raise ValueError(f"Unsupported norm {norm!r}, use 'l1', 'l2' or None")
+
+
+def get_url_ngram_features(
+    url: str,
+    n_features: int = DEFAULT_N_FEATURES,
+    ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE,
+    lowercase: bool = True,
+    alternate_sign: bool = True,
+    norm: Optional[str] = "l2",
+    dtype=np.float32,
+) -> csr_matrix:
+    """
+    Get the hashed character n-gram vector of the URL, host and path.
+
+    The hashing trick maps every n-gram to a column with a stable 64 bit
+    hash, so no vocabulary has to be fitted and vectors of different runs
+    and processes are compatible.
+
+    :param url: URL to embed.
+    :param n_features: Number of columns of the vector.
+    :param ngram_range: Smallest and largest n-gram length.
+    :param lowercase: Lowercase the components before hashing.
+    :param alternate_sign: Use the hash to pick the sign of each n-gram, so
+        collisions cancel out in expectation.
+    :param norm: Row normalization, ``l2``, ``l1`` or None.
+    :param dtype: Data type of the values.
+    :return: CSR matrix with a single row.
+    """
+    _check_options(n_features, ngram_range, norm)
+    parsed = parse_url(url)
+    components = {"url": [url], "host": [parsed.host], "path": [parsed.path]}
+    return _hash_chunk(
+        components, 1, n_features, ngram_range, lowercase, alternate_sign, norm, dtype
+    )
+
+
+def _chunks(urls: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(urls)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def get_url_ngram_features_batch(
+    urls: Iterable[str],
+    n_features: int = DEFAULT_N_FEATURES,
+    ngram_range: Tuple[int, int] = DEFAULT_NGRAM_RANGE,
+    lowercase: bool = True,
+    alternate_sign: bool = True,
+    norm: Optional[str] = "l2",
+    dtype=np.float32,
+    chunk_size: int = 10000,
+) -> csr_matrix:
+    """
+    Get the hashed character n-gram vectors of many URLs as a CSR matrix.
+
+    URLs are consumed lazily in chunks, each chunk is converted to a CSR
+    block right away, so besides the result only one chunk is held in
+    memory. Rows equal ``get_url_ngram_features`` with the same options.
+
+    :param urls: Iterable of URLs, may be a generator.
+    :param chunk_size: URLs converted per block.
+    :return: CSR matrix with one row per URL.
+    """
+    _check_options(n_features, ngram_range, norm)
+    blocks = []
+    for chunk in _chunks(urls, chunk_size):
+        # Parsed directly, a batch would only evict the shared URL cache
+        parsed_urls = [urlparse(url) for url in chunk]
+        components = {
+            "url": chunk,
+            "host": [parsed.hostname or "" for parsed in parsed_urls],
+            "path": [parsed.path for parsed in parsed_urls],
+        }
+        blocks.append(
+            _hash_chunk(
+                components,
+                len(chunk),
+                n_features,
+                ngram_range,
+                lowercase,
+                alternate_sign,
+                norm,
+                dtype,
+            )
+        )
+    if not blocks:
+        return csr_matrix((0, n_features), dtype=dtype)
+    return vstack(blocks, format="csr")
+
+
+if __name__ == "__main__":
+    import time
+
+    vector = get_url_ngram_features("https://login.example.com/account/verify")
+    print(vector.shape, vector.nnz)
+
+    sample = (f"https://host{i % 1000}.example.com/p/{i}?id={i}" for i in range(100000))
+    started = time.perf_counter()
+    matrix = get_url_ngram_features_batch(sample)
+    print(matrix.shape, matrix.nnz, f"{time.perf_counter() - started:.2f}s")
@@ -1,11 +1,12 @@
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from functools import cache
 from typing import Dict, List, Optional
 
 import whois
 
+from web2vec.caching import cached
+
 logger = logging.getLogger(__name__)
 
 WHOIS_DATE_FORMATS = (
@@ -22,7 +23,7 @@ WHOIS_DATE_FORMATS = (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class WhoisFeatures:
     domain_name: List[str]
     registrar: Optional[str]
@@ -174,7 +175,7 @@ def get_whois_features(domain: str) -> Optional[WhoisFeatures]:
         return None
 
 
-@cache
+@cached("whois")
 def get_whois_features_cached(domain: str) -> WhoisFeatures:
     """Cache the WHOIS data for a given domain."""
     return get_whois_features(domain)
@@ -0,0 +1,61 @@
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import tldextract
+from tldextract.tldextract import ExtractResult
+
+from web2vec.config import config
+
+logger = logging.getLogger(__name__)
+
+_extractor: Optional[tldextract.TLDExtract] = None
+_extractor_lock = threading.Lock()
+
+
+def _build_extractor() -> tldextract.TLDExtract:
+    """Build an extractor that never fetches the suffix list over the network."""
+    path = config.public_suffix_list_path
+    if path:
+        # Read through requests-file, falls back to the snapshot when unreadable
+        suffix_list_urls = (Path(path).resolve().as_uri(),)
+        logger.info(f"Loading the public suffix list from {path}")
+    else:
+        suffix_list_urls = ()
+    extractor = tldextract.TLDExtract(
+        cache_dir=None,
+        suffix_list_urls=suffix_list_urls,
+        fallback_to_snapshot=True,
+        include_psl_private_domains=config.public_suffix_include_private,
+    )
+    # Parse the list into the suffix trie now instead of on the first lookup
+    extractor("example.com")
+    return extractor
+
+
+def get_suffix_extractor() -> tldextract.TLDExtract:
+    """
+    Return the shared public suffix extractor, built once per process.
+
+    The list is read from ``config.public_suffix_list_path`` when set,
+    otherwise from the snapshot bundled with tldextract, and is never
+    downloaded or written to a disk cache.
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = _build_extractor()
+        return _extractor
+
+
+def reset_suffix_extractor() -> None:
+    """Drop the shared extractor, the next lookup reloads the configured list."""
+    global _extractor
+    with _extractor_lock:
+        _extractor = None
+
+
+def extract(value: str) -> ExtractResult:
+    """Split a URL or host into subdomain, domain and public suffix."""
+    return get_suffix_extractor()(value)
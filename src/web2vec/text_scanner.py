@@ -0,0 +1,201 @@
+import heapq
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ScanMatch:
+    signal: str
+    start: int
+    end: int
+    text: str
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Build a regex whose alternation is factored as a trie of the words.
+
+    The regex engine then walks the trie once per position instead of trying
+    every word, which keeps the scan cost flat as the word list grows.
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        is_terminal = "" in node
+        children = sorted(key for key in node if key)
+        if not children:
+            return ""
+        alternatives = []
+        single_chars = []
+        for char in children:
+            sub = build(node[char])
+            if sub:
+                alternatives.append(re.escape(char) + sub)
+            else:
+                single_chars.append(char)
+        if single_chars:
+            if len(single_chars) == 1:
+                alternatives.append(re.escape(single_chars[0]))
+            else:
+                alternatives.append(
+                    "[" + "".join(re.escape(char) for char in single_chars) + "]"
+                )
+        if len(alternatives) == 1 and not is_terminal:
+            return alternatives[0]
+        result = "(?:" + "|".join(alternatives) + ")"
+        return result + "?" if is_terminal else result
+
+    return build(trie)
+
+
+class MultiPatternScanner:
+    """
+    Scan a text for many keyword lists and regexes.
+
+    Every signal is either a list of literal keywords or a regex. Keyword
+    lists are compiled into a trie regex each. Case-insensitive scanners
+    lowercase the text once and match the tries case-sensitively, which lets
+    the regex engine skip every position that cannot start a keyword. Regex
+    signals keep their own compiled pattern. Matches of different signals
+    may overlap, and so may keywords of the same signal.
+    """
+
+    def __init__(
+        self,
+        keywords: Optional[Dict[str, Iterable[str]]] = None,
+        regexes: Optional[Dict[str, str]] = None,
+        flags: int = re.IGNORECASE,
+    ):
+        self.flags = flags
+        self._literals: Dict[str, Tuple[str, ...]] = {}
+        self._prefixes: Dict[str, Dict[str, List[str]]] = {}
+        sources: Dict[str, str] = {}
+        for signal, words in (keywords or {}).items():
+            normalized = tuple(
+                dict.fromkeys(word.lower() if flags & re.I else word for word in words)
+            )
+            normalized = tuple(word for word in normalized if word)
+            if normalized:
+                self._literals[signal] = normalized
+                self._prefixes[signal] = {
+                    word: [other for other in normalized if word.startswith(other)]
+                    for word in normalized
+                }
+                sources[signal] = _trie_regex(normalized)
+        for signal, pattern in (regexes or {}).items():
+            if signal in sources:
+                raise ValueError(f"Duplicate scanner signal {signal!r}")
+            sources[signal] = pattern
+
+        self.signals = tuple(sources)
+        self._patterns = {
+            name: re.compile(source, flags) for name, source in sources.items()
+        }
+        self._folded_patterns = {
+            name: re.compile(sources[name], flags & ~re.I) for name in self._literals
+        }
+
+    def pattern(self, signal: str) -> re.Pattern:
+        """Return the compiled pattern of a single signal."""
+        return self._patterns[signal]
+
+    def _keyword_haystack(self, text: str) -> Tuple[str, Dict[str, re.Pattern]]:
+        """Return the text to match keyword tries against and their patterns."""
+        if self.flags & re.I:
+            folded = text.lower()
+            # Lowercasing changes the length of a few characters, offsets in
+            # the folded text would then not map back to the text.
+            if len(folded) == len(text):
+                return folded, self._folded_patterns
+        return text, self._patterns
+
+    def _signal_matches(
+        self,
+        signal: str,
+        text: str,
+        keyword_haystack: Optional[Tuple[str, Dict[str, re.Pattern]]],
+    ) -> Iterator[ScanMatch]:
+        """Yield the matches of one signal in text order."""
+        if keyword_haystack is None or signal not in self._literals:
+            for found in self._patterns[signal].finditer(text):
+                if found.end() > found.start():
+                    yield ScanMatch(signal, found.start(), found.end(), found.group(0))
+            return
+
+        haystack, patterns = keyword_haystack
+        pattern = patterns[signal]
+        for found in pattern.finditer(haystack):
+            start, end = found.span()
+            yield ScanMatch(signal, start, end, text[start:end])
+            # finditer resumes after the match, so keywords starting inside it
+            # are matched explicitly.
+            for position in range(start + 1, end):
+                inner = pattern.match(haystack, position)
+                if inner:
+                    yield ScanMatch(
+                        signal, position, inner.end(), text[position : inner.end()]
+                    )
+
+    def _selected(
+        self, text: str, signals: Optional[Iterable[str]]
+    ) -> Tuple[List[str], Optional[Tuple[str, Dict[str, re.Pattern]]]]:
+        """Return the selected signals and the keyword haystack they need."""
+        wanted = set(self.signals if signals is None else signals)
+        selected = [signal for signal in self.signals if signal in wanted]
+        needs_keywords = any(signal in self._literals for signal in selected)
+        return selected, self._keyword_haystack(text) if needs_keywords else None
+
+    def finditer(
+        self, text: str, signals: Optional[Iterable[str]] = None
+    ) -> Iterator[ScanMatch]:
+        """Yield every match of the selected signals in text order."""
+        if not text:
+            return
+        selected, keyword_haystack = self._selected(text, signals)
+        yield from heapq.merge(
+            *(
+                self._signal_matches(signal, text, keyword_haystack)
+                for signal in selected
+            ),
+            key=attrgetter("start"),
+        )
+
+    def scan(
+        self, text: str, signals: Optional[Iterable[str]] = None
+    ) -> Dict[str, ScanMatch]:
+        """Return the first match of every selected signal found in the text."""
+        found: Dict[str, ScanMatch] = {}
+        if not text:
+            return found
+        selected, keyword_haystack = self._selected(text, signals)
+        for signal in selected:
+            first = next(self._signal_matches(signal, text, keyword_haystack), None)
+            if first is not None:
+                found[signal] = first
+        return found
+
+    def matched_keywords(self, text: str, signal: str) -> List[str]:
+        """Return the distinct keywords of the signal present in the text."""
+        prefixes = self._prefixes.get(signal, {})
+        present = set()
+        for scan_match in self.finditer(text, signals=[signal]):
+            matched = scan_match.text.lower() if self.flags & re.I else scan_match.text
+            # The trie prefers the longest keyword, keywords that are prefixes
+            # of it match at the same position as well.
+            present.update(prefixes.get(matched, [matched]))
+        return [
+            literal for literal in self._literals.get(signal, ()) if literal in present
+        ]
+
+
+@lru_cache(maxsize=64)
+def get_keyword_scanner(keywords: Tuple[str, ...]) -> MultiPatternScanner:
+    """Return a compiled, shared scanner for the given keyword list."""
+    return MultiPatternScanner(keywords={"keywords": keywords})
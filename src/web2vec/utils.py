@@ -5,17 +5,26 @@ import math
 import os
 import re
 import socket
+import ssl
+import sys
+from collections import Counter
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Iterator, List, Mapping, Optional, Tuple
 from urllib.parse import urlparse
 
+import numpy as np
 import requests
 import urllib3
 
+from web2vec import dns_cache, public_suffix
 from web2vec.config import config
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+_LOG_2 = math.log(2.0)
 
 
 def valid_ip(host: str) -> bool:
@@ -27,26 +36,117 @@ def valid_ip(host: str) -> bool:
         return False
 
 
+@dataclass(frozen=True)
+class ParsedURL:
+    """URL components shared by the extractors, see ``parse_url``."""
+
+    url: str
+    scheme: str
+    netloc: str
+    host: str
+    registrable_domain: str
+    subdomain: str
+    suffix: str
+    path: str
+    directory: str
+    query: str
+    fragment: str
+
+    @classmethod
+    def from_url(cls, url: str) -> "ParsedURL":
+        """Parse the URL with urlparse and the public suffix list, once each."""
+        parsed_url = urlparse(url)
+        extracted = public_suffix.extract(url)
+        suffix = extracted.suffix.lower()
+        domain = extracted.domain.lower()
+        return cls(
+            url=url,
+            scheme=parsed_url.scheme,
+            netloc=parsed_url.netloc,
+            host=parsed_url.hostname or "",
+            registrable_domain=f"{domain}.{suffix}" if domain and suffix else "",
+            subdomain=extracted.subdomain.lower(),
+            suffix=suffix,
+            path=parsed_url.path,
+            directory="/".join(parsed_url.path.split("/")[:-1]),
+            query=parsed_url.query,
+            fragment=parsed_url.fragment,
+        )
+
+
+@lru_cache(maxsize=65536)
+def parse_url(url: str) -> ParsedURL:
+    """Return the shared, parsed form of the URL, built once per URL."""
+    return ParsedURL.from_url(url)
+
+
 def get_domain_from_url(url: str) -> str:
     """Extract the domain from the URL."""
-    parsed_url = urlparse(url)
-    return parsed_url.netloc
+    return parse_url(url).netloc
 
 
 def get_ip_from_domain(domain: str) -> str:
-    """Return the IP address for the given domain."""
+    """
+    Return the IP address for the given domain.
+
+    The A record is read from the shared DNS cache, names without one, such
+    as hosts file entries, fall back to the system resolver.
+    """
+    if valid_ip(domain):
+        return domain
+    try:
+        answer = dns_cache.resolve(domain, "A")
+    except Exception as e:  # noqa
+        logger.debug(f"Error resolving {domain} through the DNS cache: {e}")
+    else:
+        if answer.nxdomain:
+            raise socket.gaierror(socket.EAI_NONAME, f"{domain} does not exist")
+        if answer.values:
+            return answer.values[0]
     return socket.gethostbyname(domain)
 
 
 def get_ip_from_url(url: str) -> str:
     """Return the IP address for the given URL."""
-    return get_ip_from_domain(get_domain_from_url(url))
+    return get_ip_from_domain(parse_url(url).host)
 
 
 def entropy(string: str) -> float:
     """Calculate the entropy of the given string."""
-    prob = [float(string.count(c)) / len(string) for c in dict.fromkeys(list(string))]
-    return -sum([(p * math.log(p) / math.log(2.0)) for p in prob])
+    return entropy_from_histogram(Counter(string), len(string))
+
+
+def entropy_from_histogram(histogram: Mapping[str, int], length: int) -> float:
+    """Calculate the entropy from character counts of a string of given length."""
+    prob = [float(count) / length for count in histogram.values() if count]
+    return -sum([(p * math.log(p) / _LOG_2) for p in prob])
+
+
+def length_sorted_groups(
+    lengths: np.ndarray, max_rows: int, max_cells: int
+) -> Iterator[np.ndarray]:
+    """
+    Yield the indexes of the non-empty strings in groups sorted by length.
+
+    Strings converted to one padded matrix per group waste little padding.
+    A group holds at most ``max_rows`` rows and, padded to its longest
+    string, at most ``max_cells`` cells, so a very long string forms a group
+    of its own instead of widening the matrix of the short ones.
+
+    :param lengths: Length of every string.
+    :param max_rows: Largest number of rows in a group.
+    :param max_cells: Largest padded size of a group with more than one row.
+    """
+    order = np.argsort(lengths, kind="stable")
+    order = order[lengths[order] > 0]
+    start = 0
+    while start < len(order):
+        candidates = order[start : start + max_rows]
+        # Sorted by length, the padded size grows with every row added
+        padded = lengths[candidates] * np.arange(1, len(candidates) + 1)
+        group = candidates[: max(np.count_nonzero(padded <= max_cells), 1)]
+        start += len(group)
+        yield group
 
 
 def sanitize_filename(filename):
@@ -86,20 +186,110 @@ def get_file_path_for_url(url, directory=None, timeout=86400) -> str:
     return file_name
 
 
+def _certificate_der(certificate: Any) -> bytes:
+    encoding_der = getattr(ssl, "ENCODING_DER", None)
+    if encoding_der is not None:
+        return certificate.public_bytes(encoding_der)
+    # Certificate objects encode to PEM by default
+    return ssl.PEM_cert_to_DER_cert(certificate.public_bytes())
+
+
+def _unverified_chain(sock: ssl.SSLSocket) -> Optional[List[Any]]:
+    """Return the certificates the peer sent as the ssl module exposes them."""
+    if sys.version_info >= (3, 13):
+        return sock.get_unverified_chain()
+    # Before 3.13 the chain is only reachable through the private SSLObject,
+    # anything unexpected there yields no chain.
+    get_chain = getattr(getattr(sock, "_sslobj", None), "get_unverified_chain", None)
+    return get_chain() if callable(get_chain) else None
+
+
+def get_peer_certificate_chain(sock: Any) -> Tuple[bytes, ...]:
+    """
+    Return the DER certificates the peer sent, leaf first.
+
+    Uses the public ``SSLSocket.get_unverified_chain()`` on Python 3.13 and
+    later. Older versions fall back to the private ``_sslobj`` of the socket.
+    The chain is only returned when its first certificate is the peer
+    certificate, otherwise, or when it cannot be read, the result is empty.
+    """
+    if not isinstance(sock, ssl.SSLSocket):
+        return ()
+    try:
+        chain = tuple(
+            (
+                certificate
+                if isinstance(certificate, bytes)
+                else _certificate_der(certificate)
+            )
+            for certificate in _unverified_chain(sock) or ()
+        )
+        if chain and chain[0] == sock.getpeercert(binary_form=True):
+            return chain
+    except Exception as e:  # noqa
+        logger.debug(f"Could not read the peer certificate chain: {e}")
+    return ()
+
+
+def _response_socket(response: requests.Response) -> Optional[ssl.SSLSocket]:
+    """Return the TLS socket of a streamed response, None when unreachable."""
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    if sock is None:
+        # Connections closed by the server keep the socket only in the body
+        # reader, reached through private http.client and socket attributes.
+        body = getattr(getattr(response.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(body, "raw", None), "_sock", None)
+    return sock if isinstance(sock, ssl.SSLSocket) else None
+
+
+def _capture_tls(response: requests.Response, verified: bool) -> None:
+    """Keep the peer certificate and TLS parameters of the response connection."""
+    response.peer_certificate = None
+    response.peer_certificate_chain = ()
+    response.tls_version = None
+    response.tls_cipher = None
+    # requests fails on an untrusted certificate, without verification the
+    # trust of the certificate is unknown
+    response.tls_verified = True if verified else None
+    sock = _response_socket(response)
+    if sock is None:
+        return
+    try:
+        response.peer_certificate = sock.getpeercert(binary_form=True)
+        response.peer_certificate_chain = get_peer_certificate_chain(sock)
+        response.tls_version = sock.version()
+        response.tls_cipher = sock.cipher()
+    except Exception as e:  # noqa
+        logger.debug(f"Could not read the TLS session of {response.url}: {e}")
+
+
 def fetch_url(url, headers=None, ssl_verify=None):
-    """Fetch the given URL and return the response."""
+    """
+    Fetch the given URL and return the response.
+
+    For HTTPS the response also carries ``peer_certificate`` (DER bytes),
+    ``peer_certificate_chain``, ``tls_version`` and ``tls_cipher`` of the
+    connection that served it, and ``tls_verified``, True when the certificate
+    was verified and None when verification was off.
+    """
     verify = config.ssl_verify if ssl_verify is None else ssl_verify
     if not verify:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     headers = headers or {}
     headers = {**DEFAULT_HEADERS, **headers}
-    return requests.get(
+    response = requests.get(
         url,
         headers=headers,
         timeout=config.api_timeout,
         allow_redirects=True,
         verify=verify,
+        stream=True,
     )
+    if isinstance(response, requests.Response):
+        # The socket is only reachable until the body has been read
+        _capture_tls(response, bool(verify))
+        response.content  # noqa
+    return response
 
 
 def fetch_file_from_url(url, directory=None, headers=None, timeout=86400) -> str:
@@ -0,0 +1,12 @@
+import pytest
+
+from web2vec.config import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_persistent_caches(monkeypatch, tmp_path):
+    """Keep the persistent DNS and certificate caches of every test apart."""
+    monkeypatch.setattr(config, "dns_cache_path", str(tmp_path / "dns.sqlite3"))
+    monkeypatch.setattr(
+        config, "certificate_cache_path", str(tmp_path / "certificates.sqlite3")
+    )
@@ -0,0 +1,154 @@
+import random
+
+import pytest
+
+from web2vec.config import config
+from web2vec.extractors import brand_similarity_features as brands
+
+
+@pytest.fixture
+def index():
+    """Build a small brand index."""
+    return brands.BrandIndex(
+        ["paypal.com", "microsoft.com", "google.com", "apple.com", "amazon.com"]
+    )
+
+
+def test_levenshtein_distance_with_cutoff():
+    """Compute edit distances and stop early above the cutoff."""
+    assert brands.levenshtein_distance("kitten", "sitting") == 3
+    assert brands.levenshtein_distance("", "abc") == 3
+    assert brands.levenshtein_distance("kitten", "sitting", 1) == 2
+    assert brands.levenshtein_distance("paypal", "paypal", 0) == 0
+
+
+def test_normalize_homoglyphs_maps_lookalikes():
+    """Map digits, Cyrillic letters, punycode and letter pairs to ASCII."""
+    assert brands.normalize_homoglyphs("paypa1") == brands.normalize_homoglyphs(
+        "paypal"
+    )
+    assert brands.normalize_homoglyphs("аpple") == brands.normalize_homoglyphs("apple")
+    assert brands.normalize_homoglyphs("rnicrosoft") == brands.normalize_homoglyphs(
+        "microsoft"
+    )
+    assert brands.normalize_homoglyphs("xn--pple-43d") == brands.normalize_homoglyphs(
+        "apple"
+    )
+
+
+def test_brand_index_returns_nearest_brand(index):
+    """Return the nearest brand with raw and homoglyph-normalized distance."""
+    assert index.nearest("paypa1") == ("paypal.com", 1, 0)
+    assert index.nearest("gooogle") == ("google.com", 1, 1)
+    assert index.nearest("example") is None
+    assert index.nearest("amazon") == ("amazon.com", 0, 0)
+
+
+def test_brand_similarity_features_flag_typosquats(index):
+    """Flag lookalike domains and leave brand domains alone."""
+    features = brands.get_brand_similarity_features(
+        "https://login.rnicrosoft.com/verify", index=index
+    )
+    assert features.nearest_brand == "microsoft.com"
+    assert features.distance == 2
+    assert features.homoglyph_distance == 0
+    assert features.is_typosquat is True
+
+    own = brands.get_brand_similarity_features("google.com", index=index)
+    assert own.is_brand_domain is True
+    assert own.is_typosquat is False
+
+    assert brands.get_brand_similarity_features("192.0.2.1", index=index) == (
+        brands.BrandSimilarityFeatures(domain="192.0.2.1")
+    )
+
+
+def test_brand_similarity_features_keep_an_empty_index():
+    """Use an empty index passed in instead of the shared brand list."""
+    features = brands.get_brand_similarity_features(
+        "paypa1.com", index=brands.BrandIndex([])
+    )
+    assert features.nearest_brand is None
+    assert features.is_typosquat is False
+
+
+def test_brand_index_keeps_labels_with_the_same_normalized_form():
+    """Treat every reference domain as a brand, also with colliding labels."""
+    index = brands.BrandIndex(
+        ["mail.ru", "mall.cz", "google.com", "google.de", "amazon.com", "amazon.co.uk"]
+    )
+
+    for domain in ("mall.cz", "mail.ru", "google.de", "amazon.co.uk"):
+        features = brands.get_brand_similarity_features(domain, index=index)
+        assert features.is_brand_domain is True, domain
+        assert features.is_typosquat is False, domain
+    assert index.nearest("mall") == ("mall.cz", 0, 0)
+    assert index.nearest("mail") == ("mail.ru", 0, 0)
+    assert index.nearest("rnall") == ("mall.cz", 2, 0)
+
+    lookalike = brands.get_brand_similarity_features("ma1l.com", index=index)
+    assert lookalike.is_brand_domain is False
+    assert lookalike.nearest_brand == "mail.ru"
+    assert lookalike.is_typosquat is True
+
+
+def _brute_force_nearest(index, label, max_distance):
+    """Scan every brand, ranking like BrandIndex.nearest."""
+    label = label.lower()
+    normalized = brands.normalize_homoglyphs(label)
+    grams = brands._bigrams(normalized)
+    best = None
+    for brand_id, brand in enumerate(index.normalized):
+        # Documented limit of the index, brands sharing no bigram are skipped
+        if not grams & brands._bigrams(brand):
+            continue
+        distance = brands.levenshtein_distance(normalized, brand)
+        if distance > max_distance:
+            continue
+        key = (
+            distance,
+            brands.levenshtein_distance(label, index.labels[brand_id]),
+            brand_id,
+        )
+        if best is None or key < best:
+            best = key
+    if best is None:
+        return None
+    return index.domains[best[2]], best[1], best[0]
+
+
+def test_brand_index_matches_brute_force_scan():
+    """Return the same match as a full scan for random near-miss labels."""
+    rng = random.Random(7)
+    alphabet = "abcdeo0lmn"
+    labels = ["".join(rng.choices(alphabet, k=rng.randint(3, 12))) for _ in range(150)]
+    index = brands.BrandIndex([f"{label}.com" for label in labels])
+
+    for _ in range(150):
+        query = list(rng.choice(labels))
+        for _ in range(rng.randint(0, 3)):
+            position = rng.randint(0, len(query) - 1)
+            operation = rng.randint(0, 2)
+            if operation == 0:
+                query.insert(position, rng.choice(alphabet))
+            elif operation == 1 and len(query) > 1:
+                query.pop(position)
+            else:
+                query[position] = rng.choice(alphabet)
+        query = "".join(query)
+        for max_distance in (1, 2):
+            assert index.nearest(query, max_distance) == _brute_force_nearest(
+                index, query, max_distance
+            ), (query, max_distance)
+
+
+def test_get_brand_index_loads_reference_list_once(monkeypatch, tmp_path):
+    """Read a ranked reference list from config and share the index."""
+    path = tmp_path / "top.csv"
+    path.write_text("1,examplebank.com\n2,shop.example.org\n", encoding="utf-8")
+    monkeypatch.setattr(config, "brand_domains_path", str(path))
+
+    index = brands.get_brand_index()
+    assert index is brands.get_brand_index()
+    assert index.domains == ["examplebank.com", "shop.example.org"]
+    assert index.nearest("examp1ebank")[0] == "examplebank.com"
@@ -0,0 +1,163 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from web2vec import caching
+from web2vec.config import config
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control the monotonic clock used for cache expiry."""
+    now = [1000.0]
+    monkeypatch.setattr(caching.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Keep at most maxsize entries and drop the least recently used one."""
+    cache = caching.TTLCache("test-lru", maxsize=2, ttl=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (3, 0, 1, 2)
+
+
+def test_ttl_cache_expires_entries(clock):
+    """Treat entries older than the TTL as misses and count the expiry."""
+    cache = caching.TTLCache("test-ttl", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock[0] += 59
+    assert cache.get("a") == 1
+    clock[0] += 2
+
+    assert cache.get("a", "missing") == "missing"
+    assert cache.stats().expirations == 1
+    assert len(cache) == 0
+
+
+def test_ttl_cache_entry_ttl_overrides_cache_ttl(clock):
+    """Expire an entry stored with its own TTL independently of the cache TTL."""
+    cache = caching.TTLCache("test-entry-ttl", maxsize=10, ttl=3600)
+    cache.set("short", 1, ttl=30)
+    cache.set("default", 2)
+    clock[0] += 31
+
+    assert "short" not in cache
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+
+
+def test_ttl_cache_reads_limits_from_config(monkeypatch):
+    """Resolve per-source limits from Config with the defaults as fallback."""
+    monkeypatch.setattr(config, "cache_max_sizes", {"test-config": 5})
+    monkeypatch.setattr(config, "cache_ttls", {})
+    monkeypatch.setattr(config, "cache_default_ttl", 42)
+    cache = caching.TTLCache("test-config")
+
+    assert cache.maxsize == 5
+    assert cache.ttl == 42
+
+
+def test_cached_shares_keys_and_supports_invalidation():
+    """Share entries between call styles and drop them on invalidation."""
+    calls = []
+
+    @caching.cached("test-decorator", maxsize=10, ttl=0)
+    def lookup(domain, suffix="com"):
+        calls.append(domain)
+        return f"{domain}.{suffix}"
+
+    assert lookup("example") == "example.com"
+    assert lookup(domain="example") == "example.com"
+    assert lookup("example", suffix="com") == "example.com"
+    assert calls == ["example"]
+
+    assert lookup.invalidate(domain="example") is True
+    assert lookup("example") == "example.com"
+    assert calls == ["example", "example"]
+    assert caching.cache_stats()["test-decorator"].hits == 2
+
+    caching.invalidate_cache("test-decorator")
+    assert len(lookup.cache) == 0
+
+
+def test_cached_does_not_store_errors():
+    """Re-run the function after it raised instead of caching the error."""
+    calls = []
+
+    @caching.cached("test-errors", maxsize=10, ttl=0)
+    def flaky(value):
+        calls.append(value)
+        if len(calls) == 1:
+            raise OSError("temporary")
+        return value
+
+    with pytest.raises(OSError):
+        flaky("x")
+    assert flaky("x") == "x"
+    assert len(calls) == 2
+
+
+def test_cached_coalesces_concurrent_misses():
+    """Run one computation for concurrent callers of the same key."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @caching.cached("test-single-flight", maxsize=10, ttl=0)
+    def slow_lookup(domain):
+        calls.append(domain)
+        started.set()
+        release.wait(5)
+        return domain.upper()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(slow_lookup, "example.com") for _ in range(8)]
+        started.wait(5)
+        while slow_lookup.cache_info().coalesced < 7:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert results == ["EXAMPLE.COM"] * 8
+    assert calls == ["example.com"]
+    assert slow_lookup("example.com") == "EXAMPLE.COM"
+    assert calls == ["example.com"]
+
+
+def test_cached_shares_errors_with_waiting_callers():
+    """Raise the leader's exception in every waiter without caching it."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    @caching.cached("test-single-flight-errors", maxsize=10, ttl=0)
+    def failing_lookup(domain):
+        calls.append(domain)
+        started.set()
+        release.wait(5)
+        if len(calls) == 1:
+            raise TimeoutError("rate limited")
+        return domain
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(failing_lookup, "example.com") for _ in range(4)]
+        started.wait(5)
+        while failing_lookup.cache_info().coalesced < 3:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(TimeoutError):
+                future.result(5)
+
+    assert failing_lookup("example.com") == "example.com"
+    assert len(calls) == 2
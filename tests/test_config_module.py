@@ -10,6 +10,7 @@ def test_config_default_paths(tmp_path):
     )
     assert cfg.remote_url_output_path == str(tmp_path / "remote")
     assert cfg.crawler_output_path == str(tmp_path / "crawler")
+    assert cfg.render_cache_path == str(tmp_path / "render_cache")
 
 
 def test_config_respects_explicit_paths(tmp_path):
@@ -22,3 +23,12 @@ def test_config_respects_explicit_paths(tmp_path):
     )
     assert cfg.remote_url_output_path == str(custom_remote)
     assert cfg.crawler_output_path == "/tmp/crawler"
+
+
+def test_config_cache_limits_from_environment(monkeypatch):
+    """Read per-source cache limits from JSON environment variables."""
+    monkeypatch.setenv("WEB2VEC_CACHE_TTLS", '{"dns": 60}')
+    monkeypatch.setenv("WEB2VEC_CACHE_DEFAULT_MAX_SIZE", "500")
+    cfg = Config()
+    assert cfg.cache_ttls == {"dns": 60}
+    assert cfg.cache_default_max_size == 500
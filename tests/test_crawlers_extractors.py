@@ -0,0 +1,192 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from web2vec.crawlers import extractors
+from web2vec.crawlers.render_cache import RenderCache
+from web2vec.crawlers.snapshot_store import SnapshotStore
+
+SPA_DOC = """
+<html>
+  <head><title>SPA</title></head>
+  <body><div id="root"></div><script src="/static/js/main.js"></script></body>
+</html>
+"""
+
+SERVER_RENDERED_DOC = """
+<html>
+  <head><title>Article</title></head>
+  <body>
+    <h1>Server rendered article</h1>
+    <p>This page ships its full content in the initial HTTP response, so there
+    is no reason to start a browser just to read the very same markup again.</p>
+  </body>
+</html>
+"""
+
+RENDERED_DOC = """
+<html><body><div id="root"><h1>Rendered</h1><form method="post"></form></div></body></html>
+"""
+
+
+def _response(url, text):
+    return SimpleNamespace(url=url, text=text)
+
+
+def _patch_renderer(monkeypatch, calls):
+    def fake_render(self, url):
+        calls.append(url)
+        return extractors.RenderedPage(
+            html=RENDERED_DOC,
+            network_request_urls=[
+                url,
+                "https://api.thirdparty.com/v1/session",
+            ],
+        )
+
+    monkeypatch.setattr(
+        extractors.HtmlBodyExtractor, "_render_with_selenium", fake_render
+    )
+
+
+def test_html_extractor_render_policy_defaults():
+    """Map the legacy enable_js_render flag onto the render policy."""
+    assert extractors.HtmlBodyExtractor().render == "never"
+    legacy = extractors.HtmlBodyExtractor(enable_js_render=True)
+    assert legacy.render == "always"
+    assert legacy.enable_js_render is True
+    with pytest.raises(ValueError):
+        extractors.HtmlBodyExtractor(render="sometimes")
+
+
+def test_html_extractor_auto_render_skips_server_rendered_pages(monkeypatch):
+    """Only SPA-like pages are sent to the browser in auto mode."""
+    calls = []
+    _patch_renderer(monkeypatch, calls)
+    extractor = extractors.HtmlBodyExtractor(render="auto")
+
+    features = extractor.extract_features(
+        _response("https://news.example.com", SERVER_RENDERED_DOC)
+    )
+    assert calls == []
+    assert features.was_js_rendered is False
+    assert features.source_mode == "raw_http"
+
+    features = extractor.extract_features(_response("https://spa.example.com", SPA_DOC))
+    assert calls == ["https://spa.example.com"]
+    assert features.was_js_rendered is True
+    assert features.source_mode == "selenium_rendered"
+    assert features.num_forms == 1
+
+
+def test_html_extractor_never_and_always_policies(monkeypatch):
+    """Respect explicit never/always render policies."""
+    calls = []
+    _patch_renderer(monkeypatch, calls)
+    response = _response("https://spa.example.com", SPA_DOC)
+
+    never = extractors.HtmlBodyExtractor(render="never").extract_features(response)
+    assert never.was_js_rendered is False
+    always = extractors.HtmlBodyExtractor(render="always").extract_features(response)
+    assert always.was_js_rendered is True
+    assert calls == ["https://spa.example.com"]
+
+
+def test_html_extractor_passes_captured_network_requests(monkeypatch):
+    """Feed requests captured during rendering into the network features."""
+    _patch_renderer(monkeypatch, [])
+    features = extractors.HtmlBodyExtractor(render="always").extract_features(
+        _response("https://spa.example.com", SPA_DOC)
+    )
+    assert features.num_network_requests == 2
+    assert features.num_external_network_requests == 1
+    assert features.found_api_endpoints == ["https://api.thirdparty.com/v1/session"]
+
+
+def test_extract_network_request_urls_from_performance_log():
+    """Keep unique HTTP(S) requests from Network.requestWillBeSent events."""
+
+    def entry(method, url):
+        payload = {"message": {"method": method, "params": {"request": {"url": url}}}}
+        return {"message": json.dumps(payload)}
+
+    log = [
+        entry("Network.requestWillBeSent", "https://example.com/"),
+        entry("Network.requestWillBeSent", "https://example.com/app.js"),
+        entry("Network.requestWillBeSent", "https://example.com/app.js"),
+        entry("Network.requestWillBeSent", "data:image/png;base64,AAA"),
+        entry("Network.responseReceived", "https://example.com/other"),
+        {"message": "not json"},
+    ]
+    assert extractors.extract_network_request_urls(log) == [
+        "https://example.com/",
+        "https://example.com/app.js",
+    ]
+
+
+def test_html_extractor_serves_rendered_pages_from_cache(monkeypatch, tmp_path):
+    """Render a URL once and serve repeated extractions from the render cache."""
+    calls = []
+    _patch_renderer(monkeypatch, calls)
+    cache = RenderCache(directory=tmp_path.as_posix(), ttl=3600)
+    extractor = extractors.HtmlBodyExtractor(
+        render="always", render_cache=cache, browser_version="120.0"
+    )
+    response = _response("https://spa.example.com", SPA_DOC)
+
+    first = extractor.extract_features(response)
+    second = extractor.extract_features(response)
+    assert calls == ["https://spa.example.com"]
+    assert second.was_js_rendered is True
+    assert second.num_network_requests == first.num_network_requests == 2
+
+
+def test_html_extractor_writes_snapshots_to_store(tmp_path):
+    """Return store references in html_snapshot_path when a store is used."""
+    store = SnapshotStore(directory=tmp_path.as_posix(), background=False)
+    extractor = extractors.HtmlBodyExtractor(snapshot_store=store)
+    first = extractor.extract_features(_response("https://a.example.com", SPA_DOC))
+    second = extractor.extract_features(_response("https://b.example.com", SPA_DOC))
+
+    assert first.html_snapshot_path == second.html_snapshot_path
+    assert first.html_snapshot_path.startswith("sha256:")
+    assert store.get(first.html_snapshot_path) == SPA_DOC
+
+
+def test_html_extractor_keeps_store_apart_from_html_snapshots(tmp_path):
+    """Open the default store in its own subdirectory of the snapshot dir."""
+    extractor = extractors.HtmlBodyExtractor(
+        snapshot_output_dir=str(tmp_path), snapshot_store=True
+    )
+    try:
+        assert extractor.save_html_snapshot is True
+        assert extractor.snapshot_store.directory == str(tmp_path / "store")
+    finally:
+        extractor.snapshot_store.close()
+
+
+def test_certificate_extractor_keys_connections_by_host_and_port(monkeypatch):
+    """Store and look up certificates under the URL's host and actual port."""
+    stored, looked_up = [], []
+    connection = SimpleNamespace(certificate=b"der")
+    monkeypatch.setattr(
+        extractors,
+        "store_tls_connection",
+        lambda host, conn, port=443: stored.append((host, port)),
+    )
+    monkeypatch.setattr(extractors, "get_certificate_features", lambda *args: None)
+    monkeypatch.setattr(
+        extractors,
+        "get_certificate_features_cached",
+        lambda hostname, port=443: looked_up.append((hostname, port)),
+    )
+    extractor = extractors.CertificateExtractor()
+
+    monkeypatch.setattr(extractors, "get_tls_connection_info", lambda r: connection)
+    extractor.extract_features(SimpleNamespace(url="https://Shop.Example:8443/x"))
+    monkeypatch.setattr(extractors, "get_tls_connection_info", lambda r: None)
+    extractor.extract_features(SimpleNamespace(url="https://shop.example/"))
+
+    assert stored == [("shop.example", 8443)]
+    assert looked_up == [("shop.example", 443)]
@@ -0,0 +1,28 @@
+import os
+import time
+
+from web2vec.crawlers.render_cache import RenderCache, RenderedPage
+
+
+def test_render_cache_round_trip_and_key_isolation(tmp_path):
+    """Store a rendered page and only serve it for identical render settings."""
+    cache = RenderCache(directory=tmp_path.as_posix(), ttl=3600)
+    page = RenderedPage(html="<html></html>", network_request_urls=["https://a.b/"])
+    cache.set("https://example.com", 2.0, "120.0", page)
+
+    assert cache.get("https://example.com", 2.0, "120.0") == page
+    assert cache.get("https://example.com", 5.0, "120.0") is None
+    assert cache.get("https://example.com", 2.0, "121.0") is None
+    assert cache.get("https://other.example.com", 2.0, "120.0") is None
+
+
+def test_render_cache_expires_entries(tmp_path):
+    """Treat entries older than the TTL as missing."""
+    cache = RenderCache(directory=tmp_path.as_posix(), ttl=60)
+    cache.set("https://example.com", 2.0, "120.0", RenderedPage(html="<p>x</p>"))
+    key = RenderCache.cache_key("https://example.com", 2.0, "120.0")
+    entry_path = cache._entry_path(key)
+    old = time.time() - 120
+    os.utime(entry_path, (old, old))
+
+    assert cache.get("https://example.com", 2.0, "120.0") is None
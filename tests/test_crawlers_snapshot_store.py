@@ -0,0 +1,58 @@
+import pytest
+
+from web2vec.crawlers import snapshot_store
+from web2vec.crawlers.snapshot_store import SnapshotStore
+
+KIT_PAGE = "<html><body><form action='/steal'>Login</form></body></html>"
+
+
+@pytest.mark.parametrize("compression", ["gzip", "zstd"])
+def test_snapshot_store_deduplicates_and_round_trips(tmp_path, compression):
+    """Store identical bodies once and read them back by reference."""
+    if compression == "zstd":
+        try:
+            snapshot_store._zstd_module()
+        except ImportError:
+            pytest.skip("zstd is not available")
+    store = SnapshotStore(
+        directory=tmp_path.as_posix(), compression=compression, background=True
+    )
+    first = store.put(KIT_PAGE)
+    second = store.put(KIT_PAGE)
+    other = store.put("<html>other</html>")
+    store.close()
+
+    assert first == second == f"sha256:{SnapshotStore.digest(KIT_PAGE)}"
+    assert first != other
+    assert store.get(first) == KIT_PAGE
+    index_lines = (tmp_path / "index.jsonl").read_text().splitlines()
+    assert len(index_lines) == 2
+    assert len(list(tmp_path.glob("segment-*.pack"))) == 1
+
+
+def test_snapshot_store_reloads_index_and_rotates_segments(tmp_path):
+    """Reopen an existing store and roll over to a new segment when full."""
+    store = SnapshotStore(
+        directory=tmp_path.as_posix(), segment_max_bytes=64, background=False
+    )
+    refs = [store.put(f"<html>{i}</html>" * 20) for i in range(3)]
+
+    reopened = SnapshotStore(directory=tmp_path.as_posix(), background=False)
+    assert [reopened.get(ref) for ref in refs] == [
+        f"<html>{i}</html>" * 20 for i in range(3)
+    ]
+    assert refs[0] in reopened
+    assert reopened.get("sha256:missing") is None
+    assert len(list(tmp_path.glob("segment-*.pack"))) == 3
+
+
+def test_snapshot_store_requires_zstd_up_front(tmp_path, monkeypatch):
+    """Reject zstd compression at construction when no zstd module is present."""
+
+    def missing():
+        """Fail like an interpreter without zstd support."""
+        raise ImportError("No module named 'backports.zstd'")
+
+    monkeypatch.setattr(snapshot_store, "_zstd_module", missing)
+    with pytest.raises(ImportError):
+        SnapshotStore(str(tmp_path), compression="zstd")
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import dns.resolver
+import pytest
+
+from web2vec import dns_cache, utils
+from web2vec.config import config
+
+
+class Answers(list):
+    def __init__(self, values, ttl):
+        super().__init__(SimpleNamespace(to_text=lambda v=v: v) for v in values)
+        self.rrset = SimpleNamespace(ttl=ttl)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Control the wall clock used for DNS cache expiry."""
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(dns_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_dns_cache_honours_record_ttl(clock, tmp_path):
+    """Serve a stored answer until its own TTL has passed."""
+    cache = dns_cache.DNSCache(str(tmp_path / "cache.sqlite3"))
+    cache.set("Example.COM.", "A", 60, ["192.0.2.1"])
+    clock[0] += 59
+
+    answer = cache.get("example.com", "A")
+    assert (answer.ttl, answer.values) == (60, ["192.0.2.1"])
+    clock[0] += 2
+    assert cache.get("example.com", "A") is None
+    assert cache.purge_expired() == 1
+
+
+def test_resolve_persists_answers_across_instances():
+    """Reuse answers stored by another cache instance without querying again."""
+    queries = []
+
+    def fake_resolve(name, record_type):
+        queries.append((name, record_type))
+        if record_type == "MX":
+            raise dns.resolver.NoAnswer()
+        return Answers(["192.0.2.7"], 300)
+
+    first = dns_cache.resolve("example.com", "A", fake_resolve)
+    assert first.values == ["192.0.2.7"]
+    assert dns_cache.resolve("example.com", "MX", fake_resolve).values == []
+
+    restarted = dns_cache.DNSCache(config.dns_cache_path)
+    assert restarted.get("example.com", "A").values == ["192.0.2.7"]
+    assert dns_cache.resolve("example.com", "A", fake_resolve).values == first.values
+    assert dns_cache.resolve("example.com", "MX", fake_resolve).values == []
+    assert queries == [("example.com", "A"), ("example.com", "MX")]
+
+
+def test_resolve_does_not_cache_errors():
+    """Raise resolver errors other than NXDOMAIN and NoAnswer and query again."""
+    calls = []
+
+    def failing_resolve(name, record_type):
+        calls.append(record_type)
+        raise dns.resolver.LifetimeTimeout(timeout=1.0, errors=[])
+
+    for _ in range(2):
+        with pytest.raises(dns.resolver.LifetimeTimeout):
+            dns_cache.resolve("slow.example", "A", failing_resolve)
+    assert calls == ["A", "A"]
+
+
+def test_get_ip_from_url_reads_the_dns_cache(monkeypatch):
+    """Resolve the URL host from the DNS cache instead of the system resolver."""
+    dns_cache.get_dns_cache().set("cached.example", "A", 300, ["192.0.2.9"])
+
+    def refuse(host):
+        raise AssertionError("system resolver used")
+
+    monkeypatch.setattr(utils.socket, "gethostbyname", refuse)
+    assert utils.get_ip_from_url("https://cached.example:8443/login") == "192.0.2.9"
+    assert utils.get_ip_from_domain("198.51.100.4") == "198.51.100.4"
@@ -1,5 +1,15 @@
+import asyncio
+import threading
 from types import SimpleNamespace
 
+import dns.message
+import dns.name
+import dns.nameserver
+import dns.rcode
+import dns.rdatatype
+import dns.resolver
+import dns.rrset
+
 from web2vec.extractors import dns_features as dns_module
 from web2vec.extractors.dns_features import DNSFeatures, DNSRecordFeatures
 
@@ -61,3 +71,176 @@ def test_get_dns_features_collects_records(monkeypatch):
     assert features.records[0].values == ["1.2.3.4"]
     assert features.min_ttl == 120
     assert features.qty_ip_resolved == 1
+
+
+def test_get_dns_features_queries_record_types_concurrently():
+    """Issue the queries after A at once and keep the record order stable."""
+    barrier = threading.Barrier(len(dns_module.DNS_RECORD_TYPES) - 1, timeout=5)
+
+    class Answers(list):
+        rrset = SimpleNamespace(ttl=300)
+
+    class FakeResolver:
+        def resolve(self, domain, record_type):
+            """Return one record per type once all queries are in flight."""
+            if record_type != "A":
+                barrier.wait()
+            return Answers([SimpleNamespace(to_text=lambda: f"{record_type}-value")])
+
+    features = dns_module.get_dns_features("example.com", resolver=FakeResolver())
+    assert [record.record_type for record in features.records] == list(
+        dns_module.DNS_RECORD_TYPES
+    )
+    assert features.records[2].values == ["MX-value"]
+
+
+def test_get_dns_features_stops_at_nxdomain_and_caches_it():
+    """Mark NXDOMAIN answers as non-existent and keep them for the SOA minimum."""
+    qname = dns.name.from_text("dead.example.")
+    response = dns.message.from_text(
+        "id 1\nopcode QUERY\nrcode NXDOMAIN\nflags QR AA\n"
+        ";QUESTION\ndead.example. IN A\n;ANSWER\n;AUTHORITY\n"
+        "example. 900 IN SOA ns.example. admin.example. 1 7200 3600 1209600 60\n"
+    )
+    queries = []
+
+    class DeadResolver:
+        def resolve(self, domain, record_type):
+            """Answer every query with NXDOMAIN."""
+            queries.append(record_type)
+            raise dns.resolver.NXDOMAIN(qnames=[qname], responses={qname: response})
+
+    features = dns_module.get_dns_features("dead.example", resolver=DeadResolver())
+    assert features.exists is False
+    assert features.negative_ttl == 60
+    assert features.records == []
+    assert features.qty_ip_resolved == 0
+    assert queries == ["A"]
+
+    again = dns_module.get_dns_features("Dead.Example.", resolver=DeadResolver())
+    assert again.exists is False
+    assert again.negative_ttl == 60
+    assert queries == ["A"]
+
+
+def test_cached_dns_features_expire_with_record_ttl(monkeypatch):
+    """Keep positive answers in memory no longer than their shortest record TTL."""
+    monkeypatch.setitem(dns_module.config.cache_ttls, "dns", 3600)
+    short = DNSFeatures(
+        domain="short.test",
+        records=[
+            DNSRecordFeatures(record_type="A", ttl=60, values=["192.0.2.1"]),
+            DNSRecordFeatures(record_type="NS", ttl=7200, values=["ns.test."]),
+        ],
+    )
+    long = DNSFeatures(
+        domain="long.test",
+        records=[DNSRecordFeatures(record_type="A", ttl=86400, values=["192.0.2.2"])],
+    )
+
+    assert dns_module._cache_ttl(short) == 60
+    assert dns_module._cache_ttl(long) == 3600
+    assert dns_module._cache_ttl(DNSFeatures(domain="empty.test")) is None
+
+
+class _StubDNSServer(asyncio.DatagramProtocol):
+    """Answer A queries of known names, NXDOMAIN for dead names."""
+
+    def __init__(self, addresses, dead, dropped):
+        self.addresses = addresses
+        self.dead = dead
+        self.dropped = dropped
+        self.queries = []
+
+    def connection_made(self, transport):
+        """Keep the transport to send answers."""
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        """Build the answer of a single query."""
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text().rstrip(".")
+        record_type = dns.rdatatype.to_text(question.rdtype)
+        self.queries.append((name, record_type))
+        if (name, record_type) in self.dropped:
+            self.dropped.remove((name, record_type))
+            return
+        response = dns.message.make_response(query)
+        if name in self.dead:
+            response.set_rcode(dns.rcode.NXDOMAIN)
+            response.authority.append(
+                dns.rrset.from_text(
+                    "test.", 600, "IN", "SOA", "ns.test. admin.test. 1 2 3 4 30"
+                )
+            )
+        elif record_type == "A" and name in self.addresses:
+            response.answer.append(
+                dns.rrset.from_text(question.name, 120, "IN", "A", self.addresses[name])
+            )
+        self.transport.sendto(response.to_wire(), addr)
+
+
+def test_get_dns_features_bulk_against_stub_server():
+    """Resolve a domain list against a local server, retrying dropped queries."""
+    server = _StubDNSServer(
+        addresses={"alive.test": "192.0.2.10", "other.test": "192.0.2.11"},
+        dead={"dead.test"},
+        dropped=[("other.test", "A")],
+    )
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: server, local_addr=("127.0.0.1", 0)
+        )
+        port = transport.get_extra_info("sockname")[1]
+        try:
+            return [
+                features
+                async for features in dns_module.get_dns_features_bulk(
+                    (domain for domain in ["alive.test", "dead.test", "other.test"]),
+                    concurrency=4,
+                    nameservers=[dns.nameserver.Do53Nameserver("127.0.0.1", port)],
+                    timeout=0.5,
+                    retries=1,
+                )
+            ]
+        finally:
+            transport.close()
+
+    results = {features.domain: features for features in asyncio.run(run())}
+    assert set(results) == {"alive.test", "dead.test", "other.test"}
+    assert results["alive.test"].records[0].values == ["192.0.2.10"]
+    assert results["alive.test"].min_ttl == 120
+    assert results["other.test"].records[0].values == ["192.0.2.11"]
+    assert results["dead.test"].exists is False
+    assert results["dead.test"].negative_ttl == 30
+    assert server.queries.count(("other.test", "A")) == 2
+
+
+def test_get_dns_features_bulk_reads_cache_off_the_event_loop(monkeypatch):
+    """Run the SQLite cache lookups in worker threads, not on the event loop."""
+    threads = []
+
+    def lookup(domain, record_type):
+        """Answer every query from the cache and note the calling thread."""
+        threads.append(threading.get_ident())
+        return dns_module.dns_cache.CachedAnswer(domain, record_type, 60, ["v"])
+
+    monkeypatch.setattr(dns_module.dns_cache, "lookup", lookup)
+
+    async def run():
+        results = [
+            features
+            async for features in dns_module.get_dns_features_bulk(
+                ["cached.test"],
+                nameservers=[dns.nameserver.Do53Nameserver("127.0.0.1", 9)],
+            )
+        ]
+        return results, threading.get_ident()
+
+    results, loop_thread = asyncio.run(run())
+    assert results[0].records[0].values == ["v"]
+    assert len(threads) == len(dns_module.DNS_RECORD_TYPES)
+    assert loop_thread not in threads
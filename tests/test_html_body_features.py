@@ -1,4 +1,7 @@
-from web2vec.extractors.html_body_features import get_html_body_features
+from web2vec.extractors.html_body_features import (
+    detect_api_endpoints,
+    get_html_body_features,
+)
 
 HTML_DOC = """
 <!DOCTYPE html>
@@ -43,6 +46,7 @@ def test_html_body_feature_counts():
     assert features.mouse_over_effect == 1
     assert features.logo_url == "http://cdn.example.com/logo.png"
     assert features.favicon_url == "/favicon.ico"
+    assert 0 < features.visible_text_length < features.body_length
 
 
 def test_html_body_detects_likely_spa():
@@ -61,3 +65,60 @@ def test_html_body_detects_likely_spa():
     assert features.source_mode == "raw_http"
     assert features.was_js_rendered is False
     assert features.html_snapshot_path is None
+
+
+def test_html_body_text_signals_and_configured_keywords():
+    """Scan text for copyright, right-click and caller-provided keywords."""
+    doc = """
+    <html><body>
+      <script>document.onmousedown = function(event){ if (event.button==2) {} }</script>
+      <p>Welcome to Contoso.</p><footer>Copyright 2026 Contoso</footer>
+    </body></html>
+    """
+    features = get_html_body_features(doc, "https://contoso.example.com")
+    assert features.contains_suspicious_keywords is False
+    assert features.right_click_disabled == 0
+    assert "Copyright 2026" in features.copyright
+
+    features = get_html_body_features(
+        doc, "https://contoso.example.com", keywords=["contoso"]
+    )
+    assert features.contains_suspicious_keywords is True
+
+
+def test_detect_api_endpoints_single_pass():
+    """Map API-like matches from the joined scan back to their URLs."""
+    urls = [
+        "https://example.com/",
+        "https://example.com/api/login",
+        "https://example.com/static/app.js",
+        "https://example.com/data/config.JSON",
+        "https://example.com/search?q=1&format=json",
+        "https://example.com/v2/items",
+        "https://example.com/api/login",
+    ]
+    assert detect_api_endpoints(urls) == [
+        "https://example.com/api/login",
+        "https://example.com/data/config.JSON",
+        "https://example.com/search?q=1&format=json",
+        "https://example.com/v2/items",
+    ]
+    assert detect_api_endpoints([]) == []
+
+
+def test_html_body_found_lists_can_be_capped_or_omitted():
+    """Bound found_* lists while keeping full-page counts."""
+    doc = "<html><body>" + '<a href="/x">x</a><img src="/i.png">' * 5 + "</body></html>"
+    url = "https://example.com"
+
+    full = get_html_body_features(doc, url)
+    assert len(full.found_anchors) == 5
+    assert len(full.found_media) == full.num_media == 5
+
+    capped = get_html_body_features(doc, url, max_found_elements=2)
+    assert len(capped.found_anchors) == len(capped.found_images) == 2
+    assert capped.num_links == 5
+
+    compact = get_html_body_features(doc, url, max_found_elements=0)
+    assert compact.found_anchors == compact.found_media == []
+    assert compact.num_images == compact.num_media == 5
@@ -0,0 +1,51 @@
+import socket
+
+import pytest
+
+from web2vec import public_suffix
+from web2vec.config import config
+
+
+@pytest.fixture
+def fresh_extractor(monkeypatch):
+    """Rebuild the shared extractor around the test and restore it after."""
+    public_suffix.reset_suffix_extractor()
+    yield
+    monkeypatch.undo()
+    public_suffix.reset_suffix_extractor()
+
+
+def test_extractor_is_shared_and_offline(fresh_extractor, monkeypatch):
+    """Load the bundled snapshot once without opening any connection."""
+
+    def refuse(*args, **kwargs):
+        raise AssertionError("public suffix list fetched over the network")
+
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    extractor = public_suffix.get_suffix_extractor()
+
+    assert extractor is public_suffix.get_suffix_extractor()
+    assert extractor.suffix_list_urls == ()
+    result = public_suffix.extract("https://www.shop.example.co.uk/path")
+    assert (result.subdomain, result.domain, result.suffix) == (
+        "www.shop",
+        "example",
+        "co.uk",
+    )
+
+
+def test_extractor_reads_configured_list(fresh_extractor, monkeypatch, tmp_path):
+    """Use the suffix list file set in the configuration instead of the snapshot."""
+    suffix_list = tmp_path / "public_suffix_list.dat"
+    suffix_list.write_text(
+        "// ===BEGIN ICANN DOMAINS===\ncom\nshop.test\n// ===END ICANN DOMAINS===\n"
+    )
+    monkeypatch.setattr(config, "public_suffix_list_path", str(suffix_list))
+
+    result = public_suffix.extract("a.brand.shop.test")
+    assert (result.subdomain, result.domain, result.suffix) == (
+        "a",
+        "brand",
+        "shop.test",
+    )
+    assert public_suffix.extract("example.co.uk").suffix == ""
@@ -1,9 +1,25 @@
+import socket
+import ssl
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ipaddress import ip_address
+from types import SimpleNamespace
 
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.x509.oid import NameOID
+
+from web2vec import dns_cache, utils
 from web2vec.extractors import (
     ssl_certification_features as ssl_certification_features,
 )
 from web2vec.extractors.ssl_certification_features import CertificateFeatures
+from web2vec.utils import fetch_url
 
 
 def test_certificate_temporal_and_issuer_indicators_active():
@@ -80,26 +96,51 @@ def test_is_certificate_valid_checks_window():
 def test_get_certificate_features_with_stub(monkeypatch):
     """Cover get_certificate_features by patching the TLS retrieval path."""
     now = datetime.utcnow()
-    cert_payload = {
-        "subject": {"commonName": "example.com"},
-        "issuer": {"organizationName": "ZeroSSL", "commonName": "ZeroSSL RSA"},
-        "notBefore": now.strftime("%b %d %H:%M:%S %Y GMT"),
-        "notAfter": (now + timedelta(days=40)).strftime("%b %d %H:%M:%S %Y GMT"),
-    }
-
-    monkeypatch.setattr(
-        ssl_certification_features, "get_tls_certificate", lambda host: cert_payload
+    key = ec.generate_private_key(ec.SECP256R1())
+    issuer = x509.Name(
+        [
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ZeroSSL"),
+            x509.NameAttribute(NameOID.COMMON_NAME, "ZeroSSL RSA"),
+        ]
     )
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(
+            x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "example.com")])
+        )
+        .issuer_name(issuer)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=40))
+        .sign(key, hashes.SHA256())
+    )
+    probed = []
+
+    def probe(hostname):
+        """Return the stub certificate as a verified connection."""
+        probed.append(hostname)
+        return ssl_certification_features.TLSConnectionInfo(
+            certificate=certificate.public_bytes(serialization.Encoding.DER),
+            verified=True,
+        )
+
     monkeypatch.setattr(
         ssl_certification_features,
-        "is_certificate_trusted",
-        lambda cert: (True, "trusted"),
+        "get_tls_prober",
+        lambda: SimpleNamespace(probe=probe),
     )
 
     features = ssl_certification_features.get_certificate_features("example.com")
+    assert probed == ["example.com"]
     assert features.issuer_is_free_ca is True
     assert features.validity_duration_days == 40
     assert features.valid_in_30_days is True
+    assert features.is_trusted is True
+    assert (features.key_type, features.key_size) == ("EC", 256)
+    assert features.signature_algorithm == "ecdsa-with-SHA256"
+    assert features.san_count == 0
+    assert features.chain_length == 1
 
 
 def test_check_ssl_handles_errors(monkeypatch):
@@ -159,3 +200,429 @@ def test_check_ssl_respects_ssl_verify_config(monkeypatch):
     assert ssl_certification_features.check_ssl("https://example.com") is True
     assert captured["verify"] is False
     assert captured["warnings"] == 1
+
+
+def _seed_localhost():
+    """Answer the A and AAAA lookups of localhost from the DNS cache."""
+    cache = dns_cache.get_dns_cache()
+    cache.set("localhost", "A", 300, ["127.0.0.1"])
+    cache.set("localhost", "AAAA", 300, [])
+
+
+def _self_signed_certificate(tmp_path, common_name="localhost"):
+    """Write a self-signed certificate and key for a local TLS server."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.utcnow()
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=90))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.DNSName(common_name), x509.IPAddress(ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = tmp_path / "cert.pem", tmp_path / "key.pem"
+    cert_path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return certificate, cert_path, key_path
+
+
+@contextmanager
+def _https_server(cert_path, key_path):
+    """Serve a small page over HTTPS on a free local port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # noqa: N802
+            """Answer every request with a short HTML page."""
+            body = b"<html><body>ok</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            """Keep the test output quiet."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_certificate_features_from_fetch_connection(tmp_path, monkeypatch):
+    """Reuse the certificate and cipher of the connection that fetched the page."""
+    certificate, cert_path, key_path = _self_signed_certificate(tmp_path)
+    monkeypatch.setattr(
+        ssl_certification_features,
+        "get_tls_certificate",
+        lambda *args: pytest.fail("second TLS handshake"),
+    )
+
+    with _https_server(cert_path, key_path) as port:
+        response = fetch_url(f"https://127.0.0.1:{port}/", ssl_verify=False)
+
+    assert response.text == "<html><body>ok</body></html>"
+    connection = ssl_certification_features.get_tls_connection_info(response)
+    assert connection.certificate == certificate.public_bytes(
+        serialization.Encoding.DER
+    )
+    assert connection.tls_version.startswith("TLS")
+    assert connection.cipher_bits >= 128
+
+    features = ssl_certification_features.get_certificate_features(
+        "127.0.0.1", connection
+    )
+    assert features.subject == ((("commonName", "localhost"),),)
+    assert features.validity_duration_days == 91
+    assert features.is_valid is True
+    assert features.tls_version == connection.tls_version
+    assert features.cipher_name == connection.cipher_name
+    # Fetched without verification, the self-signed certificate is not trusted
+    assert connection.verified is None
+    assert features.is_trusted is False
+    assert features.trust_message == "Certificate trust was not verified"
+
+
+def test_tls_connection_info_from_scrapy_certificate(tmp_path):
+    """Read the DER certificate exposed by Scrapy responses."""
+    certificate, _, _ = _self_signed_certificate(tmp_path, "scrapy.example")
+    der = certificate.public_bytes(serialization.Encoding.DER)
+    response = SimpleNamespace(
+        url="https://scrapy.example/", certificate=SimpleNamespace(dump=lambda: der)
+    )
+
+    connection = ssl_certification_features.get_tls_connection_info(response)
+    assert connection.certificate == der
+    assert connection.tls_version is None
+    decoded = ssl_certification_features.decode_der_certificate(der)
+    assert decoded["subjectAltName"] == (
+        ("DNS", "scrapy.example"),
+        ("IP Address", "127.0.0.1"),
+    )
+    assert (
+        ssl_certification_features.get_tls_connection_info(
+            SimpleNamespace(url="http://plain.example/")
+        )
+        is None
+    )
+
+
+def test_tls_prober_verifies_with_sni_and_reports_untrusted(tmp_path):
+    """Probe a local server as trusted with its CA and as untrusted without."""
+    certificate, cert_path, key_path = _self_signed_certificate(tmp_path)
+    der = certificate.public_bytes(serialization.Encoding.DER)
+    _seed_localhost()
+    trusting = ssl_certification_features.TLSProber(cafile=str(cert_path))
+    system = ssl_certification_features.TLSProber()
+
+    with _https_server(cert_path, key_path) as port:
+        trusted = trusting.probe("localhost", port)
+        untrusted = system.probe("localhost", port)
+        strict = system.probe("localhost", port, unverified_fallback=False)
+
+    assert trusted.certificate == der
+    assert trusted.verified is True
+    assert trusted.tls_version.startswith("TLS")
+    assert untrusted.certificate == der
+    assert untrusted.verified is False
+    assert "self" in untrusted.verify_message and "signed" in untrusted.verify_message
+    assert strict is None
+
+
+def test_tls_prober_enforces_handshake_timeout():
+    """Give up on a server that accepts the connection but never answers."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    prober = ssl_certification_features.TLSProber(
+        connect_timeout=1.0, handshake_timeout=0.2
+    )
+    try:
+        started = time.monotonic()
+        assert prober.probe("127.0.0.1", listener.getsockname()[1]) is None
+        assert time.monotonic() - started < 1.0
+    finally:
+        listener.close()
+
+
+def test_certificate_features_bulk_probes_hosts_concurrently(tmp_path):
+    """Collect certificate features of many hosts through one prober."""
+    _, cert_path, key_path = _self_signed_certificate(tmp_path)
+    _seed_localhost()
+    prober = ssl_certification_features.TLSProber(
+        connect_timeout=1.0, handshake_timeout=1.0, max_workers=4
+    )
+
+    with _https_server(cert_path, key_path) as port:
+        results = dict(
+            ssl_certification_features.get_certificate_features_bulk(
+                (host for host in ["localhost", "127.0.0.1"] * 5), port, prober
+            )
+        )
+
+    assert set(results) == {"localhost", "127.0.0.1"}
+    for features in results.values():
+        assert features.subject == ((("commonName", "localhost"),),)
+        assert features.is_trusted is False
+        assert features.trust_message.startswith("Certificate is not trusted")
+
+
+def test_certificate_cache_refreshes_by_ttl_and_expiry(tmp_path, monkeypatch):
+    """Serve stored certificates until the TTL or the refresh before notAfter."""
+    certificate, _, _ = _self_signed_certificate(tmp_path)
+    connection = ssl_certification_features.TLSConnectionInfo(
+        certificate=certificate.public_bytes(serialization.Encoding.DER),
+        tls_version="TLSv1.3",
+        cipher_name="TLS_AES_128_GCM_SHA256",
+        cipher_bits=128,
+        verified=False,
+        verify_message="self-signed certificate",
+    )
+    cache = ssl_certification_features.CertificateCache(
+        str(tmp_path / "certificates.sqlite3"),
+        ttl=3600,
+        refresh_before_expiry=86400,
+    )
+    cache.set("LocalHost", 443, connection)
+    assert cache.get("localhost", 443) == connection
+    assert cache.get("localhost", 8443) is None
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3601)
+    assert cache.get("localhost", 443) is None
+
+    # The certificate expires in 90 days, well before a 100 day TTL
+    cache = ssl_certification_features.CertificateCache(
+        str(tmp_path / "expiry.sqlite3"), ttl=100 * 86400, refresh_before_expiry=86400
+    )
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.set("localhost", 443, connection)
+    monkeypatch.setattr(time, "time", lambda: now + 88 * 86400)
+    assert cache.get("localhost", 443) == connection
+    monkeypatch.setattr(time, "time", lambda: now + 89.5 * 86400)
+    assert cache.get("localhost", 443) is None
+
+    # Certificates past the refresh point are still kept for the minimum TTL
+    cache.set("localhost", 443, connection)
+    monkeypatch.setattr(time, "time", lambda: now + 89.5 * 86400 + 60)
+    assert cache.get("localhost", 443) == connection
+    monkeypatch.setattr(time, "time", lambda: now + 89.5 * 86400 + 3601)
+    assert cache.get("localhost", 443) is None
+
+
+def test_cached_certificate_features_recompute_temporal_fields(tmp_path):
+    """Probe a host once and derive its features from the stored certificate."""
+    certificate, cert_path, key_path = _self_signed_certificate(tmp_path)
+    _seed_localhost()
+
+    with _https_server(cert_path, key_path) as port:
+        first = ssl_certification_features.get_tls_connection("localhost", port)
+    # The server is gone, the second lookup is answered by the cache
+    second = ssl_certification_features.get_tls_connection("localhost", port)
+    assert second == first
+    assert first.certificate == certificate.public_bytes(serialization.Encoding.DER)
+
+    stored = ssl_certification_features.get_certificate_cache().get("localhost", port)
+    later = datetime.utcnow() + timedelta(days=89, hours=12)
+
+    class Later(datetime):
+        @classmethod
+        def utcnow(cls):
+            """Return a moment a few hours before the certificate expires."""
+            return later
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(ssl_certification_features, "datetime", Later)
+        features = ssl_certification_features.get_certificate_features(
+            "localhost", stored
+        )
+    assert features.is_valid is True
+    assert features.expires_within_7_days is True
+
+
+def _ca_signed_chain(tmp_path):
+    """Write an RSA leaf certificate issued by an EC CA, served with the CA."""
+    now = datetime.utcnow()
+    ca_key = ec.generate_private_key(ec.SECP256R1())
+    ca_name = x509.Name(
+        [
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "ZeroSSL"),
+            x509.NameAttribute(NameOID.COMMON_NAME, "Test CA"),
+        ]
+    )
+    ca = (
+        x509.CertificateBuilder()
+        .subject_name(ca_name)
+        .issuer_name(ca_name)
+        .public_key(ca_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=365))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=0), critical=True)
+        .sign(ca_key, hashes.SHA256())
+    )
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    leaf = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")]))
+        .issuer_name(ca_name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=30))
+        .add_extension(
+            x509.SubjectAlternativeName(
+                [x509.DNSName("localhost"), x509.IPAddress(ip_address("127.0.0.1"))]
+            ),
+            critical=False,
+        )
+        .sign(ca_key, hashes.SHA256())
+    )
+    ca_path, cert_path, key_path = (
+        tmp_path / "ca.pem",
+        tmp_path / "chain.pem",
+        tmp_path / "key.pem",
+    )
+    ca_path.write_bytes(ca.public_bytes(serialization.Encoding.PEM))
+    cert_path.write_bytes(
+        leaf.public_bytes(serialization.Encoding.PEM)
+        + ca.public_bytes(serialization.Encoding.PEM)
+    )
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    return leaf, ca, ca_path, cert_path, key_path
+
+
+def test_certificate_chain_features_from_parsed_certificate(tmp_path):
+    """Derive key, signature, SAN and chain features from the peer chain."""
+    leaf, ca, ca_path, cert_path, key_path = _ca_signed_chain(tmp_path)
+    _seed_localhost()
+    prober = ssl_certification_features.TLSProber(cafile=str(ca_path))
+
+    with _https_server(cert_path, key_path) as port:
+        connection = prober.probe("localhost", port)
+        response = fetch_url(f"https://127.0.0.1:{port}/", ssl_verify=str(ca_path))
+
+    der = leaf.public_bytes(serialization.Encoding.DER)
+    assert connection.verified is True
+    assert connection.chain == (der, ca.public_bytes(serialization.Encoding.DER))
+    fetched = ssl_certification_features.get_tls_connection_info(response)
+    assert fetched.chain == connection.chain
+    assert fetched.verified is True
+
+    features = ssl_certification_features.get_certificate_features(
+        "localhost", connection
+    )
+    assert features.is_trusted is True
+    assert features.subject == ((("commonName", "localhost"),),)
+    assert features.issuer_common_name == "Test CA"
+    assert features.issuer_organization_name == "ZeroSSL"
+    assert features.issuer_is_free_ca is True
+    assert features.issuer_is_lets_encrypt is False
+    assert features.validity_duration_days == 31
+    assert features.san_count == 2
+    assert (features.key_type, features.key_size) == ("RSA", 2048)
+    assert features.signature_algorithm == "ecdsa-with-SHA256"
+    assert features.chain_length == 2
+
+    # Stored chains come back whole and the parse is reused
+    cache = ssl_certification_features.get_certificate_cache()
+    cache.set("localhost", port, connection)
+    assert cache.get("localhost", port).chain == connection.chain
+    hits = ssl_certification_features.parse_certificate.cache_info().hits
+    ssl_certification_features.get_certificate_features("localhost", connection)
+    assert ssl_certification_features.parse_certificate.cache_info().hits > hits
+
+    scrapy_like = ssl_certification_features.TLSConnectionInfo(certificate=der)
+    features = ssl_certification_features.get_certificate_features(
+        "localhost", scrapy_like
+    )
+    assert features.chain_length == 1
+
+
+def test_unexpected_chain_internals_give_no_chain(tmp_path, monkeypatch):
+    """Drop a chain that does not start with the peer certificate."""
+    certificate, cert_path, key_path = _self_signed_certificate(tmp_path)
+    monkeypatch.setattr(utils, "_unverified_chain", lambda sock: [b"not a leaf"])
+
+    with _https_server(cert_path, key_path) as port:
+        response = fetch_url(f"https://127.0.0.1:{port}/", ssl_verify=False)
+
+    connection = ssl_certification_features.get_tls_connection_info(response)
+    assert connection.certificate == certificate.public_bytes(
+        serialization.Encoding.DER
+    )
+    assert connection.chain == ()
+    assert utils.get_peer_certificate_chain(object()) == ()
+
+
+def test_trust_check_is_deprecated():
+    """Warn on the standalone trust check and never report trust from it."""
+    with pytest.warns(DeprecationWarning, match="get_certificate_features"):
+        is_trusted, _ = ssl_certification_features.is_certificate_trusted({})
+    assert is_trusted is False
+
+
+def test_certificate_features_bulk_does_not_reprobe_failures(monkeypatch):
+    """Report unreachable hosts of a bulk run without a second handshake."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    listener.close()
+    monkeypatch.setattr(
+        ssl_certification_features,
+        "get_tls_certificate",
+        lambda *args: pytest.fail("second TLS handshake"),
+    )
+    prober = ssl_certification_features.TLSProber(connect_timeout=1.0)
+
+    results = dict(
+        ssl_certification_features.get_certificate_features_bulk(
+            ["127.0.0.1"], port, prober
+        )
+    )
+    assert results["127.0.0.1"].validity_message == "No certificate found"
+
+
+def test_tls_prober_tries_each_address_in_turn(tmp_path):
+    """Fall through to the next address when the first one refuses to connect."""
+    certificate, cert_path, key_path = _self_signed_certificate(tmp_path)
+    cache = dns_cache.get_dns_cache()
+    cache.set("localhost", "A", 300, ["127.0.0.2", "127.0.0.1"])
+    cache.set("localhost", "AAAA", 300, [])
+    prober = ssl_certification_features.TLSProber(cafile=str(cert_path))
+
+    with _https_server(cert_path, key_path) as port:
+        connection = prober.probe("localhost", port)
+
+    assert connection.certificate == certificate.public_bytes(
+        serialization.Encoding.DER
+    )
+    assert connection.verified is True
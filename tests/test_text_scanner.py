@@ -0,0 +1,94 @@
+import random
+import re
+import string
+import time
+
+from web2vec.text_scanner import (
+    MultiPatternScanner,
+    _trie_regex,
+    get_keyword_scanner,
+)
+
+
+def test_trie_regex_factors_common_prefixes():
+    """Compile keyword lists into a prefix-factored alternation."""
+    assert _trie_regex(["log", "login", "logout", "bank"]) == "(?:bank|log(?:in|out)?)"
+
+
+def test_scanner_reports_first_match_of_overlapping_signals():
+    """Report keyword and regex signals, even when their matches overlap."""
+    scanner = MultiPatternScanner(
+        keywords={"brand": ["paypal", "pay"]},
+        regexes={"payment": r"pay\w*ment", "copyright": r"©|copyright"},
+    )
+    found = scanner.scan("Secure PAYPAL payment page © 2026")
+
+    assert found["brand"].text == "PAYPAL"
+    assert found["payment"].start == 14
+    assert found["copyright"].text == "©"
+    assert scanner.scan("nothing here") == {}
+    assert list(scanner.scan("payment", signals=["payment"])) == ["payment"]
+
+
+def test_scanner_matched_keywords_include_prefixes():
+    """Return every configured keyword found, including prefix keywords."""
+    scanner = get_keyword_scanner(("log", "login", "bank", "verify"))
+    assert scanner.matched_keywords("Login to your BANK", "keywords") == [
+        "log",
+        "login",
+        "bank",
+    ]
+
+
+def test_scanner_finds_keywords_starting_inside_other_matches():
+    """Report keywords that overlap a longer keyword match of the signal."""
+    scanner = get_keyword_scanner(("abcd", "bc", "c"))
+    matches = [(m.start, m.text) for m in scanner.finditer("x ABCD c")]
+
+    assert matches == [(2, "ABCD"), (3, "BC"), (4, "C"), (7, "c")]
+    assert scanner.matched_keywords("xabcdx", "keywords") == ["abcd", "bc", "c"]
+    # Lowercasing "İ" adds a character, offsets must still map to the text
+    assert scanner.scan("İ abcd")["keywords"].start == 2
+
+
+def _lookahead_scan(keywords, text):
+    """Scan with the former combined zero-width lookahead pattern."""
+    trie = re.compile(_trie_regex(keywords), re.IGNORECASE)
+    combined = re.compile(f"(?=(?:{_trie_regex(keywords)}))", re.IGNORECASE)
+    for match in combined.finditer(text):
+        found = trie.match(text, match.start())
+        return {"keywords": (found.start(), found.group(0))}
+    return {}
+
+
+def _best_time(function, *args):
+    """Return the best wall time of a few calls."""
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def test_keyword_scan_matches_and_outpaces_the_lookahead_scan():
+    """Match the former lookahead scan and run faster on a large page."""
+    rng = random.Random(7)
+    words = [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+        for _ in range(500)
+    ]
+    text = " ".join(rng.choice(words[250:]) for _ in range(20000)).title()
+    keywords = tuple(words[:250])
+    scanner = get_keyword_scanner(keywords)
+
+    def scan(page):
+        """Scan with the compiled keyword scanner."""
+        return {
+            signal: (found.start, found.text)
+            for signal, found in scanner.scan(page).items()
+        }
+
+    for page in (text, text + " " + keywords[3].upper(), "x" + keywords[-1]):
+        assert scan(page) == _lookahead_scan(keywords, page)
+    assert _best_time(scan, text) < _best_time(_lookahead_scan, keywords, text)
@@ -1,9 +1,10 @@
+from web2vec import dns_cache
 from web2vec.extractors import url_geo_features as geo_features
 
 
 def test_url_geo_features_monkeypatched(monkeypatch):
     """Ensure URL geo extractor returns patched ASN and country data."""
-    monkeypatch.setattr(geo_features, "get_ip_from_url", lambda url: "1.1.1.1")
+    monkeypatch.setattr(geo_features, "get_host_addresses", lambda host: ["1.1.1.1"])
     monkeypatch.setattr(geo_features, "get_country", lambda ip: "US")
     monkeypatch.setattr(geo_features, "get_asn", lambda ip: 13335)
 
@@ -12,3 +13,20 @@ def test_url_geo_features_monkeypatched(monkeypatch):
     assert features.url == "https://example.com"
     assert features.country_code == "US"
     assert features.asn == 13335
+
+
+def test_url_geo_features_cover_every_address(monkeypatch):
+    """Look up every A and AAAA address of the host from the shared DNS cache."""
+    cache = dns_cache.get_dns_cache()
+    cache.set("multi.example", "A", 300, ["192.0.2.1", "198.51.100.1"])
+    cache.set("multi.example", "AAAA", 300, ["2001:db8::1"])
+    countries = {"192.0.2.1": "US", "198.51.100.1": "DE", "2001:db8::1": "US"}
+    monkeypatch.setattr(geo_features, "get_country", countries.get)
+    monkeypatch.setattr(geo_features, "get_asn", lambda ip: 64500)
+
+    features = geo_features.get_url_geo_features("https://multi.example/login")
+
+    assert features.ip_addresses == ["192.0.2.1", "198.51.100.1", "2001:db8::1"]
+    assert features.country_codes == ["US", "DE", "US"]
+    assert (features.country_code, features.asn) == ("US", 64500)
+    assert (features.qty_countries, features.qty_asns) == (2, 1)
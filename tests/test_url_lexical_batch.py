@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from web2vec.extractors import (
+    url_lexical_batch as batch,
+    url_lexical_features as lexical,
+)
+
+URLS = [
+    "https://192.168.0.1/path/to/file.html?foo=bar&short.ly=1",
+    "http://login.secure-bank.example.co.uk/a_b/c~d/update.php?id=1112&x=y#frag",
+    "https://user@mail.example.com:8080/über/straße?q=١٢٣",
+    "https://bit.ly/3xYz",
+    "ftp://example.org",
+    "",
+    "not a url at all ~ * $ %20",
+]
+
+
+@pytest.fixture(autouse=True)
+def patch_shortening_services(monkeypatch):
+    """Mock the shortening-service list to a static sample."""
+    monkeypatch.setattr(
+        lexical,
+        "fetch_file_from_url_and_read",
+        lambda url: "short.ly\nbit.ly\n",
+    )
+    monkeypatch.setattr(
+        lexical, "shortening_service_matcher", lexical.ShorteningServiceMatcher()
+    )
+
+
+def scalar_matrix(urls):
+    """Build the expected matrix from the scalar extractor."""
+    return np.array(
+        [
+            batch.url_lexical_features_to_row(lexical.get_url_lexical_features(url))
+            for url in urls
+        ]
+    )
+
+
+def test_batch_matches_scalar_features():
+    """Return exactly the scalar values, including non-ASCII and empty URLs."""
+    matrix = batch.get_url_lexical_features_batch(URLS)
+
+    assert matrix.shape == (len(URLS), len(batch.LEXICAL_BATCH_COLUMNS))
+    assert matrix.dtype == np.float64
+    assert np.array_equal(matrix, scalar_matrix(URLS))
+
+
+def test_batch_groups_rows_by_length(monkeypatch):
+    """Keep scalar values when long URLs are grouped apart from short ones."""
+    monkeypatch.setattr(batch, "_GROUP_ROWS", 3)
+    monkeypatch.setattr(batch, "_GROUP_CELLS", 200)
+    urls = URLS + ["https://example.com/" + "a1-/" * 2000 + "?q=" + "9" * 500]
+
+    counts, non_ascii = batch._char_class_counts(urls)
+    assert counts.shape == (len(urls), len(batch._CLASS_CHARS) + 1)
+    assert non_ascii.tolist() == [False, False, True, False, False, False, False, False]
+    assert np.array_equal(
+        batch.get_url_lexical_features_batch(urls), scalar_matrix(urls)
+    )
+
+
+def test_batch_chunks_and_workers_keep_row_order(monkeypatch):
+    """Merge chunks from parallel workers in input order."""
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    urls = URLS * 3
+
+    matrix = batch.get_url_lexical_features_batch(urls, n_jobs=2, chunk_size=4)
+
+    assert np.array_equal(matrix, scalar_matrix(urls))
+
+
+def test_batch_handles_empty_input_and_rejects_unknown_output():
+    """Return an empty matrix for no URLs and reject unknown output formats."""
+    matrix = batch.get_url_lexical_features_batch([])
+
+    assert matrix.shape == (0, len(batch.LEXICAL_BATCH_COLUMNS))
+    with pytest.raises(ValueError):
+        batch.get_url_lexical_features_batch(URLS, output="csv")
@@ -1,6 +1,10 @@
+import dataclasses
+import tracemalloc
+
 import pytest
 
 from web2vec.extractors import url_lexical_features as lexical
+from web2vec.utils import entropy
 
 
 @pytest.fixture(autouse=True)
@@ -11,6 +15,9 @@ def patch_shortening_services(monkeypatch):
         "fetch_file_from_url_and_read",
         lambda url: "short.ly\nbit.ly\n",
     )
+    monkeypatch.setattr(
+        lexical, "shortening_service_matcher", lexical.ShorteningServiceMatcher()
+    )
 
 
 def test_url_lexical_feature_flags():
@@ -22,7 +29,7 @@ def test_url_lexical_feature_flags():
     assert features.url_length == len(url)
     assert features.url_depth == 3
     assert features.domain_contains_keywords is False
-    assert features.uses_shortening_service is not None
+    assert features.uses_shortening_service is None
     assert features.count_slash_url >= 3
     assert features.domain_entropy > 0
     assert features.number_of_parameters == 2
@@ -31,4 +38,89 @@ def test_url_lexical_feature_flags():
     assert features.having_fragment is False
     assert features.entropy_of_url > 0
     assert features.percentage_numeric_chars > 0
+    assert features.url_shortened is False
+
+
+def test_url_lexical_shortening_service_matches_hostname():
+    """Match shortener hosts by hostname suffix, not by URL substring."""
+    features = lexical.get_url_lexical_features("https://www.short.ly/abc")
+    assert features.uses_shortening_service == "short.ly"
     assert features.url_shortened is True
+
+    assert lexical.uses_shortening_service("https://t.co/xyz") == "t.co"
+    assert lexical.uses_shortening_service("https://microsoft.com/t.co") is None
+    assert lexical.uses_shortening_service("https://example.com/?u=bit.ly") is None
+
+
+def test_shortening_service_matcher_loads_once_and_falls_back(monkeypatch):
+    """Read the list once per refresh and use the bundled list when offline."""
+    calls = []
+
+    def failing_fetch(url):
+        calls.append(url)
+        raise OSError("offline")
+
+    monkeypatch.setattr(lexical, "fetch_file_from_url_and_read", failing_fetch)
+    matcher = lexical.ShorteningServiceMatcher(refresh_interval=3600)
+    assert matcher.match("bit.ly") == "bit.ly"
+    assert matcher.match("tinyurl.com") == "tinyurl.com"
+    assert matcher.match("example.com") is None
+    assert len(calls) == 1
+
+
+def test_url_lexical_features_accept_parsed_url():
+    """Reuse a parsed URL and read subdomains for scheme-less URLs."""
+    url = "www.sub-1.example.com/a/b.exe"
+    parsed = lexical.ParsedURL.from_url(url)
+
+    features = lexical.get_url_lexical_features(url, parsed=parsed)
+    assert features == lexical.get_url_lexical_features(url)
+    assert features.number_of_subdomains == 2
+    assert features.having_hyphen_in_subdomain is True
+    assert features.tld_popularity == 1
+    assert features.suspicious_file_extension is True
+
+
+def test_histogram_counts_match_per_character_scans():
+    """Derive counts, vowels, digits and entropy from one histogram exactly."""
+    value = "https://user@sub-1.example.com/a_b/~c d?x=1&y=2,3+4*5#f$%!"
+    histogram = lexical.char_histogram(value)
+
+    counts = lexical.lexical_char_counts(histogram, "url")
+    for name, char in lexical.LEXICAL_CHARS.items():
+        assert counts[f"count_{name}_url"] == lexical.count_char(char, value)
+    assert lexical.histogram_vowels(histogram) == lexical.count_vowels(value)
+    assert lexical.histogram_numeric_ratio(
+        histogram, len(value)
+    ) == lexical.numeric_chars_ratio(value)
+    assert lexical.entropy_from_histogram(histogram, len(value)) == entropy(value)
+    assert lexical.histogram_repeated_digits(histogram, value) is False
+    assert (
+        lexical.histogram_repeated_digits(lexical.char_histogram("a1112"), "a1112")
+        is True
+    )
+
+
+def test_url_lexical_features_slots_save_memory_per_instance():
+    """Keep field access and asdict while using less memory than a dict class."""
+    features = lexical.get_url_lexical_features("https://a.example.com/x?y=1")
+    values = dataclasses.asdict(features)
+    dict_backed = dataclasses.make_dataclass(
+        "DictURLLexicalFeatures",
+        [(field.name, field.type) for field in dataclasses.fields(features)],
+    )
+
+    def bytes_per_instance(cls, count=2000):
+        tracemalloc.start()
+        instances = [cls(**values) for _ in range(count)]
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(instances) == count
+        return allocated / count
+
+    assert not hasattr(features, "__dict__")
+    assert dataclasses.asdict(lexical.URLLexicalFeatures(**values)) == values
+    assert features.url_length == values["url_length"]
+    assert bytes_per_instance(lexical.URLLexicalFeatures) < 0.5 * bytes_per_instance(
+        dict_backed
+    )
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from web2vec.extractors import url_ngram_features as ngrams
+
+URLS = [
+    "https://login.example.com/account/verify?id=1",
+    "http://ŁÓDŹ.pl/ścieżka",
+    "example.com/no/scheme",
+    "",
+    "https://a.b",
+]
+
+
+def test_url_ngram_vector_is_normalized_and_stable():
+    """Return one L2-normalized sparse row that is equal across calls."""
+    vector = ngrams.get_url_ngram_features(URLS[0])
+
+    assert vector.shape == (1, ngrams.DEFAULT_N_FEATURES)
+    assert vector.nnz > 0
+    assert np.isclose(np.sqrt((vector.data.astype(float) ** 2).sum()), 1.0)
+    assert (vector != ngrams.get_url_ngram_features(URLS[0])).nnz == 0
+
+
+def test_url_ngram_counts_every_component_ngram():
+    """Hash every 3-5 character n-gram of the URL, host and path once."""
+    vector = ngrams.get_url_ngram_features(
+        "https://ab.cd/ef", alternate_sign=False, norm=None, n_features=2**31
+    )
+
+    # url (16 chars), host (5 chars) and path (3 chars) with boundary markers
+    assert vector.data.sum() == (16 + 15 + 14) + (5 + 4 + 3) + (3 + 2 + 1)
+    assert vector.data.min() > 0
+
+
+def test_url_ngram_batch_matches_single_rows():
+    """Build the same rows from a generator in small chunks."""
+    matrix = ngrams.get_url_ngram_features_batch(
+        (url for url in URLS), n_features=2**12, chunk_size=2
+    )
+
+    assert matrix.shape == (len(URLS), 2**12)
+    assert matrix[3].nnz == 0
+    for row, url in enumerate(URLS):
+        expected = ngrams.get_url_ngram_features(url, n_features=2**12)
+        assert np.array_equal(matrix[row].toarray(), expected.toarray())
+
+
+def test_url_ngram_batch_bounds_groups_of_long_urls(monkeypatch):
+    """Hash a pathological URL in a group of its own, keeping the results."""
+    long_url = "https://example.com/" + "a/" * 5000
+    urls = [long_url] + URLS * 20
+    groups = []
+
+    def recording_groups(lengths, max_rows, max_cells):
+        """Record the padded size of every group hashed together."""
+        for group in ngrams_groups(lengths, max_rows, max_cells):
+            groups.append((len(group), int(lengths[group].max())))
+            yield group
+
+    ngrams_groups = ngrams.length_sorted_groups
+    monkeypatch.setattr(ngrams, "length_sorted_groups", recording_groups)
+    matrix = ngrams.get_url_ngram_features_batch(urls, n_features=2**12)
+
+    assert groups
+    for rows, longest in groups:
+        assert rows == 1 or rows * longest <= ngrams._GROUP_CELLS
+    assert (len(urls) - 1, len(long_url)) not in groups
+    for row in (0, 1, len(urls) - 1):
+        expected = ngrams.get_url_ngram_features(urls[row], n_features=2**12)
+        assert np.array_equal(matrix[row].toarray(), expected.toarray())
+
+
+def test_url_ngram_batch_handles_empty_input_and_invalid_options():
+    """Return an empty matrix for no URLs and reject invalid options."""
+    assert ngrams.get_url_ngram_features_batch([], n_features=8).shape == (0, 8)
+    with pytest.raises(ValueError):
+        ngrams.get_url_ngram_features("https://a.b", ngram_range=(4, 2))
+    with pytest.raises(ValueError):
+        ngrams.get_url_ngram_features("https://a.b", norm="max")
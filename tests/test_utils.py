@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
+import numpy as np
 import pytest
 import requests
 
@@ -31,6 +32,25 @@ def test_valid_ip_and_domain_helpers():
     assert utils.entropy("aaaaabbbbcc") == pytest.approx(1.49, rel=0.01)
 
 
+def test_parse_url_builds_shared_components():
+    """Parse a URL once into host, registrable domain, subdomain and path parts."""
+    url = "HTTP://User:pw@WWW.Shop.Example.CO.UK:8080/a/b/file.php?x=1#top"
+    parsed = utils.parse_url(url)
+
+    assert parsed is utils.parse_url(url)
+    assert parsed.scheme == "http"
+    assert parsed.netloc == "User:pw@WWW.Shop.Example.CO.UK:8080"
+    assert parsed.host == "www.shop.example.co.uk"
+    assert parsed.registrable_domain == "example.co.uk"
+    assert parsed.subdomain == "www.shop"
+    assert parsed.suffix == "co.uk"
+    assert parsed.directory == "/a/b"
+    assert parsed.query == "x=1"
+    assert parsed.fragment == "top"
+    assert utils.ParsedURL.from_url("example.com/path").suffix == "com"
+    assert utils.ParsedURL.from_url("https://192.0.2.1/").registrable_domain == ""
+
+
 def test_get_file_path_for_url_timestamp_variants(monkeypatch, tmp_path):
     """Ensure timestamp selection logic matches timeout buckets."""
     monkeypatch.setattr(utils, "datetime", _FixedDatetime)
@@ -195,3 +215,14 @@ def test_fetch_url_ssl_verify_override(monkeypatch):
     utils.fetch_url("https://example.com", ssl_verify=False)
     assert warning_calls["count"] == 1
     assert captured["verify"] is False
+
+
+def test_length_sorted_groups_bound_rows_and_padded_cells():
+    """Group strings by length without letting a long one widen a group."""
+    lengths = np.array([3, 0, 1000, 2, 5, 4, 1])
+    groups = [
+        group.tolist()
+        for group in utils.length_sorted_groups(lengths, max_rows=3, max_cells=20)
+    ]
+
+    assert groups == [[6, 3, 0], [5, 4], [2]]